@@ -4,30 +4,51 @@
 - Widgets: https://aiogram-dialog.readthedocs.io/en/latest/widgets/index.html
 """
 
-from aiogram.types import Message
+from aiogram.types import CallbackQuery, Message
 from aiogram_dialog import Dialog, Window, DialogManager
-from aiogram_dialog.widgets.text import Const
+from aiogram_dialog.widgets.text import Const, Format
 from aiogram_dialog.widgets.input import TextInput, ManagedTextInput
-from aiogram_dialog.widgets.kbd import Button, Back, Cancel
+from aiogram_dialog.widgets.kbd import (
+    Button,
+    Back,
+    Cancel,
+    Column,
+    Multiselect,
+    Select,
+)
 
-import aiohttp
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
-from config import TASKS_URL, TIMEZONE
+from config import (
+    RECURRENCE_CHOICES,
+    RECURRENCE_NONE,
+    REMINDER_OFFSET_CHOICES,
+    TASKS_URL,
+    TIMEZONE,
+)
 from messages import (
     ERROR_CREATE_TASK_API,
     TASK_NAME_PROMPT,
     TASK_DESCRIPTION_PROMPT,
     TASK_CATEGORY_PROMPT,
     TASK_END_DATE_PROMPT,
+    TASK_RECURRENCE_PROMPT,
+    TASK_REMINDERS_PROMPT,
     ERROR_DATE_FORMAT,
     SUCCESS_TASK_CREATED,
     TASK_CREATION_CANCELLED,
     BUTTON_BACK,
     BUTTON_CANCEL,
+    BUTTON_REMINDERS_DONE,
+    BUTTON_REMINDER_CHECKED,
+    BUTTON_REMINDER_UNCHECKED,
+)
+from utils import (
+    find_or_create_category_id,
+    get_idempotency_key,
+    send_idempotent_request,
 )
-from utils import find_or_create_category_id
 from states import AddTaskStates
 
 
@@ -82,27 +103,33 @@ async def create_task_from_dialog(dialog_manager: DialogManager) -> None:
         "description": data.get("description", ""),
         "end_date": data["end_date"],
         "user_telegram_id": user_id,
+        "recurrence": data.get("recurrence", ""),
+        "reminder_offsets": data.get("reminder_offsets", []),
     }
 
     # Добавление категории если указана
     category_name = data.get("category_name")
     if category_name:
-        category_id = await find_or_create_category_id(category_name)
+        category_id = await find_or_create_category_id(
+            category_name,
+            user_id,
+        )
         if category_id:
             task_payload["category_id"] = category_id
 
-    # Отправка запроса к API
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
-            TASKS_URL,
-            json=task_payload,
-            timeout=10,
-        ) as response:
-            if response.status not in (200, 201):
-                error_text = await response.text()
-                await dialog_manager.event.answer(
-                    ERROR_CREATE_TASK_API.format(error=error_text)
-                )
+    # Отправка запроса к API. Ключ сохраняется в данных диалога,
+    # поэтому повторный ввод даты после таймаута не создаст дубликат
+    status, error_text = await send_idempotent_request(
+        "POST",
+        TASKS_URL,
+        task_payload,
+        get_idempotency_key(data, task_payload),
+        user_telegram_id=user_id,
+    )
+    if status not in (200, 201):
+        await dialog_manager.event.message.answer(
+            ERROR_CREATE_TASK_API.format(error=error_text)
+        )
 
 
 async def on_task_end_date_entered(
@@ -121,15 +148,44 @@ async def on_task_end_date_entered(
             "%Y-%m-%d %H:%M",
         ).replace(tzinfo=moscow_tz)
         dialog_manager.dialog_data["end_date"] = end_dt.isoformat()
-
-        # Создание задачи и завершение диалога
-        await create_task_from_dialog(dialog_manager)
-        await message.answer(SUCCESS_TASK_CREATED)
-        await dialog_manager.done()
+        await dialog_manager.next()
     except ValueError:
         await message.answer(ERROR_DATE_FORMAT)
 
 
+async def on_task_recurrence_selected(
+    callback: CallbackQuery,
+    widget: Select,
+    dialog_manager: DialogManager,
+    item_id: str,
+) -> None:
+    """Обработчик выбора повтора задачи."""
+
+    dialog_manager.dialog_data["recurrence"] = (
+        "" if item_id == RECURRENCE_NONE else item_id
+    )
+    await dialog_manager.next()
+
+
+async def on_task_reminders_done(
+    callback: CallbackQuery,
+    button: Button,
+    dialog_manager: DialogManager,
+) -> None:
+    """Обработчик выбора напоминаний до срока: создает задачу."""
+
+    reminders = dialog_manager.find("task_reminders_select")
+    dialog_manager.dialog_data["reminder_offsets"] = sorted(
+        reminders.get_checked(),
+        reverse=True,
+    )
+
+    # Создание задачи и завершение диалога
+    await create_task_from_dialog(dialog_manager)
+    await callback.message.answer(SUCCESS_TASK_CREATED)
+    await dialog_manager.done()
+
+
 async def on_cancel_clicked(
     message: Message,
     button: Button,
@@ -195,4 +251,46 @@ add_task_dialog = Dialog(
         ),
         state=AddTaskStates.end_date,
     ),
+    Window(
+        Const(TASK_RECURRENCE_PROMPT),
+        Column(
+            Select(
+                Format("{item[1]}"),
+                id="task_recurrence_select",
+                item_id_getter=lambda x: x[0],
+                items=RECURRENCE_CHOICES,
+                on_click=on_task_recurrence_selected,
+            ),
+        ),
+        Back(Const(BUTTON_BACK)),
+        Cancel(
+            Const(BUTTON_CANCEL),
+            on_click=on_cancel_clicked,
+        ),
+        state=AddTaskStates.recurrence,
+    ),
+    Window(
+        Const(TASK_REMINDERS_PROMPT),
+        Column(
+            Multiselect(
+                Format(BUTTON_REMINDER_CHECKED),
+                Format(BUTTON_REMINDER_UNCHECKED),
+                id="task_reminders_select",
+                item_id_getter=lambda x: x[0],
+                items=REMINDER_OFFSET_CHOICES,
+                type_factory=int,
+            ),
+        ),
+        Button(
+            Const(BUTTON_REMINDERS_DONE),
+            id="task_reminders_done",
+            on_click=on_task_reminders_done,
+        ),
+        Back(Const(BUTTON_BACK)),
+        Cancel(
+            Const(BUTTON_CANCEL),
+            on_click=on_cancel_clicked,
+        ),
+        state=AddTaskStates.reminders,
+    ),
 )
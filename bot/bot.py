@@ -6,21 +6,57 @@
 """
 
 import asyncio
+from datetime import datetime
+import os
 from aiogram import Bot, Dispatcher, types
-from aiogram.types import Message
-from aiogram.filters import Command
+from aiogram.types import FSInputFile, Message
+from aiogram.filters import Command, CommandObject
 from aiogram_dialog import DialogManager, StartMode, setup_dialogs
 
-from config import BOT_TOKEN
+from config import (
+    AGENDA_OFF_KEYWORDS,
+    AGENDA_TIME_FORMAT,
+    BOT_TOKEN,
+    EXPORT_FORMATS,
+    TIMEZONE,
+)
 from messages import (
     START_MESSAGE,
+    AGENDA_DISABLED,
+    AGENDA_ENABLED,
+    AGENDA_STATUS_OFF,
+    AGENDA_STATUS_ON,
+    AGENDA_USAGE,
+    ERROR_AGENDA,
     TASK_LIST_HEADER,
+    TASK_LIST_TODAY_HEADER,
+    TASK_LIST_OVERDUE_HEADER,
+    TASK_LIST_WEEK_HEADER,
+    SUCCESS_NO_TASKS_TODAY,
+    SUCCESS_NO_TASKS_OVERDUE,
+    SUCCESS_NO_TASKS_WEEK,
+    FIND_USAGE,
+    FIND_NO_RESULTS,
+    FIND_RESULTS_HEADER,
+    ERROR_SEARCH_TASKS,
+    ERROR_FETCH_STATS,
+    ERROR_EXPORT_TASKS,
+    EXPORT_USAGE,
+    EXPORT_CAPTION,
 )
 from add_task import add_task_dialog
 from edit_task import edit_task_dialog
 from delete_task import delete_task_dialog
 from states import AddTaskStates, EditTaskStates, DeleteTaskStates
-from utils import format_single_task, tasks_check
+from utils import (
+    download_tasks_export,
+    fetch_user_stats,
+    format_stats,
+    format_task_list,
+    request_agenda,
+    search_user_tasks,
+    tasks_check,
+)
 
 
 bot = Bot(token=BOT_TOKEN)
@@ -90,12 +126,183 @@ async def list_tasks(
 ) -> None:
     """Показывает список всех задач пользователя."""
 
-    # Форматирование списка задач
-    task_list = "\n\n".join(
-        format_single_task(task) for task in tasks if isinstance(task, dict)
+    await message.answer(TASK_LIST_HEADER + format_task_list(tasks))
+
+
+@dp.message(Command("today"))
+@tasks_check(
+    due="today",
+    ordering="end_date",
+    tz=TIMEZONE,
+    occurrences="true",
+    empty_message=SUCCESS_NO_TASKS_TODAY,
+)
+async def list_today_tasks(
+    message: types.Message,
+    tasks: list,
+) -> None:
+    """Показывает задачи со сроком сегодня (с повторами за день)."""
+
+    await message.answer(TASK_LIST_TODAY_HEADER + format_task_list(tasks))
+
+
+@dp.message(Command("overdue"))
+@tasks_check(
+    due="overdue",
+    ordering="end_date",
+    empty_message=SUCCESS_NO_TASKS_OVERDUE,
+)
+async def list_overdue_tasks(
+    message: types.Message,
+    tasks: list,
+) -> None:
+    """Показывает просроченные задачи."""
+
+    await message.answer(TASK_LIST_OVERDUE_HEADER + format_task_list(tasks))
+
+
+@dp.message(Command("week"))
+@tasks_check(
+    within_days=7,
+    ordering="end_date",
+    tz=TIMEZONE,
+    occurrences="true",
+    empty_message=SUCCESS_NO_TASKS_WEEK,
+)
+async def list_week_tasks(
+    message: types.Message,
+    tasks: list,
+) -> None:
+    """Показывает задачи со сроком в ближайшие 7 дней (с повторами)."""
+
+    await message.answer(TASK_LIST_WEEK_HEADER + format_task_list(tasks))
+
+
+@dp.message(Command("find"))
+async def find_tasks(
+    message: types.Message,
+    command: CommandObject,
+) -> None:
+    """Полнотекстовый поиск по задачам пользователя: /find <запрос>."""
+
+    query = (command.args or "").strip()
+    if not query:
+        await message.answer(FIND_USAGE)
+        return
+
+    result = search_user_tasks(message.from_user.id, query)
+    if result["error"]:
+        await message.answer(ERROR_SEARCH_TASKS.format(error=result["error"]))
+        return
+
+    tasks = result["tasks"]
+    if not tasks:
+        await message.answer(FIND_NO_RESULTS.format(query=query))
+        return
+
+    await message.answer(
+        FIND_RESULTS_HEADER.format(query=query) + format_task_list(tasks)
+    )
+
+
+@dp.message(Command("stats"))
+async def show_stats(message: types.Message) -> None:
+    """Показывает статистику задач пользователя."""
+
+    result = fetch_user_stats(message.from_user.id)
+    if result["error"]:
+        await message.answer(ERROR_FETCH_STATS.format(error=result["error"]))
+        return
+
+    await message.answer(format_stats(result["stats"]))
+
+
+@dp.message(Command("export"))
+async def export_tasks(
+    message: types.Message,
+    command: CommandObject,
+) -> None:
+    """Отправляет пользователю файл с выгрузкой задач: /export [csv]."""
+
+    export_format = (command.args or EXPORT_FORMATS[0]).strip().lower()
+    if export_format not in EXPORT_FORMATS:
+        await message.answer(EXPORT_USAGE)
+        return
+
+    result = await download_tasks_export(
+        message.from_user.id,
+        export_format,
     )
+    if result["error"]:
+        await message.answer(ERROR_EXPORT_TASKS.format(error=result["error"]))
+        return
 
-    await message.answer(TASK_LIST_HEADER + task_list)
+    try:
+        await message.answer_document(
+            FSInputFile(
+                result["path"],
+                filename=f"tasks.{export_format}",
+            ),
+            caption=EXPORT_CAPTION,
+        )
+    finally:
+        os.remove(result["path"])
+
+
+@dp.message(Command("agenda"))
+async def manage_agenda(
+    message: types.Message,
+    command: CommandObject,
+) -> None:
+    """
+    Утренняя сводка задач:
+    /agenda 08:00 - включить, /agenda off - выключить,
+    /agenda - текущие настройки.
+    """
+
+    args = (command.args or "").strip().lower()
+
+    if not args:
+        result = request_agenda(message.from_user.id)
+        if result["error"]:
+            await message.answer(ERROR_AGENDA.format(error=result["error"]))
+            return
+
+        agenda = result["agenda"]
+        status = (
+            AGENDA_STATUS_ON.format(send_at=agenda["send_at"])
+            if agenda["is_active"]
+            else AGENDA_STATUS_OFF
+        )
+        await message.answer(f"{status}\n\n{AGENDA_USAGE}")
+        return
+
+    if args in AGENDA_OFF_KEYWORDS:
+        result = request_agenda(message.from_user.id, "delete")
+        if result["error"]:
+            await message.answer(ERROR_AGENDA.format(error=result["error"]))
+            return
+        await message.answer(AGENDA_DISABLED)
+        return
+
+    try:
+        send_at = datetime.strptime(args, AGENDA_TIME_FORMAT)
+    except ValueError:
+        await message.answer(AGENDA_USAGE)
+        return
+
+    result = request_agenda(
+        message.from_user.id,
+        "put",
+        send_at.strftime(AGENDA_TIME_FORMAT),
+    )
+    if result["error"]:
+        await message.answer(ERROR_AGENDA.format(error=result["error"]))
+        return
+
+    await message.answer(
+        AGENDA_ENABLED.format(send_at=result["agenda"]["send_at"])
+    )
 
 
 async def main() -> None:
@@ -15,6 +15,44 @@ BOT_TOKEN = os.getenv("TOKEN")
 TIMEZONE = "Europe/Moscow"
 DATE_INPUT_FORMAT = "%Y-%m-%d %H:%M"
 
+# Повтор POST/PATCH с тем же Idempotency-Key при таймауте
+# или пока первый запрос еще выполняется (409)
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+API_RETRY_ATTEMPTS = 3
+API_RETRY_DELAY = 1
+
+# ID пользователя Telegram для ограничения частоты запросов к API
+# там, где его нет в параметрах запроса (категории)
+TELEGRAM_USER_HEADER = "X-Telegram-User-Id"
+
+# Повтор задачи: значение recurrence в API и подпись кнопки
+RECURRENCE_NONE = "none"
+RECURRENCE_CHOICES = (
+    (RECURRENCE_NONE, "Не повторять"),
+    ("daily", "Каждый день"),
+    ("weekly", "Каждую неделю"),
+    ("monthly", "Каждый месяц"),
+)
+RECURRENCE_LABELS = dict(RECURRENCE_CHOICES)
+
+# Напоминания до срока: минуты до срока и подпись кнопки
+REMINDER_OFFSET_CHOICES = (
+    (7 * 24 * 60, "за неделю"),
+    (24 * 60, "за 1 день"),
+    (3 * 60, "за 3 часа"),
+    (60, "за 1 час"),
+    (15, "за 15 минут"),
+)
+
+# Утренняя сводка: формат времени и слова для отключения
+AGENDA_TIME_FORMAT = "%H:%M"
+AGENDA_OFF_KEYWORDS = {"off", "выкл", "нет", "-"}
+
+# Выгрузка задач
+EXPORT_FORMATS = ("ndjson", "csv")
+EXPORT_TIMEOUT = 120
+EXPORT_DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
 # Пропуск названия категории при создании
 SKIP_KEYWORDS = {
     "-",
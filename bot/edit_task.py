@@ -9,13 +9,14 @@ from aiogram_dialog.widgets.kbd import (
     Cancel,
     Column,
     Group,
+    Multiselect,
     Select,
 )
 
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
-from config import TIMEZONE
+from config import REMINDER_OFFSET_CHOICES, TIMEZONE
 from messages import (
     BUTTON_BACK,
     BUTTON_CANCEL,
@@ -23,6 +24,7 @@ from messages import (
     TASK_DESCRIPTION_PROMPT,
     TASK_CATEGORY_PROMPT,
     TASK_END_DATE_PROMPT,
+    TASK_REMINDERS_PROMPT,
     ERROR_DATE_FORMAT,
     SUCCESS_TASK_UPDATED,
     TASK_UPDATE_CANCELLED,
@@ -35,11 +37,19 @@ from messages import (
     BUTTON_EDIT_DESCRIPTION,
     BUTTON_EDIT_CATEGORY,
     BUTTON_EDIT_END_DATE,
+    BUTTON_EDIT_REMINDERS,
+    BUTTON_REMINDERS_DONE,
+    BUTTON_REMINDER_CHECKED,
+    BUTTON_REMINDER_UNCHECKED,
+    BUTTON_MARK_DONE,
+    SUCCESS_TASK_DONE,
+    SUCCESS_RECURRING_TASK_DONE,
     NO_DESCRIPTION,
     NO_CATEGORY,
 )
 from utils import (
     fetch_user_tasks,
+    format_readable,
     update_task,
     find_or_create_category_id,
     fetch_single_task,
@@ -175,6 +185,58 @@ async def on_end_date_edit_clicked(
     await dialog_manager.switch_to(EditTaskStates.edit_end_date)
 
 
+async def on_reminders_edit_clicked(
+    callback: CallbackQuery,
+    button: Button,
+    dialog_manager: DialogManager,
+) -> None:
+    """Обработчик кнопки напоминаний: отмечает уже выбранные."""
+
+    dialog_manager.dialog_data["editing_field"] = "reminder_offsets"
+    task = dialog_manager.dialog_data.get("current_task") or {}
+
+    reminders = dialog_manager.find("edit_reminders_select")
+    await reminders.reset_checked()
+    for offset in task.get("reminder_offsets", []):
+        await reminders.set_checked(offset, True)
+    await dialog_manager.switch_to(EditTaskStates.edit_reminders)
+
+
+async def on_mark_done_clicked(
+    callback: CallbackQuery,
+    button: Button,
+    dialog_manager: DialogManager,
+) -> None:
+    """Обработчик кнопки отметки задачи выполненной."""
+
+    task_id = dialog_manager.dialog_data["task_id"]
+    user_id = dialog_manager.event.from_user.id
+
+    result = await update_task(
+        task_id,
+        {"status": "done"},
+        user_id,
+    )
+
+    if result["error"]:
+        await callback.message.answer(
+            ERROR_UPDATE_TASK.format(
+                error=result["error"],
+            )
+        )
+    elif result["task"].get("recurrence"):
+        # Повторяющаяся задача остается открытой со следующим сроком
+        await callback.message.answer(
+            SUCCESS_RECURRING_TASK_DONE.format(
+                end_date=format_readable(result["task"]["end_date"]),
+            )
+        )
+    else:
+        await callback.message.answer(SUCCESS_TASK_DONE)
+
+    await dialog_manager.done()
+
+
 # Обработчики ввода данных
 async def on_name_updated(
     message: Message,
@@ -248,7 +310,7 @@ async def on_category_updated(
     if text.lower() in ["пропустить", "skip", "-", "нет", "без категории"]:
         update_data = {"category": None}
     else:
-        category_id = await find_or_create_category_id(text)
+        category_id = await find_or_create_category_id(text, user_id)
         if category_id:
             update_data = {"category_id": category_id}
         else:
@@ -311,6 +373,35 @@ async def on_end_date_updated(
         await message.answer(ERROR_DATE_FORMAT)
 
 
+async def on_reminders_updated(
+    callback: CallbackQuery,
+    button: Button,
+    dialog_manager: DialogManager,
+) -> None:
+    """Обработчик сохранения напоминаний до срока."""
+
+    task_id = dialog_manager.dialog_data["task_id"]
+    user_id = dialog_manager.event.from_user.id
+    reminders = dialog_manager.find("edit_reminders_select")
+
+    result = await update_task(
+        task_id,
+        {"reminder_offsets": reminders.get_checked()},
+        user_id,
+    )
+
+    if result["error"]:
+        await callback.message.answer(
+            ERROR_UPDATE_TASK.format(
+                error=result["error"],
+            )
+        )
+    else:
+        await callback.message.answer(SUCCESS_TASK_UPDATED)
+
+    await dialog_manager.done()
+
+
 async def on_edit_cancel(
     message: Message,
     button: Button,
@@ -366,6 +457,16 @@ edit_task_dialog = Dialog(
                 id="edit_end_date",
                 on_click=on_end_date_edit_clicked,
             ),
+            Button(
+                Const(BUTTON_EDIT_REMINDERS),
+                id="edit_reminders",
+                on_click=on_reminders_edit_clicked,
+            ),
+            Button(
+                Const(BUTTON_MARK_DONE),
+                id="mark_done",
+                on_click=on_mark_done_clicked,
+            ),
         ),
         Back(Const(BUTTON_BACK)),
         Cancel(
@@ -427,4 +528,28 @@ edit_task_dialog = Dialog(
         ),
         state=EditTaskStates.edit_end_date,
     ),
+    Window(
+        Const(TASK_REMINDERS_PROMPT),
+        Column(
+            Multiselect(
+                Format(BUTTON_REMINDER_CHECKED),
+                Format(BUTTON_REMINDER_UNCHECKED),
+                id="edit_reminders_select",
+                item_id_getter=lambda x: x[0],
+                items=REMINDER_OFFSET_CHOICES,
+                type_factory=int,
+            ),
+        ),
+        Button(
+            Const(BUTTON_REMINDERS_DONE),
+            id="edit_reminders_done",
+            on_click=on_reminders_updated,
+        ),
+        Back(Const(BUTTON_BACK)),
+        Cancel(
+            Const(BUTTON_CANCEL),
+            on_click=on_edit_cancel,
+        ),
+        state=EditTaskStates.edit_reminders,
+    ),
 )
@@ -4,7 +4,14 @@ START_MESSAGE = """Привет! 🎉
 Доступные команды:
 /add_task - добавить новую задачу
 /tasks - посмотреть все задачи
-/edit_task - редактировать задачу
+/today - задачи со сроком сегодня
+/overdue - просроченные задачи
+/week - задачи на ближайшие 7 дней
+/find - найти задачи по тексту
+/stats - статистика по задачам
+/export - выгрузить задачи в файл (ndjson или csv)
+/agenda - утренняя сводка задач (например /agenda 08:00)
+/edit_task - редактировать задачу или отметить выполненной
 /delete_task - удалить задачу"""
 
 # Сообщения диалога добавления задачи
@@ -12,9 +19,13 @@ TASK_NAME_PROMPT = "📝 Введите название задачи:"
 TASK_DESCRIPTION_PROMPT = "📋 Введите описание задачи:"
 TASK_CATEGORY_PROMPT = "🏷️ Введите категорию задачи (или - ):"
 TASK_END_DATE_PROMPT = "⏰ Введите дату завершения в формате YYYY-MM-DD HH:mm (МСК):\n\nПример: 2025-10-20 14:30"  # noqa: E501
+TASK_RECURRENCE_PROMPT = "🔁 Повторять задачу?"
+TASK_REMINDERS_PROMPT = "🔔 Когда еще напомнить? Напоминание в срок придет в любом случае.\n\nОтметьте нужные и нажмите «Готово»:"  # noqa: E501
 
 # Сообщения для редактирования и удаления задачи
 SUCCESS_TASK_UPDATED = "✅ Задача успешно обновлена!"
+SUCCESS_TASK_DONE = "✅ Задача выполнена, напоминание отменено!"
+SUCCESS_RECURRING_TASK_DONE = "✅ Выполнено! 🔁 Следующий раз: {end_date}"
 SUCCESS_TASK_DELETED = "✅ Задача успешно удалена!"
 TASK_UPDATE_CANCELLED = "❌ Редактирование задачи отменено"
 TASK_DELETION_CANCELLED = "❌ Удаление задачи отменено"
@@ -28,19 +39,62 @@ ERROR_UPDATE_TASK = "❌ Ошибка обновления: {error}"
 ERROR_DELETE_TASK = "❌ Ошибка удаления: {error}"
 ERROR_CREATE_CATEGORY = "❌ Ошибка при создании категории"
 ERROR_CREATE_TASK_API = "❌ Ошибка при создании задачи: {error}"
+ERROR_SEARCH_TASKS = "❌ Не удалось выполнить поиск: {error}"
+ERROR_FETCH_STATS = "❌ Не удалось получить статистику: {error}"
+ERROR_EXPORT_TASKS = "❌ Не удалось выгрузить задачи: {error}"
+ERROR_AGENDA = "❌ Не удалось изменить сводку: {error}"
 
 # Сообщения об успехе
 SUCCESS_TASK_CREATED = "✅ Задача успешно создана!"
 SUCCESS_NO_TASKS = "У вас нет задач. 🎉"
+SUCCESS_NO_TASKS_TODAY = "На сегодня задач нет. 🎉"
+SUCCESS_NO_TASKS_OVERDUE = "Просроченных задач нет. 🎉"
+SUCCESS_NO_TASKS_WEEK = "На ближайшие 7 дней задач нет. 🎉"
 TASK_CREATION_CANCELLED = "❌ Создание задачи отменено"
 
+# Поиск задач
+FIND_USAGE = "🔍 Укажите текст для поиска.\n\nПример: /find молоко"
+FIND_NO_RESULTS = "🔍 По запросу «{query}» ничего не найдено"
+FIND_RESULTS_HEADER = "🔍 Найдено по запросу «{query}»:\n\n"
+
+# Выгрузка задач
+EXPORT_USAGE = "📦 Формат выгрузки: ndjson или csv.\n\nПример: /export csv"
+EXPORT_CAPTION = "📦 Выгрузка ваших задач"
+
+# Утренняя сводка
+AGENDA_ENABLED = "☀️ Сводка задач на день будет приходить каждый день в {send_at} (МСК)"  # noqa: E501
+AGENDA_DISABLED = "🌙 Утренняя сводка выключена"
+AGENDA_USAGE = """☀️ Утренняя сводка: просроченные задачи и задачи на сегодня.
+
+/agenda 08:00 - присылать каждый день в 08:00 (МСК)
+/agenda off - выключить"""
+AGENDA_STATUS_ON = "☀️ Сводка приходит каждый день в {send_at} (МСК)"
+AGENDA_STATUS_OFF = "🌙 Утренняя сводка выключена"
+
+# Статистика задач
+STATS_FORMAT = """📊 Статистика задач
+
+📋 Открыто: {total}
+✅ Выполнено: {done}
+⚠️ Просрочено: {overdue}
+🗓️ На ближайшие 7 дней: {due_week}
+⏰ Ожидают напоминания: {reminders_pending}
+
+🔖 По категориям:
+{categories}"""
+STATS_CATEGORY_LINE = "• {name}: {total}"
+
 # Форматы задач
 TASK_LIST_HEADER = "📋 Ваши задачи:\n\n"
+TASK_LIST_TODAY_HEADER = "📅 Задачи на сегодня:\n\n"
+TASK_LIST_OVERDUE_HEADER = "⚠️ Просроченные задачи:\n\n"
+TASK_LIST_WEEK_HEADER = "🗓️ Задачи на ближайшие 7 дней:\n\n"
 TASK_FORMAT = """📌 Задача: {name}
 📃 Описание: {description}
 🔖 Категория: {category}
 🕒 Дата создания: {created_date}
 🔥 Дата завершения: {end_date}"""
+TASK_RECURRENCE_LINE = "\n🔁 Повтор: {recurrence}"
 
 # Тексты для диалогов
 SELECT_TASK_EDIT = "📝 Выберите задачу для редактирования:"
@@ -55,6 +109,11 @@ BUTTON_EDIT_NAME = "📝 Название"
 BUTTON_EDIT_DESCRIPTION = "📋 Описание"
 BUTTON_EDIT_CATEGORY = "🏷️ Категория"
 BUTTON_EDIT_END_DATE = "⏰ Дата завершения"
+BUTTON_EDIT_REMINDERS = "🔔 Напоминания"
+BUTTON_REMINDERS_DONE = "✅ Готово"
+BUTTON_REMINDER_CHECKED = "✅ {item[1]}"
+BUTTON_REMINDER_UNCHECKED = "▫️ {item[1]}"
+BUTTON_MARK_DONE = "✅ Выполнено"
 BUTTON_CONFIRM_DELETE = "✅ Да, удалить"
 BUTTON_CANCEL_DELETE = "❌ Нет, отменить"
 
@@ -6,6 +6,8 @@ class AddTaskStates(StatesGroup):
     description = State()
     category = State()
     end_date = State()
+    recurrence = State()
+    reminders = State()
 
 
 class EditTaskStates(StatesGroup):
@@ -15,6 +17,7 @@ class EditTaskStates(StatesGroup):
     edit_description = State()
     edit_category = State()
     edit_end_date = State()
+    edit_reminders = State()
 
 
 class DeleteTaskStates(StatesGroup):
@@ -7,20 +7,32 @@
 
 from aiogram.types import Message
 import aiohttp
+import asyncio
 from datetime import datetime
 from functools import wraps
+import json
 import requests
+import tempfile
 from typing import Any
+import uuid
 from zoneinfo import ZoneInfo
 
 from config import (
+    API_RETRY_ATTEMPTS,
+    API_RETRY_DELAY,
     CATEGORIES_URL,
+    EXPORT_DOWNLOAD_CHUNK_SIZE,
+    EXPORT_TIMEOUT,
+    IDEMPOTENCY_HEADER,
+    RECURRENCE_LABELS,
     SKIP_KEYWORDS,
     TASKS_URL,
+    TELEGRAM_USER_HEADER,
     TIMEZONE,
     RU_MONTHS_GEN,
 )
 from messages import (
+    NO_CATEGORY,
     EMPTY_FIELD,
     EMPTY_DESCRIPTION,
     ERROR_FETCH_TASKS,
@@ -28,55 +40,79 @@ from messages import (
 )
 
 
-def tasks_check(func):
+def tasks_check(
+    func=None,
+    *,
+    empty_message: str = SUCCESS_NO_TASKS,
+    **filters,
+):
     """
     Декоратор для проверки наличия задач у пользователя.
     Автоматически обрабатывает ошибки и пустые списки.
+
+    Можно передать фильтры API, тогда запрашиваются только
+    подходящие задачи:
+    @tasks_check(due="today", empty_message=SUCCESS_NO_TASKS_TODAY)
     """
 
-    @wraps(func)
-    async def wrapper(
-        message: Message,
-        *args,
-        **kwargs,
-    ) -> Any | None:
-        result = fetch_user_tasks(message.from_user.id)
-
-        if result["error"]:
-            await message.answer(
-                ERROR_FETCH_TASKS.format(error=result["error"])
-            )  # noqa: E501
-            return
-
-        tasks = result["tasks"]
-        if not tasks:
-            await message.answer(SUCCESS_NO_TASKS)
-            return
-
-        # Передача задачи в декорируемую функцию
-        return await func(
-            message,
-            tasks,
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(
+            message: Message,
             *args,
             **kwargs,
-        )
+        ) -> Any | None:
+            result = fetch_user_tasks(message.from_user.id, **filters)
+
+            if result["error"]:
+                await message.answer(
+                    ERROR_FETCH_TASKS.format(error=result["error"])
+                )  # noqa: E501
+                return
+
+            tasks = result["tasks"]
+            if not tasks:
+                await message.answer(empty_message)
+                return
+
+            # Передача задачи в декорируемую функцию
+            return await func(
+                message,
+                tasks,
+                *args,
+                **kwargs,
+            )
+
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
 
-    return wrapper
 
+async def find_or_create_category_id(
+    name: str | None,
+    user_telegram_id: int,
+) -> int | None:
+    """
+    Находит ID категории по имени или создает новую категорию.
 
-async def find_or_create_category_id(name: str | None) -> int | None:
-    """Находит ID категории по имени или создает новую категорию."""
+    ID пользователя передается заголовком: по нему API ограничивает
+    частоту запросов к категориям.
+    """
 
     if not name or name.strip().lower() in SKIP_KEYWORDS:
         return None
 
     name = name.strip()
+    headers = {TELEGRAM_USER_HEADER: str(user_telegram_id)}
 
     try:
         # Поиск существующей категории
         response = requests.get(
             CATEGORIES_URL,
             params={"name": name},
+            headers=headers,
             timeout=10,
         )
         if response.status_code == 200:
@@ -99,7 +135,10 @@ async def find_or_create_category_id(name: str | None) -> int | None:
     # Создание новой категории
     async with aiohttp.ClientSession() as session:
         async with session.post(
-            CATEGORIES_URL, json={"name": name}, timeout=10
+            CATEGORIES_URL,
+            json={"name": name},
+            headers=headers,
+            timeout=10,
         ) as response:
             if response.status in (200, 201):
                 created = await response.json()
@@ -108,6 +147,66 @@ async def find_or_create_category_id(name: str | None) -> int | None:
     return None
 
 
+def get_idempotency_key(dialog_data: dict, payload: dict) -> str:
+    """
+    Ключ идемпотентности для отправки данных из диалога.
+
+    Пока пользователь повторяет отправку тех же данных, ключ
+    не меняется и API не создаст задачу второй раз. Если данные
+    изменились (например, после кнопки "Назад"), создается новый ключ.
+    """
+
+    fingerprint = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    if dialog_data.get("idempotency_payload") != fingerprint:
+        dialog_data["idempotency_payload"] = fingerprint
+        dialog_data["idempotency_key"] = str(uuid.uuid4())
+    return dialog_data["idempotency_key"]
+
+
+async def send_idempotent_request(
+    method: str,
+    url: str,
+    payload: dict,
+    idempotency_key: str,
+    params: dict | None = None,
+    user_telegram_id: int | None = None,
+) -> tuple[int, str]:
+    """
+    Отправляет POST/PATCH с заголовком Idempotency-Key.
+
+    При таймауте, обрыве соединения или ответе 409 (первый запрос
+    еще выполняется) запрос повторяется с тем же ключом: API вернет
+    сохраненный ответ вместо повторного создания задачи.
+    user_telegram_id передается в заголовке TELEGRAM_USER_HEADER:
+    по нему API ограничивает частоту запросов (тело не читается).
+    Возвращает статус и текст ответа.
+    """
+
+    headers = {IDEMPOTENCY_HEADER: idempotency_key}
+    if user_telegram_id is not None:
+        headers[TELEGRAM_USER_HEADER] = str(user_telegram_id)
+
+    for attempt in range(1, API_RETRY_ATTEMPTS + 1):
+        is_last = attempt == API_RETRY_ATTEMPTS
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.request(
+                    method,
+                    url,
+                    json=payload,
+                    params=params,
+                    headers=headers,
+                    timeout=10,
+                ) as response:
+                    if response.status != 409 or is_last:
+                        return response.status, await response.text()
+        except (asyncio.TimeoutError, aiohttp.ClientConnectionError):
+            if is_last:
+                raise
+
+        await asyncio.sleep(API_RETRY_DELAY * attempt)
+
+
 def format_readable(iso_dt: str) -> str:
     """Преобразует ISO-дату в читаемый формат с учетом часового пояса."""
 
@@ -138,10 +237,13 @@ def format_single_task(task: dict) -> str:
     🔖 Категория: Покупки
     🕒 Дата создания: 8:00, 15 октября 2025
     🔥 Дата завершения: 9:00, 16 октября 2025
+    🔁 Повтор: Каждый день
     '''
+
+    Строка повтора - только у повторяющихся задач.
     """
 
-    from messages import TASK_FORMAT
+    from messages import TASK_FORMAT, TASK_RECURRENCE_LINE
 
     name = task.get("name", EMPTY_FIELD)
     description = task.get("description") or EMPTY_DESCRIPTION
@@ -154,7 +256,7 @@ def format_single_task(task: dict) -> str:
     created_date = format_readable(task.get("creation_date"))
     end_date = format_readable(task.get("end_date"))
 
-    return TASK_FORMAT.format(
+    text = TASK_FORMAT.format(
         name=name,
         description=description,
         category=category_name,
@@ -162,11 +264,24 @@ def format_single_task(task: dict) -> str:
         end_date=end_date,
     )
 
+    recurrence = task.get("recurrence")
+    if recurrence:
+        text += TASK_RECURRENCE_LINE.format(
+            recurrence=RECURRENCE_LABELS.get(recurrence, recurrence),
+        )
+    return text
+
 
-def fetch_user_tasks(user_telegram_id: int) -> dict[str, Any]:
+def fetch_user_tasks(
+    user_telegram_id: int,
+    **filters,
+) -> dict[str, Any]:
     """
     Получает список задач пользователя из Django API.
 
+    filters передаются как параметры запроса (due, within_days,
+    ordering, tz и т.д.), фильтрация выполняется на сервере.
+
     Возвращает словарь с ключами:
     - "error": str | None - описание ошибки или None если успешно
     - "tasks": list - список задач пользователя
@@ -175,7 +290,7 @@ def fetch_user_tasks(user_telegram_id: int) -> dict[str, Any]:
     try:
         response = requests.get(
             TASKS_URL,
-            params={"user_telegram_id": user_telegram_id},
+            params={"user_telegram_id": user_telegram_id, **filters},
             timeout=10,
         )
     except requests.RequestException as e:
@@ -200,6 +315,191 @@ def fetch_user_tasks(user_telegram_id: int) -> dict[str, Any]:
     return {"error": None, "tasks": tasks}
 
 
+def search_user_tasks(
+    user_telegram_id: int,
+    query: str,
+) -> dict[str, Any]:
+    """
+    Ищет задачи пользователя по названию и описанию.
+
+    Возвращает словарь с ключами:
+    - "error": str | None - описание ошибки или None если успешно
+    - "tasks": list - найденные задачи, самые релевантные первыми
+    """
+
+    try:
+        response = requests.get(
+            f"{TASKS_URL}search/",
+            params={"user_telegram_id": user_telegram_id, "q": query},
+            timeout=10,
+        )
+    except requests.RequestException as e:
+        return {"error": str(e), "tasks": []}
+
+    if response.status_code != 200:
+        return {
+            "error": f"HTTP {response.status_code}: {response.text}",
+            "tasks": [],
+        }
+
+    data = response.json()
+    return {"error": None, "tasks": data if isinstance(data, list) else []}
+
+
+def fetch_user_stats(user_telegram_id: int) -> dict[str, Any]:
+    """
+    Получает статистику задач пользователя.
+
+    Возвращает словарь с ключами:
+    - "error": str | None - описание ошибки или None если успешно
+    - "stats": dict | None - статистика задач
+    """
+
+    try:
+        response = requests.get(
+            f"{TASKS_URL}stats/",
+            params={"user_telegram_id": user_telegram_id},
+            timeout=10,
+        )
+    except requests.RequestException as e:
+        return {"error": str(e), "stats": None}
+
+    if response.status_code != 200:
+        return {
+            "error": f"HTTP {response.status_code}: {response.text}",
+            "stats": None,
+        }
+
+    return {"error": None, "stats": response.json()}
+
+
+def format_stats(stats: dict) -> str:
+    """
+    Форматирует статистику задач пользователя.
+
+    Пример возврата:
+    '''
+    📊 Статистика задач
+
+    📋 Открыто: 12
+    ✅ Выполнено: 3
+    ⚠️ Просрочено: 2
+    🗓️ На ближайшие 7 дней: 5
+    ⏰ Ожидают напоминания: 7
+
+    🔖 По категориям:
+    • Покупки: 4
+    • —: 8
+    '''
+    """
+
+    from messages import STATS_FORMAT, STATS_CATEGORY_LINE
+
+    categories = "\n".join(
+        STATS_CATEGORY_LINE.format(
+            name=item.get("name") or NO_CATEGORY,
+            total=item.get("total", 0),
+        )
+        for item in stats.get("categories", [])
+    )
+
+    return STATS_FORMAT.format(
+        total=stats.get("total", 0),
+        done=stats.get("done", 0),
+        overdue=stats.get("overdue", 0),
+        due_week=stats.get("due_week", 0),
+        reminders_pending=stats.get("reminders_pending", 0),
+        categories=categories or EMPTY_FIELD,
+    )
+
+
+def request_agenda(
+    user_telegram_id: int,
+    method: str = "get",
+    send_at: str | None = None,
+) -> dict[str, Any]:
+    """
+    Получает или изменяет подписку на утреннюю сводку.
+
+    - method="get" - текущая подписка
+    - method="put", send_at="08:00" - включить или изменить время
+    - method="delete" - выключить
+
+    Возвращает словарь с ключами:
+    - "error": str | None - описание ошибки или None если успешно
+    - "agenda": dict | None - send_at, is_active и last_sent_on
+    """
+
+    try:
+        response = requests.request(
+            method,
+            f"{TASKS_URL}agenda/",
+            params={"user_telegram_id": user_telegram_id},
+            json={"send_at": send_at} if send_at else None,
+            timeout=10,
+        )
+    except requests.RequestException as e:
+        return {"error": str(e), "agenda": None}
+
+    if response.status_code == 204:
+        return {"error": None, "agenda": None}
+    if response.status_code != 200:
+        return {
+            "error": f"HTTP {response.status_code}: {response.text}",
+            "agenda": None,
+        }
+
+    return {"error": None, "agenda": response.json()}
+
+
+async def download_tasks_export(
+    user_telegram_id: int,
+    export_format: str,
+) -> dict[str, Any]:
+    """
+    Скачивает выгрузку всех задач (с выполненными и отмененными)
+    во временный файл по частям.
+
+    Файл не держится в памяти целиком, после отправки
+    пользователю его нужно удалить.
+
+    Возвращает словарь с ключами:
+    - "error": str | None - описание ошибки или None если успешно
+    - "path": str | None - путь к временному файлу
+    """
+
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(
+                f"{TASKS_URL}export/",
+                params={
+                    "user_telegram_id": user_telegram_id,
+                    "export_format": export_format,
+                    # В выгрузку попадают и выполненные задачи
+                    "status": "all",
+                },
+                timeout=aiohttp.ClientTimeout(total=EXPORT_TIMEOUT),
+            ) as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    return {
+                        "error": f"HTTP {response.status}: {error_text}",
+                        "path": None,
+                    }
+
+                with tempfile.NamedTemporaryFile(
+                    suffix=f".{export_format}",
+                    delete=False,
+                ) as export_file:
+                    async for chunk in response.content.iter_chunked(
+                        EXPORT_DOWNLOAD_CHUNK_SIZE,
+                    ):
+                        export_file.write(chunk)
+                    return {"error": None, "path": export_file.name}
+    except Exception as e:
+        return {"error": str(e), "path": None}
+
+
 def fetch_single_task(
     task_id: str,
     user_telegram_id: int,
@@ -228,28 +528,28 @@ async def update_task(
     task_id: str,
     update_data: dict,
     user_telegram_id: int,
+    idempotency_key: str | None = None,
 ) -> dict[str, Any]:
     """Обновляет задачу через API."""
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.patch(
-                f"{TASKS_URL}{task_id}/",
-                json=update_data,
-                params={"user_telegram_id": user_telegram_id},
-                timeout=10,
-            ) as response:
-                if response.status == 200:
-                    return {
-                        "error": None,
-                        "task": await response.json(),
-                    }
-                else:
-                    error_text = await response.text()
-                    return {
-                        "error": f"HTTP {response.status}: {error_text}",
-                        "task": None,
-                    }
+        status, text = await send_idempotent_request(
+            "PATCH",
+            f"{TASKS_URL}{task_id}/",
+            update_data,
+            idempotency_key or str(uuid.uuid4()),
+            params={"user_telegram_id": user_telegram_id},
+        )
+        if status == 200:
+            return {
+                "error": None,
+                "task": json.loads(text),
+            }
+        else:
+            return {
+                "error": f"HTTP {status}: {text}",
+                "task": None,
+            }
     except Exception as e:
         return {
             "error": str(e),
@@ -278,6 +578,14 @@ async def delete_task(
         return {"error": str(e)}
 
 
+def format_task_list(tasks: list) -> str:
+    """Форматирует список задач, разделяя их пустой строкой."""
+
+    return "\n\n".join(
+        format_single_task(task) for task in tasks if isinstance(task, dict)
+    )
+
+
 def format_task_for_list(
     task: dict,
     index: int,
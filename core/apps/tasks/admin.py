@@ -4,7 +4,16 @@ https://docs.djangoproject.com/en/5.2/ref/contrib/admin/
 """
 
 from django.contrib import admin
-from .models import Task, Category
+from django.contrib.postgres.search import SearchQuery
+
+from .constants import SEARCH_CONFIG
+from .models import (
+    AgendaSubscription,
+    ArchivedTask,
+    Category,
+    OutboxEvent,
+    Task,
+)
 
 
 @admin.register(Category)
@@ -35,12 +44,14 @@ class TaskAdmin(admin.ModelAdmin):
         "description",
         "creation_date",
         "end_date",
+        "status",
         "category",
         "user",
     ]
 
     # Фильтрация по полям
     list_filter = [
+        "status",
         "creation_date",
         "end_date",
         "category",
@@ -66,6 +77,23 @@ class TaskAdmin(admin.ModelAdmin):
         "user",
     ]
 
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск по search_vector (GIN-индекс) вместо icontains."""
+
+        if not search_term:
+            return super().get_search_results(
+                request,
+                queryset,
+                search_term,
+            )
+
+        search_query = SearchQuery(
+            search_term,
+            config=SEARCH_CONFIG,
+            search_type="websearch",
+        )
+        return queryset.filter(search_vector=search_query), False
+
     def get_fields(self, request, obj=None):
         """Убирает поле 'creation_date' из редактирования задачи"""
 
@@ -73,3 +101,84 @@ class TaskAdmin(admin.ModelAdmin):
         if obj and "creation_date" in fields:
             fields.remove("creation_date")
         return fields
+
+
+@admin.register(ArchivedTask)
+class ArchivedTaskAdmin(admin.ModelAdmin):
+    """Просмотр архива задач."""
+
+    # Поля, отображаемые в списке
+    list_display = [
+        "id",
+        "name",
+        "end_date",
+        "archived_at",
+        "category",
+        "user",
+    ]
+
+    # Фильтрация по полям
+    list_filter = [
+        "archived_at",
+        "category",
+    ]
+
+    # Поиск по полям
+    search_fields = [
+        "name",
+    ]
+
+    # Архив заполняется только командой archive_tasks
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(AgendaSubscription)
+class AgendaSubscriptionAdmin(admin.ModelAdmin):
+    """Управление подписками на утреннюю сводку."""
+
+    # Поля, отображаемые в списке
+    list_display = [
+        "user",
+        "send_at",
+        "is_active",
+        "last_sent_on",
+    ]
+
+    # Фильтрация по полям
+    list_filter = [
+        "is_active",
+    ]
+
+    # Поиск по полям
+    search_fields = [
+        "user__username",
+    ]
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    """Просмотр еще не опубликованных событий outbox."""
+
+    # Поля, отображаемые в списке
+    list_display = [
+        "id",
+        "kind",
+        "payload",
+        "created_at",
+    ]
+
+    # Фильтрация по полям
+    list_filter = [
+        "kind",
+    ]
+
+    # События пишут изменения задач, а удаляет relay_outbox
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,338 @@
+"""
+Документация:
+https://docs.djangoproject.com/en/5.2/ref/models/expressions/#window-functions
+https://docs.djangoproject.com/en/5.2/ref/models/querysets/#select-for-update
+
+Утренняя сводка: просроченные задачи и задачи на сегодня.
+Подписки обходятся пачками по user_id (keyset), задачи всей пачки
+выбираются одним запросом, а не запросом на каждого пользователя.
+"""
+
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from itertools import groupby
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Case, Count, F, Value, When, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from .constants import (
+    AGENDA_BATCH_SIZE,
+    AGENDA_CLAIM_TIMEOUT_MINUTES,
+    AGENDA_ITEM_TEMPLATE,
+    AGENDA_MAX_BATCHES,
+    AGENDA_MORE_TEMPLATE,
+    AGENDA_OVERDUE_HEADER,
+    AGENDA_TASKS_LIMIT,
+    AGENDA_TEMPLATE,
+    AGENDA_TODAY_HEADER,
+    RUSSIAN_MONTHS,
+)
+from .models import AgendaSubscription, Task
+from .reminders import format_russian_datetime, get_task_telegram_id
+
+User = get_user_model()
+
+# Захватывает пачку подписок, которым пора отправить сводку,
+# и возвращает их user_id. Захват (claimed_at) не дает параллельному
+# запуску взять те же подписки, а истекший захват (воркер упал до
+# отметки пачки) забирается снова. Обход по user_id (keyset),
+# SKIP LOCKED пропускает строки, захваченные параллельным запуском.
+CLAIM_AGENDA_BATCH_SQL = """
+UPDATE {table} AS subscription
+SET claimed_at = %(now)s
+WHERE subscription.user_id IN (
+    SELECT user_id FROM {table}
+    WHERE is_active
+      AND send_at <= %(local_time)s
+      AND (last_sent_on IS NULL OR last_sent_on < %(today)s)
+      AND (claimed_at IS NULL OR claimed_at < %(claim_expired)s)
+      AND user_id > %(after_user_id)s
+    ORDER BY user_id
+    LIMIT %(batch_size)s
+    FOR UPDATE SKIP LOCKED
+)
+RETURNING subscription.user_id
+"""
+
+
+def get_agenda_subscription(telegram_id: int) -> AgendaSubscription:
+    """Подписка пользователя (несохраненная выключенная, если ее нет)."""
+
+    subscription = AgendaSubscription.objects.filter(
+        user__username=f"tg_{telegram_id}",
+    ).first()
+    return subscription or AgendaSubscription(is_active=False)
+
+
+def subscribe_agenda(telegram_id: int, send_at: time) -> AgendaSubscription:
+    """
+    Включает сводку в send_at (МСК) или меняет ее время.
+
+    Если сегодня это время уже прошло, сегодняшняя сводка считается
+    пропущенной: первая придет завтра, а не сразу после подписки.
+    """
+
+    user, _ = User.objects.get_or_create(
+        username=f"tg_{telegram_id}",
+        defaults={"first_name": f"Telegram User {telegram_id}"},
+    )
+    defaults = {"send_at": send_at, "is_active": True}
+    local_now = timezone.localtime()
+    if send_at <= local_now.time():
+        defaults["last_sent_on"] = local_now.date()
+
+    subscription, _ = AgendaSubscription.objects.update_or_create(
+        user=user,
+        defaults=defaults,
+    )
+    return subscription
+
+
+def unsubscribe_agenda(telegram_id: int) -> None:
+    """Выключает сводку (подписка и время сохраняются)."""
+
+    AgendaSubscription.objects.filter(
+        user__username=f"tg_{telegram_id}",
+    ).update(is_active=False)
+
+
+@dataclass
+class AgendaBatch:
+    """
+    Пачка подписок: ID пользователей, день сводки и готовые
+    сообщения по user_id.
+    """
+
+    user_ids: list[int]
+    sent_on: date
+    user_messages: dict[int, tuple[int, str]]
+
+    @property
+    def messages(self) -> list[tuple[int, str]]:
+        """Сообщения пачки: пары (Telegram ID, текст)."""
+
+        return list(self.user_messages.values())
+
+
+def get_end_of_today(now: datetime) -> datetime:
+    """Начало завтрашнего дня в часовой зоне проекта (МСК)."""
+
+    tomorrow = timezone.localdate(now) + timedelta(days=1)
+    return datetime.combine(
+        tomorrow,
+        time.min,
+        tzinfo=timezone.get_current_timezone(),
+    )
+
+
+def claim_agenda_batch(
+    after_user_id: int,
+    batch_size: int,
+    now: datetime,
+) -> list[int]:
+    """
+    Захватывает одним UPDATE пачку подписок, которым пора отправить
+    сводку (время send_at наступило, сегодня сводки еще не было).
+    Отправленными их отмечает complete_agenda_batch после доставки.
+
+    Возвращает user_id по возрастанию.
+    """
+
+    local_now = timezone.localtime(now)
+    sql = CLAIM_AGENDA_BATCH_SQL.format(
+        table=AgendaSubscription._meta.db_table,
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            sql,
+            {
+                "now": now,
+                "claim_expired": now - timedelta(
+                    minutes=AGENDA_CLAIM_TIMEOUT_MINUTES,
+                ),
+                "today": local_now.date(),
+                "local_time": local_now.time(),
+                "after_user_id": after_user_id,
+                "batch_size": batch_size,
+            },
+        )
+        return sorted(row[0] for row in cursor.fetchall())
+
+
+def get_agenda_tasks(
+    user_ids: list[int],
+    now: datetime,
+) -> dict[int, list[Task]]:
+    """
+    Открытые задачи пользователей со сроком до конца сегодняшнего дня
+    (просроченные и на сегодня) - один запрос на всю пачку.
+
+    На пользователя отдается не больше AGENDA_TASKS_LIMIT задач,
+    у каждой в total - сколько их всего у владельца.
+    """
+
+    queryset = (
+        Task.objects.filter(
+            user_id__in=user_ids,
+            status=Task.Status.OPEN,
+            end_date__lt=get_end_of_today(now),
+        )
+        .annotate(
+            position=Window(
+                RowNumber(),
+                partition_by=F("user_id"),
+                order_by=F("end_date").asc(),
+            ),
+            total=Window(Count("id"), partition_by=F("user_id")),
+        )
+        .filter(position__lte=AGENDA_TASKS_LIMIT)
+        .select_related("user")
+        .only("name", "end_date", "user_id", "user__username")
+        .order_by("user_id", "end_date")
+    )
+
+    return {
+        user_id: list(tasks)
+        for user_id, tasks in groupby(queryset, key=lambda t: t.user_id)
+    }
+
+
+def build_agenda_message(tasks: list[Task], now: datetime) -> str:
+    """
+    Текст сводки.
+
+    Пример:
+    ☀️ Доброе утро! Задачи на 20 октября
+
+    ⚠️ Просрочено:
+    • Оплатить интернет — 18:00, 19 октября 2025
+
+    📅 Сегодня:
+    • Купить молоко — 9:00
+    """
+
+    local_now = timezone.localtime(now)
+    lines = [
+        AGENDA_TEMPLATE.format(
+            f"{local_now.day} {RUSSIAN_MONTHS[local_now.month - 1]}"
+        )
+    ]
+
+    overdue = [task for task in tasks if task.end_date < now]
+    if overdue:
+        lines += ["", AGENDA_OVERDUE_HEADER]
+        lines += [
+            AGENDA_ITEM_TEMPLATE.format(
+                task.name,
+                format_russian_datetime(timezone.localtime(task.end_date)),
+            )
+            for task in overdue
+        ]
+
+    today = [task for task in tasks if task.end_date >= now]
+    if today:
+        lines += ["", AGENDA_TODAY_HEADER]
+        for task in today:
+            local_dt = timezone.localtime(task.end_date)
+            lines.append(
+                AGENDA_ITEM_TEMPLATE.format(
+                    task.name,
+                    f"{local_dt.hour}:{local_dt.minute:02d}",
+                )
+            )
+
+    hidden = tasks[0].total - len(tasks)
+    if hidden > 0:
+        lines += ["", AGENDA_MORE_TEMPLATE.format(hidden)]
+
+    return "\n".join(lines)
+
+
+def build_agenda_messages(
+    user_ids: list[int],
+    now: datetime,
+) -> dict[int, tuple[int, str]]:
+    """
+    Сообщения (Telegram ID, текст) для пачки подписок по user_id.
+    Пользователям без задач на сегодня сводка не отправляется.
+    """
+
+    messages = {}
+    for user_id, tasks in get_agenda_tasks(user_ids, now).items():
+        telegram_id = get_task_telegram_id(tasks[0])
+        if telegram_id is not None:
+            messages[user_id] = (
+                telegram_id,
+                build_agenda_message(tasks, now),
+            )
+    return messages
+
+
+def complete_agenda_batch(
+    batch: AgendaBatch,
+    undelivered: set[int],
+) -> int:
+    """
+    Снимает захват с подписок пачки и одним UPDATE отмечает сводку
+    отправленной в batch.sent_on.
+
+    Подписки, чьи сообщения не доставлены (undelivered - Telegram ID,
+    report.undelivered), не отмечаются: следующий запуск отправит их
+    сводку снова. Окончательные ошибки (бот заблокирован, чат
+    не найден) в undelivered не попадают и не повторяются.
+
+    Возвращает число подписок, оставленных для повтора.
+    """
+
+    retry_user_ids = [
+        user_id
+        for user_id, (telegram_id, _) in batch.user_messages.items()
+        if telegram_id in undelivered
+    ]
+
+    AgendaSubscription.objects.filter(user_id__in=batch.user_ids).update(
+        claimed_at=None,
+        last_sent_on=Case(
+            When(user_id__in=retry_user_ids, then=F("last_sent_on")),
+            default=Value(batch.sent_on),
+        ),
+    )
+    return len(retry_user_ids)
+
+
+def iter_agenda_batches(
+    now: datetime | None = None,
+    batch_size: int = AGENDA_BATCH_SIZE,
+    max_batches: int = AGENDA_MAX_BATCHES,
+):
+    """
+    Обходит подписки, которым пора отправить сводку, по возрастанию
+    user_id и отдает пачки AgendaBatch.
+
+    На пачку - два запроса: захват подписок и задачи всех
+    пользователей пачки. Отправка сообщений и отметка пачки
+    (complete_agenda_batch) - на вызывающей стороне, до перехода
+    к следующей пачке.
+    """
+
+    now = now or timezone.now()
+    after_user_id = 0
+
+    for _ in range(max_batches):
+        user_ids = claim_agenda_batch(after_user_id, batch_size, now)
+        if not user_ids:
+            break
+
+        after_user_id = user_ids[-1]
+        yield AgendaBatch(
+            user_ids,
+            timezone.localdate(now),
+            build_agenda_messages(user_ids, now),
+        )
+
+        if len(user_ids) < batch_size:
+            break
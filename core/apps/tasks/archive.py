@@ -0,0 +1,162 @@
+"""
+Документация:
+https://www.postgresql.org/docs/current/queries-with.html#QUERIES-WITH-MODIFYING
+https://www.postgresql.org/docs/current/sql-select.html#SQL-FOR-UPDATE-SHARE
+
+Перенос задач с истекшим сроком хранения в архив (ArchivedTask).
+"""
+
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone as datetime_timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .constants import ARCHIVE_BATCH_SIZE
+from .models import ArchivedTask, ReminderOffset, Task
+from .stats import invalidate_user_stats
+
+ARCHIVED_COLUMNS = (
+    "id",
+    "name",
+    "description",
+    "creation_date",
+    "end_date",
+    "reminder_sent_at",
+    "status",
+    "completed_at",
+    "category_id",
+    "user_id",
+)
+
+# Одна пачка - один оператор: выбрать, удалить и вставить в архив.
+# Ключ (end_date, id) продолжает обход с места предыдущей пачки
+# и не перечитывает мертвые строки в начале индекса, SKIP LOCKED
+# пропускает задачи, которые сейчас редактируются. Напоминания
+# до срока удаляются вместе с задачей (в архиве их нет).
+ARCHIVE_BATCH_SQL = """
+WITH batch AS (
+    SELECT id FROM {task_table}
+    WHERE end_date < %(cutoff)s
+      AND (end_date, id) > (%(after_end_date)s, %(after_id)s)
+    ORDER BY end_date, id
+    LIMIT %(batch_size)s
+    FOR UPDATE SKIP LOCKED
+), offsets AS (
+    DELETE FROM {offset_table} AS reminder
+    USING batch
+    WHERE reminder.task_id = batch.id
+), moved AS (
+    DELETE FROM {task_table} AS task
+    USING batch
+    WHERE task.id = batch.id
+    RETURNING {task_columns}
+)
+INSERT INTO {archive_table} ({columns}, archived_at)
+SELECT {columns}, %(archived_at)s FROM moved
+RETURNING end_date, id, user_id
+"""
+
+
+@dataclass
+class ArchiveResult:
+    """Итоги архивации."""
+
+    archived: int = 0
+    batches: int = 0
+    elapsed: float = 0.0
+
+
+def get_archive_cutoff(retention_days: int | None = None):
+    """Задачи со сроком раньше этой даты переносятся в архив."""
+
+    if retention_days is None:
+        retention_days = settings.ARCHIVE_RETENTION_DAYS
+    return timezone.now() - timedelta(days=retention_days)
+
+
+def archive_batch(cutoff, after: tuple, batch_size: int) -> list[tuple]:
+    """
+    Переносит в архив одну пачку задач в отдельной транзакции.
+
+    Возвращает (end_date, id, user_id) перенесенных задач.
+    """
+
+    sql = ARCHIVE_BATCH_SQL.format(
+        task_table=Task._meta.db_table,
+        offset_table=ReminderOffset._meta.db_table,
+        archive_table=ArchivedTask._meta.db_table,
+        columns=", ".join(ARCHIVED_COLUMNS),
+        task_columns=", ".join(f"task.{name}" for name in ARCHIVED_COLUMNS),
+    )
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            sql,
+            {
+                "cutoff": cutoff,
+                "after_end_date": after[0],
+                "after_id": after[1],
+                "batch_size": batch_size,
+                "archived_at": timezone.now(),
+            },
+        )
+        return cursor.fetchall()
+
+
+def reset_users_stats(user_ids: set[int]) -> None:
+    """
+    Сбрасывает кэш статистики пользователей одним delete_many:
+    сырой DELETE не вызывает сигналы post_delete.
+    """
+
+    invalidate_user_stats(*user_ids)
+
+
+def archive_expired_tasks(
+    retention_days: int | None = None,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+    max_batches: int | None = None,
+    pause: float = 0.0,
+    on_batch=None,
+) -> ArchiveResult:
+    """
+    Переносит в архив задачи, срок которых истек раньше retention_days
+    дней назад, пачками по batch_size.
+
+    Каждая пачка - короткая транзакция, между пачками можно сделать
+    паузу pause секунд, чтобы не нагружать БД. on_batch(result)
+    вызывается после каждой пачки (прогресс в команде).
+    """
+
+    started = time.perf_counter()
+    result = ArchiveResult()
+    cutoff = get_archive_cutoff(retention_days)
+
+    # Меньше любого реального ключа: первая пачка берется с начала
+    after = (datetime.min.replace(tzinfo=datetime_timezone.utc), "")
+    user_ids = set()
+
+    while max_batches is None or result.batches < max_batches:
+        moved = archive_batch(cutoff, after, batch_size)
+        if not moved:
+            break
+
+        after = max((end_date, task_id) for end_date, task_id, _ in moved)
+        user_ids.update(user_id for _, _, user_id in moved)
+
+        result.archived += len(moved)
+        result.batches += 1
+        if on_batch:
+            on_batch(result)
+        if len(moved) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+
+    if user_ids:
+        reset_users_stats(user_ids)
+
+    result.elapsed = time.perf_counter() - started
+    return result
@@ -1,11 +1,40 @@
 import os
+from datetime import time
 
 # Телеграм
 BOT_TOKEN = os.getenv("TOKEN")
-TELEGRAM_API_URL = f"https://api.telegram.org/bot{BOT_TOKEN}/sendMessage"
+# Адрес Bot API можно заменить (локальный Bot API сервер или заглушка)
+TELEGRAM_API_BASE = os.getenv("TELEGRAM_API_BASE", "https://api.telegram.org")
+TELEGRAM_API_URL = f"{TELEGRAM_API_BASE}/bot{BOT_TOKEN}/sendMessage"
+
+# Лимиты Telegram: не больше 30 сообщений в секунду всем ботом
+# (25/с с запасом 5 - в любом окне в 1 с не больше 30)
+# и около одного сообщения в секунду в один чат
+TELEGRAM_GLOBAL_RATE = 25
+TELEGRAM_GLOBAL_BURST = 5
+TELEGRAM_CHAT_RATE = 1
+TELEGRAM_CHAT_BURST = 1
+# Префикс ключей Redis с лимитами, общими для всех воркеров
+TELEGRAM_LIMITS_KEY = "telegram_limits"
+
+# Доставка сообщений (delivery.py): одновременных запросов,
+# попыток на сообщение, задержки повторов и таймаут запроса, с
+DELIVERY_CONCURRENCY = 50
+DELIVERY_MAX_ATTEMPTS = 5
+DELIVERY_BACKOFF_BASE = 0.5
+DELIVERY_BACKOFF_MAX = 30
+DELIVERY_TIMEOUT = 10
+
+# Таймауты общего клиента Redis (get_redis_client), с: зависший Redis
+# не должен блокировать запросы API и доставку
+REDIS_SOCKET_TIMEOUT = 2
+REDIS_CONNECT_TIMEOUT = 2
 
 # Логи
-LOG_CELERY_TASK_NOT_FOUND = "[Celery] Задача с PK={} не найдена"
+LOG_CELERY_REMINDER_SKIPPED = (
+    "[Celery] Напоминание о задаче PK={} (версия {}) "
+    "устарело, уже отправлено или не нужно"
+)
 LOG_CELERY_NO_TELEGRAM_USER = (
     "[Celery] У задачи '{}' нет связанного Telegram пользователя"
 )
@@ -13,12 +42,47 @@ LOG_CELERY_INVALID_USERNAME_FORMAT = (
     "[Celery] Неверный формат username у пользователя: {}"
 )
 LOG_CELERY_MESSAGE_SENT = "[Celery] Сообщение отправлено пользователю {}"
-LOG_CELERY_TELEGRAM_API_ERROR = "[Celery] Ошибка Telegram API: {} - {}"
-LOG_CELERY_SEND_ERROR = "[Celery] Ошибка отправки TG: {}"
+LOG_CELERY_DELIVERY_REPORT = (
+    "[Celery] Доставлено: {}, не доставлено: {}, повторов: {}, {:.2f} с"
+)
+LOG_DELIVERY_FAILED = "[delivery] Не доставлено в чат {}: {}"
+LOG_DELIVERY_REDIS_ERROR = (
+    "[delivery] Redis недоступен, лимиты Telegram только в процессе: {}"
+)
 LOG_CELERY_MISSING_CREDENTIALS = (
     "[Celery] Не могу отправить сообщение: BOT_TOKEN={}, chat_id={}"
 )
 
+LOG_THROTTLE_REDIS_ERROR = (
+    "[throttle] Redis недоступен, запрос пропущен без ограничения: {}"
+)
+
+LOG_IDEMPOTENCY_CACHE_ERROR = (
+    "[idempotency] Кэш недоступен, запрос выполнен без ключа: {}"
+)
+
+LOG_METRICS_REDIS_ERROR = (
+    "[metrics] Redis недоступен, метрики не записаны: {}"
+)
+
+LOG_CELERY_REMINDERS_SWEPT = "[Celery] Отправлено напоминаний из БД: {}"
+LOG_CELERY_OFFSET_REMINDERS_SENT = (
+    "[Celery] Напоминаний до срока: {}, отправлено сообщений {}"
+)
+LOG_CELERY_AGENDAS_SENT = (
+    "[Celery] Утренних сводок: {} подписок, отправлено {}, "
+    "к повтору {}, {:.2f} с"
+)
+LOG_CELERY_TASKS_ARCHIVED = (
+    "[Celery] В архив перенесено задач: {} за {:.2f} с"
+)
+LOG_CELERY_RECURRING_ADVANCED = (
+    "[Celery] Пропущенных вхождений перенесено: {}"
+)
+LOG_CELERY_OUTBOX_RELAYED = (
+    "[Celery] Опубликовано событий outbox: {} за {:.2f} с"
+)
+
 LOG_SIGNALS_NO_TELEGRAM_USER = (
     "[signals] У задачи '{}' нет связанного Telegram пользователя"
 )
@@ -31,17 +95,146 @@ LOG_SIGNALS_NOTIFICATION_SCHEDULED = (
 LOG_SIGNALS_NOTIFICATION_RESCHEDULED = (
     "🔄 Напоминание перепланировано для задачи '{}' на {}"
 )
-LOG_SIGNALS_TASK_REVOKED = "📭 Старое напоминание отменено для задачи '{}'"
+LOG_SIGNALS_TASK_CLOSED = (
+    "[signals] Задача '{}' закрыта, напоминание не планируется"
+)
+LOG_SIGNALS_REMINDER_UNCHANGED = (
+    "[signals] Срок, статус и владелец задачи '{}' не изменились, "
+    "напоминание остается прежним"
+)
+
+# ID задач и категорий (generate_time_ordered_id):
+# 42 бита времени от 2025-01-01 UTC хватает примерно до 2164 года
+ID_EPOCH_MS = 1_735_689_600_000
+ID_NODE_BITS = 10
+ID_SEQUENCE_BITS = 12
+# Аренда номера узла в Redis: счетчик кандидатов, ключи занятых узлов,
+# интервал продления и срок аренды (узел упавшего процесса
+# освобождается не позже чем через ID_NODE_LEASE_SECONDS)
+ID_NODE_SEQUENCE = "tasks:id_node:seq"
+ID_NODE_KEY = "tasks:id_node:{}"
+ID_NODE_LEASE_CHECK_SECONDS = 60
+ID_NODE_LEASE_SECONDS = 3 * ID_NODE_LEASE_CHECK_SECONDS
+
+# Полнотекстовый поиск
+SEARCH_CONFIG = "russian"
+SEARCH_RESULTS_LIMIT = 20
+
+# Статистика задач: кэш сбрасывается сигналами, а таймаут
+# ограничивает дрейф счетчиков, зависящих от текущего времени
+STATS_CACHE_TIMEOUT = 5 * 60
+# Связка username и user_id для ключа кэша статистики
+STATS_USER_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Выгрузка задач: размер пачки серверного курсора
+EXPORT_CHUNK_SIZE = 2000
+
+# Импорт задач
+IMPORT_BATCH_SIZE = 500
+IMPORT_MAX_ERRORS = 100
+
+# Режим напоминаний sweep: размер пачки, максимум пачек за запуск
+# и насколько давно наступивший срок еще стоит напоминать, секунды
+REMINDER_SWEEP_BATCH_SIZE = 200
+REMINDER_SWEEP_MAX_BATCHES = 50
+REMINDER_SWEEP_LOOKBACK = 60 * 60
+
+# Напоминания до срока (ReminderOffset): сколько их можно задать
+# задаче, самое раннее (минуты до срока), размер пачки
+# и максимум пачек за запуск send_offset_reminders
+REMINDER_OFFSETS_LIMIT = 5
+REMINDER_OFFSET_MAX_MINUTES = 30 * 24 * 60
+REMINDER_OFFSETS_BATCH_SIZE = 200
+REMINDER_OFFSETS_MAX_BATCHES = 50
+
+# Повторяющиеся задачи: сколько вхождений одной задачи
+# разворачивается в списке за окно
+RECURRENCE_MAX_OCCURRENCES = 100
+# Перенос пропущенных вхождений: размер пачки задач
+RECURRENCE_ADVANCE_BATCH_SIZE = 500
+
+# Восстановление напоминаний (reconcile_reminders): размер пачки,
+# сколько процессов публикуют сообщения (не больше числа ядер)
+# и сколько ждать ответа воркеров на inspect().scheduled(), секунды
+RECONCILE_BATCH_SIZE = 5000
+RECONCILE_PROCESSES = 4
+RECONCILE_INSPECT_TIMEOUT = 5.0
+
+# Метрики доставки напоминаний (metrics.py): границы гистограмм
+# в секундах и сколько хранится счетчик напоминаний за минуту
+METRICS_LATENESS_BUCKETS = (
+    1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600,
+)
+METRICS_QUEUE_WAIT_BUCKETS = (
+    0.1, 0.5, 1, 5, 15, 30, 60, 300, 900,
+)
+METRICS_LATENCY_BUCKETS = (
+    0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+METRICS_MINUTES_TTL = 24 * 60 * 60
+
+# SLO опоздания напоминаний по умолчанию (reminder_metrics):
+# доля напоминаний, отправленных не позже порога, секунды
+REMINDER_LATENESS_SLO_SECONDS = 60
+REMINDER_LATENESS_SLO_TARGET = 0.99
+
+# Outbox: сколько событий публикуется одной транзакцией
+# и максимум пачек за проход relay_outbox
+OUTBOX_RELAY_BATCH_SIZE = 500
+OUTBOX_RELAY_MAX_BATCHES = 100
+
+# Утренняя сводка: время по умолчанию (МСК), сколько подписок
+# обрабатывается одной пачкой и сколько задач показывается в сводке
+AGENDA_DEFAULT_SEND_AT = time(8, 0)
+AGENDA_BATCH_SIZE = 500
+AGENDA_MAX_BATCHES = 200
+# Захват пачки подписок на время отправки: если воркер упал,
+# не отметив пачку, через столько минут ее заберет следующий запуск
+AGENDA_CLAIM_TIMEOUT_MINUTES = 15
+AGENDA_TASKS_LIMIT = 20
+
+# Архивация задач: размер пачки и сколько архивных задач отдает API
+ARCHIVE_BATCH_SIZE = 500
+ARCHIVED_RESULTS_LIMIT = 100
+
+# Idempotency-Key: сколько хранится ответ и сколько живет блокировка
+# на время выполнения первого запроса
+IDEMPOTENCY_TTL = 24 * 60 * 60
+IDEMPOTENCY_LOCK_TIMEOUT = 30
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
 
 
 # Напоминание о задаче
-REMINDER_MESSAGE_TEMPLATE = (
-    "⏰ <b>Напоминание о задаче</b>\n\n"
+REMINDER_ITEM_TEMPLATE = (
     "📌 <b>{}</b>\n"
     "📃 {}\n"
     "🔥 Срок выполнения: <b>{}</b>\n"
     "🔖 Категория: {}"
 )
+REMINDER_MESSAGE_TEMPLATE = (
+    "⏰ <b>Напоминание о задаче</b>\n\n" + REMINDER_ITEM_TEMPLATE
+)
+# Напоминание за заданное время до срока, {} - сколько осталось
+REMINDER_OFFSET_TEMPLATE = (
+    "🔔 <b>До срока задачи: {}</b>\n\n" + REMINDER_ITEM_TEMPLATE
+)
+REMINDER_OFFSET_UNITS = (
+    (24 * 60, "д"),
+    (60, "ч"),
+    (1, "мин"),
+)
+# Несколько напоминаний одному пользователю - одним сообщением
+REMINDER_DIGEST_TEMPLATE = "⏰ <b>Напоминание о задачах ({})</b>\n\n{}"
+REMINDER_DIGEST_SEPARATOR = "\n\n"
+# Максимальная длина текста сообщения Telegram
+TELEGRAM_MESSAGE_MAX_LENGTH = 4096
+
+# Утренняя сводка задач
+AGENDA_TEMPLATE = "☀️ <b>Доброе утро! Задачи на {}</b>"
+AGENDA_OVERDUE_HEADER = "⚠️ <b>Просрочено:</b>"
+AGENDA_TODAY_HEADER = "📅 <b>Сегодня:</b>"
+AGENDA_ITEM_TEMPLATE = "• {} — {}"
+AGENDA_MORE_TEMPLATE = "...и еще задач: {}"
 
 EMPTY_DESCRIPTION = "Без описания"
 EMPTY_CATEGORY = "Не указана"
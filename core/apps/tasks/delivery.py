@@ -0,0 +1,371 @@
+"""
+Документация:
+https://core.telegram.org/bots/faq#my-bot-is-hitting-limits-how-do-i-avoid-this
+https://core.telegram.org/bots/api#responseparameters
+https://docs.aiohttp.org/en/stable/client_advanced.html#limiting-connection-pool-size
+
+Асинхронная доставка сообщений в Telegram: много запросов
+одновременно через общий пул keep-alive соединений, с соблюдением
+лимитов Telegram (общего и на чат), учетом 429 retry_after
+и повторами временных ошибок.
+
+Пул соединений живет один вызов deliver_messages. Лимиты
+с limits_key хранятся в Redis и общие для всех вызовов, процессов
+и воркеров: в режиме eta каждое напоминание отправляется отдельным
+вызовом, и без общих лимитов они бы не действовали.
+"""
+
+import asyncio
+import random
+import statistics
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Iterable
+
+import aiohttp
+import redis
+
+from .constants import (
+    DELIVERY_BACKOFF_BASE,
+    DELIVERY_BACKOFF_MAX,
+    DELIVERY_CONCURRENCY,
+    DELIVERY_MAX_ATTEMPTS,
+    DELIVERY_TIMEOUT,
+    LOG_DELIVERY_FAILED,
+    LOG_DELIVERY_REDIS_ERROR,
+    TELEGRAM_API_URL,
+    TELEGRAM_CHAT_BURST,
+    TELEGRAM_CHAT_RATE,
+    TELEGRAM_GLOBAL_BURST,
+    TELEGRAM_GLOBAL_RATE,
+)
+from .throttling import get_token_bucket_pause_script, get_token_bucket_script
+
+
+class TokenBucket:
+    """
+    Token bucket для asyncio: rate токенов в секунду, не больше capacity.
+
+    Ожидающие получают токены по очереди (FIFO под общей блокировкой).
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity,
+            self.tokens + (now - self.updated) * self.rate,
+        )
+        self.updated = now
+
+    async def acquire(self) -> None:
+        async with self.lock:
+            while True:
+                self.refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    async def pause(self, seconds: float) -> None:
+        """Следующий токен появится не раньше чем через seconds."""
+
+        self.refill()
+        # Несколько 429 подряд не суммируются: важен самый поздний срок
+        self.tokens = min(self.tokens, 1 - seconds * self.rate)
+
+
+class SharedTokenBucket:
+    """
+    Token bucket в Redis под ключом key, общий для всех процессов
+    (Lua-скрипты ограничителя API, throttling.py). Интерфейс - как
+    у TokenBucket. При недоступности Redis действует локальный
+    TokenBucket процесса.
+
+    Клиент Redis синхронный, поэтому скрипты выполняются в пуле
+    потоков цикла событий: ответ Redis не останавливает остальные
+    отправки, а зависший Redis ограничен REDIS_SOCKET_TIMEOUT.
+    """
+
+    def __init__(self, key: str, rate: float, capacity: float):
+        self.key = key
+        self.rate = rate
+        self.capacity = capacity
+        self.local = TokenBucket(rate, capacity)
+        # Ожидающие корутины процесса опрашивают Redis по одной
+        self.lock = asyncio.Lock()
+
+    def get_args(self, *args) -> list:
+        # Скрипты считают время в миллисекундах
+        return [self.capacity, self.rate / 1000, *args]
+
+    async def run_script(self, script, *args) -> int:
+        return await asyncio.get_running_loop().run_in_executor(
+            None,
+            lambda: script(keys=[self.key], args=self.get_args(*args)),
+        )
+
+    async def acquire(self) -> None:
+        async with self.lock:
+            while True:
+                try:
+                    wait_ms = await self.run_script(
+                        get_token_bucket_script(),
+                    )
+                except redis.RedisError as e:
+                    print(LOG_DELIVERY_REDIS_ERROR.format(e))
+                    await self.local.acquire()
+                    return
+                if not wait_ms:
+                    return
+                await asyncio.sleep(wait_ms / 1000)
+
+    async def pause(self, seconds: float) -> None:
+        await self.local.pause(seconds)
+        try:
+            await self.run_script(
+                get_token_bucket_pause_script(),
+                seconds * 1000,
+            )
+        except redis.RedisError as e:
+            print(LOG_DELIVERY_REDIS_ERROR.format(e))
+
+
+@dataclass
+class DeliveryReport:
+    """Итоги доставки пачки сообщений."""
+
+    sent: int = 0
+    failed: int = 0
+    retries: int = 0
+    rate_limited: int = 0
+    elapsed: float = 0.0
+    latencies: list = field(default_factory=list)
+    # Ответы API по коду, "error" - сетевая ошибка или таймаут
+    statuses: Counter = field(default_factory=Counter)
+    # Чаты, доставку в которые стоит повторить позже: последняя
+    # попытка кончилась сетевой ошибкой, 5xx или 429
+    undelivered: set = field(default_factory=set)
+
+    @property
+    def throughput(self) -> float:
+        """Доставлено сообщений в секунду."""
+
+        if not self.elapsed:
+            return 0.0
+        return self.sent / self.elapsed
+
+    def latency_quantile(self, q: int) -> float:
+        """Процентиль q времени ответа API в миллисекундах."""
+
+        if len(self.latencies) < 2:
+            return sum(self.latencies) * 1000
+        return statistics.quantiles(self.latencies, n=100)[q - 1] * 1000
+
+
+class DeliveryEngine:
+    """
+    Отправка сообщений через sendMessage Bot API.
+
+    Использование:
+    async with DeliveryEngine() as engine:
+        report = await engine.send_many([(chat_id, text), ...])
+
+    - до concurrency запросов одновременно через одну aiohttp-сессию
+      (пул keep-alive соединений)
+    - общий лимит global_rate и лимит chat_rate на каждый чат;
+      с limits_key - в Redis, общие для всех процессов
+    - 429: пауза на retry_after из ответа, затем повтор
+    - сетевые ошибки и 5xx: повтор с экспоненциальной задержкой
+    - остальные 4xx (чат не найден, бот заблокирован) не повторяются
+    """
+
+    def __init__(
+        self,
+        api_url: str = TELEGRAM_API_URL,
+        concurrency: int = DELIVERY_CONCURRENCY,
+        global_rate: float = TELEGRAM_GLOBAL_RATE,
+        global_burst: float = TELEGRAM_GLOBAL_BURST,
+        chat_rate: float = TELEGRAM_CHAT_RATE,
+        chat_burst: float = TELEGRAM_CHAT_BURST,
+        max_attempts: int = DELIVERY_MAX_ATTEMPTS,
+        backoff_base: float = DELIVERY_BACKOFF_BASE,
+        timeout: float = DELIVERY_TIMEOUT,
+        limits_key: str | None = None,
+    ):
+        self.api_url = api_url
+        self.concurrency = concurrency
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.timeout = timeout
+        self.limits_key = limits_key
+
+        self.global_bucket = self.create_bucket(
+            "global",
+            global_rate,
+            global_burst,
+        )
+        self.chat_buckets: dict[int, TokenBucket] = {}
+        self.session = None
+        self.semaphore = None
+
+    async def __aenter__(self):
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            connector=aiohttp.TCPConnector(limit=self.concurrency),
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.session.close()
+
+    def create_bucket(self, name: str, rate: float, capacity: float):
+        """Локальный TokenBucket или общий в Redis (limits_key)."""
+
+        if self.limits_key is None:
+            return TokenBucket(rate, capacity)
+        return SharedTokenBucket(f"{self.limits_key}:{name}", rate, capacity)
+
+    def get_chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self.create_bucket(
+                f"chat:{chat_id}",
+                self.chat_rate,
+                self.chat_burst,
+            )
+            self.chat_buckets[chat_id] = bucket
+        return bucket
+
+    def get_backoff(self, attempt: int) -> float:
+        """Экспоненциальная задержка с разбросом (full jitter)."""
+
+        delay = min(DELIVERY_BACKOFF_MAX, self.backoff_base * 2 ** attempt)
+        return random.uniform(0, delay)
+
+    async def post_message(
+        self,
+        chat_id: int,
+        text: str,
+    ) -> tuple[int, dict, float]:
+        """
+        Один запрос sendMessage в пределах лимитов.
+
+        Возвращает (код ответа, тело ответа, время ответа в секундах).
+        """
+
+        # Сначала лимит чата: ожидание очереди в одном чате
+        # не должно занимать слоты соединений и общий лимит
+        await self.get_chat_bucket(chat_id).acquire()
+        async with self.semaphore:
+            await self.global_bucket.acquire()
+            started = time.monotonic()
+            async with self.session.post(
+                self.api_url,
+                json={
+                    "chat_id": chat_id,
+                    "text": text,
+                    "parse_mode": "HTML",
+                },
+            ) as response:
+                try:
+                    body = await response.json(content_type=None)
+                except ValueError:
+                    body = {}
+                return response.status, body, time.monotonic() - started
+
+    async def send(
+        self,
+        chat_id: int,
+        text: str,
+        report: DeliveryReport,
+    ) -> bool:
+        """Доставляет одно сообщение с повторами, итог - в report."""
+
+        error = None
+        retryable = True
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                status, body, latency = await self.post_message(
+                    chat_id,
+                    text,
+                )
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = repr(e)
+                report.statuses["error"] += 1
+            else:
+                report.statuses[str(status)] += 1
+                if status == 200:
+                    report.latencies.append(latency)
+                    report.sent += 1
+                    return True
+
+                error = f"{status}: {body}"
+                if status == 429:
+                    # Лимит превышен: ждать ровно столько, сколько просит
+                    # Telegram, и не отправлять ничего всем ботом
+                    report.rate_limited += 1
+                    retry_after = self.get_retry_after(body)
+                    await self.global_bucket.pause(retry_after)
+                    await self.get_chat_bucket(chat_id).pause(retry_after)
+                    if attempt < self.max_attempts:
+                        report.retries += 1
+                    continue
+                if status < 500:
+                    retryable = False
+                    break
+
+            if attempt < self.max_attempts:
+                report.retries += 1
+                await asyncio.sleep(self.get_backoff(attempt))
+
+        report.failed += 1
+        if retryable:
+            report.undelivered.add(chat_id)
+        print(LOG_DELIVERY_FAILED.format(chat_id, error))
+        return False
+
+    @staticmethod
+    def get_retry_after(body: dict) -> float:
+        try:
+            parameters = body.get("parameters") or {}
+            return float(parameters.get("retry_after", 1))
+        except (TypeError, ValueError, AttributeError):
+            return 1.0
+
+    async def send_many(
+        self,
+        messages: Iterable[tuple[int, str]],
+    ) -> DeliveryReport:
+        """Доставляет сообщения конкурентно, возвращает итоги."""
+
+        report = DeliveryReport()
+        started = time.monotonic()
+        await asyncio.gather(
+            *(self.send(chat_id, text, report) for chat_id, text in messages)
+        )
+        report.elapsed = time.monotonic() - started
+        return report
+
+
+def deliver_messages(
+    messages: Iterable[tuple[int, str]],
+    **engine_options,
+) -> DeliveryReport:
+    """Синхронная обертка для Celery: доставляет пачку сообщений."""
+
+    async def run() -> DeliveryReport:
+        async with DeliveryEngine(**engine_options) as engine:
+            return await engine.send_many(messages)
+
+    return asyncio.run(run())
@@ -0,0 +1,101 @@
+"""
+Документация:
+https://docs.djangoproject.com/en/5.2/howto/outputting-csv/#streaming-large-csv-files
+https://docs.djangoproject.com/en/5.2/ref/models/querysets/#iterator
+"""
+
+import csv
+import json
+from collections.abc import Iterator
+from datetime import datetime
+
+from django.db.models import QuerySet
+
+from .constants import EXPORT_CHUNK_SIZE
+
+# Колонки выгрузки и соответствующие им поля модели
+EXPORT_COLUMNS = (
+    "id",
+    "name",
+    "description",
+    "creation_date",
+    "end_date",
+    "reminder_sent_at",
+    "status",
+    "completed_at",
+    "category",
+)
+EXPORT_FIELDS = (
+    "id",
+    "name",
+    "description",
+    "creation_date",
+    "end_date",
+    "reminder_sent_at",
+    "status",
+    "completed_at",
+    "category__name",
+)
+
+EXPORT_FORMAT_NDJSON = "ndjson"
+EXPORT_FORMAT_CSV = "csv"
+
+EXPORT_CONTENT_TYPES = {
+    EXPORT_FORMAT_NDJSON: "application/x-ndjson; charset=utf-8",
+    EXPORT_FORMAT_CSV: "text/csv; charset=utf-8",
+}
+
+
+class Echo:
+    """Псевдо-буфер для csv.writer: возвращает строку вместо записи."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def serialize_value(value):
+    """Приводит даты к ISO 8601, остальные значения оставляет как есть."""
+
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def iter_task_rows(queryset: QuerySet) -> Iterator[tuple]:
+    """
+    Построчно читает задачи через серверный курсор PostgreSQL.
+
+    В памяти одновременно находится не больше EXPORT_CHUNK_SIZE строк,
+    модели не создаются - только кортежи значений.
+    """
+
+    rows = queryset.values_list(*EXPORT_FIELDS).iterator(
+        chunk_size=EXPORT_CHUNK_SIZE,
+    )
+    for row in rows:
+        yield tuple(serialize_value(value) for value in row)
+
+
+def stream_ndjson(queryset: QuerySet) -> Iterator[str]:
+    """Одна задача - одна строка JSON."""
+
+    for row in iter_task_rows(queryset):
+        record = dict(zip(EXPORT_COLUMNS, row))
+        yield json.dumps(record, ensure_ascii=False) + "\n"
+
+
+def stream_csv(queryset: QuerySet) -> Iterator[str]:
+    """CSV с заголовком, строки отдаются по мере чтения из курсора."""
+
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_COLUMNS)
+    for row in iter_task_rows(queryset):
+        yield writer.writerow(row)
+
+
+def stream_tasks(queryset: QuerySet, export_format: str) -> Iterator[str]:
+    """Генератор выгрузки задач в выбранном формате."""
+
+    if export_format == EXPORT_FORMAT_CSV:
+        return stream_csv(queryset)
+    return stream_ndjson(queryset)
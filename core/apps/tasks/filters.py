@@ -0,0 +1,192 @@
+"""
+Документация:
+https://django-filter.readthedocs.io/en/stable/ref/filterset.html
+https://django-filter.readthedocs.io/en/stable/guide/rest_framework.html
+"""
+
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django import forms
+from django.conf import settings
+from django.utils import timezone
+from django_filters import rest_framework as filters
+
+from .models import Task
+
+DUE_TODAY = "today"
+DUE_OVERDUE = "overdue"
+DUE_UPCOMING = "upcoming"
+
+STATUS_ALL = "all"
+
+# Действия TaskViewSet, в которых по умолчанию отдаются только
+# открытые задачи. Маршруты одной задачи (GET/PATCH/DELETE /{id}/)
+# фильтр тоже проходят, но должны находить задачу в любом статусе
+DEFAULT_STATUS_ACTIONS = ("list", "search", "export")
+
+STATUS_CHOICES = (
+    *Task.Status.choices,
+    (STATUS_ALL, "Все"),
+)
+
+DUE_CHOICES = (
+    (DUE_TODAY, "Срок сегодня"),
+    (DUE_OVERDUE, "Просрочены"),
+    (DUE_UPCOMING, "Предстоящие"),
+)
+
+
+def local_day_start(tz: ZoneInfo, days: int = 0) -> datetime:
+    """Начало локального дня (00:00) в часовом поясе tz со сдвигом days."""
+
+    today = timezone.localdate(timezone=tz)
+    return datetime.combine(today + timedelta(days=days), time.min, tzinfo=tz)
+
+
+class TaskFilterForm(forms.Form):
+    """Форма фильтров: превращает параметр tz в ZoneInfo."""
+
+    def clean_tz(self) -> ZoneInfo:
+        value = self.cleaned_data.get("tz")
+        if not value:
+            return ZoneInfo(settings.TIME_ZONE)
+        try:
+            return ZoneInfo(value)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise forms.ValidationError(f"Неизвестный часовой пояс: {value}")
+
+
+class TaskFilter(filters.FilterSet):
+    """
+    Фильтры списка задач.
+
+    Все границы «сегодня»/«N дней» считаются в часовом поясе tz
+    и передаются в SQL как диапазон по end_date, поэтому запрос
+    использует индекс (user, end_date).
+
+    По умолчанию список, поиск и выгрузка отдают только открытые
+    задачи (частичный индекс по status='open'), выполненные
+    и отмененные - через ?status=. Маршруты одной задачи находят
+    ее в любом статусе.
+
+    Примеры:
+    - ?status=done / ?status=all - выполненные / все задачи
+    - ?due=today&tz=Europe/Moscow - срок сегодня
+    - ?due=overdue - просроченные
+    - ?within_days=3 - срок в ближайшие 3 дня
+    - ?category=<id> или ?category_name=Покупки
+    - ?ordering=end_date / ?ordering=-end_date
+    - ?within_days=7&occurrences=true - с будущими вхождениями
+      повторяющихся задач за окно (см. get_occurrences_until)
+    """
+
+    tz = filters.CharFilter(method="filter_tz")
+    status = filters.ChoiceFilter(
+        choices=STATUS_CHOICES,
+        method="filter_status",
+    )
+    due = filters.ChoiceFilter(
+        choices=DUE_CHOICES,
+        method="filter_due",
+    )
+    within_days = filters.NumberFilter(
+        method="filter_within_days",
+        min_value=0,
+        max_value=366,
+    )
+    occurrences = filters.BooleanFilter(method="filter_occurrences")
+    category = filters.CharFilter(field_name="category_id")
+    category_name = filters.CharFilter(field_name="category__name")
+    ordering = filters.OrderingFilter(
+        fields=(
+            ("end_date", "end_date"),
+            ("creation_date", "creation_date"),
+        ),
+    )
+
+    class Meta:
+        model = Task
+        form = TaskFilterForm
+        fields = []
+
+    def __init__(self, data=None, *args, **kwargs):
+        if (
+            data is not None
+            and not data.get("status")
+            and self.is_default_status_action(kwargs.get("request"))
+        ):
+            data = data.copy()
+            data["status"] = Task.Status.OPEN
+        super().__init__(data, *args, **kwargs)
+
+    @staticmethod
+    def is_default_status_action(request) -> bool:
+        """Действие запроса отдает только открытые задачи по умолчанию."""
+
+        parser_context = getattr(request, "parser_context", None) or {}
+        view = parser_context.get("view")
+        return getattr(view, "action", None) in DEFAULT_STATUS_ACTIONS
+
+    def get_timezone(self) -> ZoneInfo:
+        return self.form.cleaned_data.get("tz") or ZoneInfo(
+            settings.TIME_ZONE,
+        )
+
+    def filter_tz(self, queryset, name, value):
+        """Часовой пояс только задает границы для остальных фильтров."""
+
+        return queryset
+
+    def filter_occurrences(self, queryset, name, value):
+        """Вхождения добавляются к ответу, а не к запросу."""
+
+        return queryset
+
+    def get_occurrences_until(self) -> datetime | None:
+        """
+        Конец окна списка (due=today, within_days) для вхождений
+        повторяющихся задач или None, если они не запрошены
+        или у списка нет окна.
+        """
+
+        data = self.form.cleaned_data
+        if not data.get("occurrences"):
+            return None
+
+        tz = self.get_timezone()
+        ends = []
+        if data.get("due") == DUE_TODAY:
+            ends.append(local_day_start(tz, days=1))
+        if data.get("within_days") is not None:
+            ends.append(local_day_start(tz, days=int(data["within_days"]) + 1))
+        return min(ends, default=None)
+
+    def filter_status(self, queryset, name, value):
+        if value == STATUS_ALL:
+            return queryset
+        return queryset.filter(status=value)
+
+    def filter_due(self, queryset, name, value):
+        now = timezone.now()
+
+        if value == DUE_TODAY:
+            tz = self.get_timezone()
+            return queryset.filter(
+                end_date__gte=local_day_start(tz),
+                end_date__lt=local_day_start(tz, days=1),
+            )
+        if value == DUE_OVERDUE:
+            return queryset.filter(end_date__lt=now)
+        if value == DUE_UPCOMING:
+            return queryset.filter(end_date__gte=now)
+        return queryset
+
+    def filter_within_days(self, queryset, name, value):
+        """Срок от текущего момента до конца N-го локального дня."""
+
+        tz = self.get_timezone()
+        return queryset.filter(
+            end_date__gte=timezone.now(),
+            end_date__lt=local_day_start(tz, days=int(value) + 1),
+        )
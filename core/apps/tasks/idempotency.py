@@ -0,0 +1,137 @@
+"""
+Документация:
+https://datatracker.ietf.org/doc/draft-ietf-httpapi-idempotency-key-header/
+https://docs.djangoproject.com/en/5.2/topics/cache/#the-low-level-cache-api
+"""
+
+import hashlib
+import json
+from functools import wraps
+
+import redis
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+from .constants import (
+    IDEMPOTENCY_KEY_MAX_LENGTH,
+    IDEMPOTENCY_LOCK_TIMEOUT,
+    IDEMPOTENCY_TTL,
+    LOG_IDEMPOTENCY_CACHE_ERROR,
+)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+IDEMPOTENCY_REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+def get_idempotency_cache_key(request, key: str) -> str:
+    """
+    Ключ кэша для сохраненного ответа.
+
+    Ключи разных пользователей не пересекаются: пространство имен -
+    user_telegram_id из запроса.
+    """
+
+    telegram_id = request.query_params.get("user_telegram_id")
+    if not telegram_id and hasattr(request.data, "get"):
+        telegram_id = request.data.get("user_telegram_id")
+    return f"idempotency_{telegram_id or 'anonymous'}_{key}"
+
+
+def get_request_fingerprint(request) -> str:
+    """Отпечаток запроса: метод, путь с параметрами и тело."""
+
+    body = json.dumps(
+        request.data,
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    raw = f"{request.method} {request.get_full_path()} {body}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def idempotent(view_method):
+    """
+    Декоратор метода ViewSet с поддержкой заголовка Idempotency-Key.
+
+    - Без заголовка запрос выполняется как обычно
+    - Первый запрос с ключом выполняется, ответ (кроме 5xx)
+      сохраняется в кэше на IDEMPOTENCY_TTL
+    - Повтор с тем же ключом и телом получает сохраненный ответ
+      без обращений к БД и без сигналов post_save
+    - Повтор, пока первый запрос еще выполняется: 409
+    - Тот же ключ с другим телом или адресом: 422
+    - При недоступности кэша запрос выполняется без ключа
+    """
+
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+
+        if len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            return Response(
+                {
+                    "error": f"{IDEMPOTENCY_HEADER} длиннее {IDEMPOTENCY_KEY_MAX_LENGTH} символов",  # noqa: E501
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        cache_key = get_idempotency_cache_key(request, key)
+        lock_key = f"{cache_key}_lock"
+        fingerprint = get_request_fingerprint(request)
+
+        try:
+            stored = cache.get(cache_key)
+            if stored is None and not cache.add(
+                lock_key,
+                fingerprint,
+                timeout=IDEMPOTENCY_LOCK_TIMEOUT,
+            ):
+                return Response(
+                    {
+                        "error": "Запрос с этим ключом еще выполняется",
+                    },
+                    status=status.HTTP_409_CONFLICT,
+                )
+        except redis.RedisError as e:
+            print(LOG_IDEMPOTENCY_CACHE_ERROR.format(e))
+            return view_method(self, request, *args, **kwargs)
+
+        if stored is not None:
+            if stored["fingerprint"] != fingerprint:
+                return Response(
+                    {
+                        "error": f"{IDEMPOTENCY_HEADER} уже использован для другого запроса",  # noqa: E501
+                    },
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                )
+            return Response(
+                stored["data"],
+                status=stored["status"],
+                headers={IDEMPOTENCY_REPLAYED_HEADER: "true"},
+            )
+
+        response = None
+        try:
+            response = view_method(self, request, *args, **kwargs)
+            return response
+        finally:
+            try:
+                if response is not None and response.status_code < 500:
+                    cache.set(
+                        cache_key,
+                        {
+                            "fingerprint": fingerprint,
+                            "status": response.status_code,
+                            "data": response.data,
+                        },
+                        timeout=IDEMPOTENCY_TTL,
+                    )
+                cache.delete(lock_key)
+            except redis.RedisError as e:
+                print(LOG_IDEMPOTENCY_CACHE_ERROR.format(e))
+
+    return wrapper
@@ -0,0 +1,262 @@
+"""
+Документация:
+https://docs.djangoproject.com/en/5.2/ref/models/querysets/#bulk-create
+https://docs.djangoproject.com/en/5.2/topics/db/transactions/
+"""
+
+import csv
+import io
+import json
+import time
+from dataclasses import dataclass, field
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from .constants import IMPORT_BATCH_SIZE, IMPORT_MAX_ERRORS
+from .models import Category, Task
+from .serializers import TaskImportSerializer
+from .stats import invalidate_user_stats
+
+User = get_user_model()
+
+IMPORT_FORMAT_JSON = "json"
+IMPORT_FORMAT_CSV = "csv"
+IMPORT_FORMATS = (IMPORT_FORMAT_JSON, IMPORT_FORMAT_CSV)
+
+ERROR_NAME_EXISTS = {"name": ["Задача с таким названием уже существует"]}
+
+
+@dataclass
+class ImportResult:
+    """Итоги импорта задач."""
+
+    total: int = 0
+    created: int = 0
+    skipped: int = 0
+    reminders_scheduled: int = 0
+    elapsed: float = 0.0
+    errors: list = field(default_factory=list)
+
+    @property
+    def rows_per_second(self) -> float:
+        if not self.elapsed:
+            return 0.0
+        return round(self.total / self.elapsed, 1)
+
+    def add_error(self, row: int, errors) -> None:
+        self.skipped += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append({"row": row, "errors": errors})
+
+    def as_dict(self) -> dict:
+        return {
+            "total": self.total,
+            "created": self.created,
+            "skipped": self.skipped,
+            "reminders_scheduled": self.reminders_scheduled,
+            "elapsed": round(self.elapsed, 3),
+            "rows_per_second": self.rows_per_second,
+            "errors": self.errors,
+        }
+
+
+def parse_rows(content: str | bytes, import_format: str) -> list[dict]:
+    """
+    Разбирает файл импорта в список словарей.
+
+    JSON: список объектов или {"tasks": [...]}.
+    CSV: заголовок name,description,end_date,category
+    (лишние колонки, например из выгрузки, игнорируются).
+    """
+
+    if isinstance(content, bytes):
+        content = content.decode("utf-8-sig")
+
+    if import_format == IMPORT_FORMAT_CSV:
+        return list(csv.DictReader(io.StringIO(content)))
+
+    data = json.loads(content)
+    if isinstance(data, dict):
+        data = data.get("tasks", [])
+    if not isinstance(data, list):
+        raise ValueError("Ожидается список задач")
+    return data
+
+
+def validate_rows(rows: list, result: ImportResult) -> list[dict]:
+    """
+    Проверяет формат всех строк без обращений к БД.
+
+    Строки с ошибками и повторяющимися названиями пропускаются
+    и попадают в result.errors.
+    """
+
+    row_serializer = TaskImportSerializer()
+    valid_rows = []
+    seen_names = set()
+
+    for index, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            result.add_error(index, "Строка должна быть объектом")
+            continue
+        try:
+            data = row_serializer.run_validation(row)
+        except serializers.ValidationError as e:
+            result.add_error(index, e.detail)
+            continue
+
+        if data["name"] in seen_names:
+            result.add_error(index, {"name": ["Повтор названия в файле"]})
+            continue
+
+        seen_names.add(data["name"])
+        data["row"] = index
+        valid_rows.append(data)
+
+    return valid_rows
+
+
+def resolve_categories(rows: list[dict]) -> dict[str, str]:
+    """
+    Находит или создает все категории из файла за один проход.
+
+    Возвращает словарь {название категории: id}.
+    """
+
+    names = {row["category"].strip() for row in rows if row["category"]}
+    if not names:
+        return {}
+
+    category_ids = dict(
+        Category.objects.filter(name__in=names).values_list("name", "id")
+    )
+    missing = names - category_ids.keys()
+    if missing:
+        Category.objects.bulk_create(
+            [Category(name=name) for name in missing],
+            ignore_conflicts=True,
+        )
+        category_ids.update(
+            Category.objects.filter(name__in=missing).values_list(
+                "name",
+                "id",
+            )
+        )
+    return category_ids
+
+
+def build_tasks(rows: list[dict], user, category_ids: dict) -> list[Task]:
+    """Создает объекты задач для bulk_create."""
+
+    return [
+        Task(
+            name=row["name"],
+            description=row["description"],
+            end_date=row["end_date"],
+            category_id=category_ids.get((row["category"] or "").strip()),
+            user=user,
+        )
+        for row in rows
+    ]
+
+
+def insert_rows_one_by_one(
+    rows: list[dict],
+    user,
+    category_ids: dict,
+    result: ImportResult,
+) -> list[Task]:
+    """
+    Вставляет строки пачки по одной, каждую в своей транзакции.
+
+    Нужна, когда bulk_create пачки упал на IntegrityError:
+    параллельный запрос создал задачу с тем же названием между
+    проверкой и вставкой. Такие строки попадают в result.errors,
+    остальные создаются.
+    """
+
+    tasks = []
+    for row, task in zip(rows, build_tasks(rows, user, category_ids)):
+        try:
+            with transaction.atomic():
+                tasks.extend(Task.objects.bulk_create([task]))
+        except IntegrityError:
+            result.add_error(row["row"], ERROR_NAME_EXISTS)
+    return tasks
+
+
+def bulk_import_tasks(
+    rows: list,
+    user_telegram_id: int,
+    batch_size: int = IMPORT_BATCH_SIZE,
+) -> ImportResult:
+    """
+    Массовый импорт задач пользователя.
+
+    1. Проверяет формат всех строк в памяти
+    2. Получает пользователя и все категории несколькими запросами
+    3. Вставляет задачи bulk_create пачками, каждая в своей транзакции;
+       если пачка упала на параллельно созданном названии, она
+       вставляется по строке (insert_rows_one_by_one)
+    4. Напоминания каждой пачки планирует Task.objects.bulk_create:
+       события outbox одним INSERT в транзакции пачки
+    """
+
+    started = time.perf_counter()
+    result = ImportResult(total=len(rows))
+
+    valid_rows = validate_rows(rows, result)
+
+    user, _ = User.objects.get_or_create(
+        username=f"tg_{user_telegram_id}",
+        defaults={"first_name": f"Telegram User {user_telegram_id}"},
+    )
+    category_ids = resolve_categories(valid_rows)
+
+    created_tasks = []
+    for start in range(0, len(valid_rows), batch_size):
+        batch = valid_rows[start:start + batch_size]
+
+        # Название задачи уникально во всей таблице
+        existing_names = set(
+            Task.objects.filter(
+                name__in=[row["name"] for row in batch],
+            ).values_list("name", flat=True)
+        )
+        new_rows = []
+        for row in batch:
+            if row["name"] in existing_names:
+                result.add_error(row["row"], ERROR_NAME_EXISTS)
+            else:
+                new_rows.append(row)
+
+        try:
+            with transaction.atomic():
+                tasks = Task.objects.bulk_create(
+                    build_tasks(new_rows, user, category_ids),
+                )
+        except IntegrityError:
+            tasks = insert_rows_one_by_one(
+                new_rows,
+                user,
+                category_ids,
+                result,
+            )
+
+        created_tasks.extend(tasks)
+        result.created += len(tasks)
+
+    if created_tasks:
+        now = timezone.now()
+        result.reminders_scheduled = sum(
+            1
+            for task in created_tasks
+            if task.status == Task.Status.OPEN and task.end_date > now
+        )
+        invalidate_user_stats(user.pk)
+
+    result.elapsed = time.perf_counter() - started
+    return result
@@ -0,0 +1,66 @@
+"""
+Документация:
+https://docs.djangoproject.com/en/5.2/howto/custom-management-commands/
+
+Перенос задач с истекшим сроком хранения в архив.
+Та же операция выполняется по расписанию celery beat.
+
+Пример запуска:
+python manage.py archive_tasks --retention-days 30 --batch-size 500
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.apps.tasks.archive import archive_expired_tasks
+from core.apps.tasks.constants import ARCHIVE_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = "Перенос задач с истекшим сроком хранения в архив"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--retention-days",
+            type=int,
+            default=settings.ARCHIVE_RETENTION_DAYS,
+            help="Через сколько дней после срока задача уходит в архив",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=ARCHIVE_BATCH_SIZE,
+            help="Количество задач в одной транзакции",
+        )
+        parser.add_argument(
+            "--max-batches",
+            type=int,
+            help="Остановиться после N пачек",
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.0,
+            help="Пауза между пачками, секунды",
+        )
+
+    def handle(self, *args, **options):
+        def report(result):
+            self.stdout.write(
+                f"Пачка {result.batches}: перенесено {result.archived}"
+            )
+
+        result = archive_expired_tasks(
+            retention_days=options["retention_days"],
+            batch_size=options["batch_size"],
+            max_batches=options["max_batches"],
+            pause=options["pause"],
+            on_batch=report if options["verbosity"] > 1 else None,
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"В архив перенесено {result.archived} задач "
+                f"за {result.batches} пачек, {result.elapsed:.2f} с"
+            )
+        )
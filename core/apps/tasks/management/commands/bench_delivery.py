@@ -0,0 +1,107 @@
+"""
+Документация:
+https://docs.djangoproject.com/en/5.2/howto/custom-management-commands/
+https://core.telegram.org/bots/faq#my-bot-is-hitting-limits-how-do-i-avoid-this
+
+Замер доставки напоминаний на локальной заглушке Bot API:
+пропускная способность, задержки p50/p99, повторы и ответы 429.
+Настоящий Telegram не используется.
+
+Пример запуска:
+python manage.py bench_delivery --messages 600 --chats 600 --legacy 50
+"""
+
+import time
+
+import requests
+from django.core.management.base import BaseCommand
+
+from core.apps.tasks.delivery import deliver_messages
+from core.apps.tasks.tests.fake_telegram import FakeTelegramServer
+
+
+class Command(BaseCommand):
+    help = "Замер доставки сообщений на заглушке Telegram Bot API"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=600)
+        parser.add_argument("--chats", type=int, default=600)
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument("--latency-ms", type=int, default=150)
+        parser.add_argument("--error-rate", type=float, default=0.0)
+        parser.add_argument(
+            "--global-rate",
+            type=float,
+            default=None,
+            help="Общий лимит отправки, сообщений/с (по умолчанию 25)",
+        )
+        parser.add_argument(
+            "--server-limit",
+            type=int,
+            default=30,
+            help="Лимит заглушки, сообщений/с (как у Telegram)",
+        )
+        parser.add_argument(
+            "--legacy",
+            type=int,
+            default=0,
+            help="Отправить N сообщений по одному через requests.post",
+        )
+
+    def run_legacy(self, api_url: str, count: int):
+        started = time.perf_counter()
+        sent = 0
+        for number in range(count):
+            response = requests.post(
+                api_url,
+                json={"chat_id": number, "text": "⏰ Напоминание"},
+                timeout=10,
+            )
+            sent += response.status_code == 200
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"requests.post по одному: {sent} за {elapsed:.2f} с "
+            f"({sent / elapsed:.1f} сообщений/с)"
+        )
+
+    def handle(self, *args, **options):
+        server = FakeTelegramServer(
+            latency=options["latency_ms"] / 1000,
+            global_limit=options["server_limit"],
+            error_rate=options["error_rate"],
+        )
+        api_url = server.start()
+
+        try:
+            if options["legacy"]:
+                self.run_legacy(api_url, options["legacy"])
+                # Окно лимита заглушки должно освободиться
+                time.sleep(1)
+
+            engine_options = {
+                "api_url": api_url,
+                "concurrency": options["concurrency"],
+            }
+            if options["global_rate"]:
+                engine_options["global_rate"] = options["global_rate"]
+
+            chats = options["chats"]
+            messages = [
+                (number % chats, f"⏰ Напоминание #{number}")
+                for number in range(options["messages"])
+            ]
+            received_before = server.stats.received
+            report = deliver_messages(messages, **engine_options)
+        finally:
+            server.stop()
+
+        self.stdout.write(
+            f"DeliveryEngine: {report.sent} из {len(messages)} "
+            f"за {report.elapsed:.2f} с "
+            f"({report.throughput:.1f} сообщений/с), "
+            f"p50 {report.latency_quantile(50):.0f} мс, "
+            f"p99 {report.latency_quantile(99):.0f} мс, "
+            f"повторов {report.retries}, 429 {report.rate_limited}, "
+            f"не доставлено {report.failed}, "
+            f"запросов к API {server.stats.received - received_before}"
+        )
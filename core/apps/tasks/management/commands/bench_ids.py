@@ -0,0 +1,94 @@
+"""
+Документация:
+https://docs.djangoproject.com/en/5.2/howto/custom-management-commands/
+https://www.postgresql.org/docs/current/functions-admin.html#FUNCTIONS-ADMIN-DBSIZE
+
+Сравнение генераторов ID задач: скорость генерации, дубликаты,
+скорость вставки в таблицу с первичным ключом и размер индекса.
+Таблицы временные, данные приложения не затрагиваются.
+
+Пример запуска:
+python manage.py bench_ids --rows 200000 --batch-size 1000
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core.apps.tasks.utils import (
+    generate_content_based_id,
+    generate_time_ordered_id,
+)
+
+GENERATORS = {
+    "content_based": generate_content_based_id,
+    "time_ordered": generate_time_ordered_id,
+}
+
+
+class Command(BaseCommand):
+    help = "Сравнение генераторов ID: дубликаты и скорость вставки"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100_000)
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def generate(self, generator, rows: int) -> tuple[list[str], float]:
+        started = time.perf_counter()
+        ids = [generator() for _ in range(rows)]
+        return ids, time.perf_counter() - started
+
+    def insert(self, table: str, ids: list[str], batch_size: int):
+        """Вставляет ID пачками, возвращает (вставлено, секунды, байты)."""
+
+        inserted = 0
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TEMP TABLE {table} "
+                "(id varchar(16) PRIMARY KEY, payload text NOT NULL)"
+            )
+
+            started = time.perf_counter()
+            for start in range(0, len(ids), batch_size):
+                cursor.execute(
+                    f"INSERT INTO {table} (id, payload) "
+                    "SELECT id, 'payload' FROM unnest(%s::varchar[]) AS id "
+                    "ON CONFLICT DO NOTHING",
+                    [ids[start:start + batch_size]],
+                )
+                inserted += cursor.rowcount
+            elapsed = time.perf_counter() - started
+
+            cursor.execute(
+                "SELECT pg_relation_size(%s)",
+                [f"{table}_pkey"],
+            )
+            index_size = cursor.fetchone()[0]
+            cursor.execute(f"DROP TABLE {table}")
+
+        return inserted, elapsed, index_size
+
+    def handle(self, *args, **options):
+        rows = options["rows"]
+        batch_size = options["batch_size"]
+
+        # Выделение номера узла - один запрос, вне замера
+        generate_time_ordered_id()
+
+        for name, generator in GENERATORS.items():
+            ids, generate_elapsed = self.generate(generator, rows)
+            duplicates = rows - len(set(ids))
+            inserted, insert_elapsed, index_size = self.insert(
+                f"bench_ids_{name}",
+                ids,
+                batch_size,
+            )
+            self.stdout.write(
+                f"{name}: "
+                f"генерация {rows / generate_elapsed:,.0f} ID/с, "
+                f"дубликатов {duplicates}, "
+                f"вставлено {inserted} из {rows} "
+                f"({inserted / insert_elapsed:,.0f} строк/с), "
+                f"индекс PK {index_size / 1024 / 1024:.1f} МБ"
+            )
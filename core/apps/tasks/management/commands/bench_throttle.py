@@ -0,0 +1,81 @@
+"""
+Документация:
+https://docs.djangoproject.com/en/5.2/howto/custom-management-commands/
+
+Замер накладных расходов ограничителя запросов на один запрос.
+
+Пример запуска:
+python manage.py bench_throttle --requests 10000 --users 100
+"""
+
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from core.apps.tasks.throttling import (
+    TelegramUserReadThrottle,
+    TelegramUserWriteThrottle,
+)
+from core.apps.tasks.utils import get_redis_client
+
+
+class Command(BaseCommand):
+    help = "Замер накладных расходов throttle на один запрос (Redis)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=10000)
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=100,
+            help="Сколько разных user_telegram_id перебирать",
+        )
+
+    def measure(self, throttle_class, method, requests_count, users):
+        factory = APIRequestFactory()
+        build = getattr(factory, method)
+        requests = [
+            Request(build(f"/api/tasks/?user_telegram_id={i % users}"))
+            for i in range(requests_count)
+        ]
+
+        throttle = throttle_class()
+        timings = []
+        throttled = 0
+        for request in requests:
+            started = time.perf_counter()
+            if not throttle.allow_request(request, None):
+                throttled += 1
+            timings.append((time.perf_counter() - started) * 1_000_000)
+        return timings, throttled
+
+    def handle(self, *args, **options):
+        requests_count = options["requests"]
+        users = options["users"]
+
+        # Прогрев соединения и загрузка Lua-скрипта
+        get_redis_client().ping()
+        self.measure(TelegramUserReadThrottle, "get", 100, users)
+
+        for throttle_class, method in (
+            (TelegramUserReadThrottle, "get"),
+            (TelegramUserWriteThrottle, "post"),
+        ):
+            timings, throttled = self.measure(
+                throttle_class,
+                method,
+                requests_count,
+                users,
+            )
+            quantiles = statistics.quantiles(timings, n=100)
+            self.stdout.write(
+                f"{throttle_class.__name__}: "
+                f"{requests_count} запросов, "
+                f"ограничено {throttled}, "
+                f"среднее {statistics.mean(timings):.0f} мкс, "
+                f"p50 {quantiles[49]:.0f} мкс, "
+                f"p99 {quantiles[98]:.0f} мкс"
+            )
@@ -0,0 +1,77 @@
+"""
+Документация:
+https://docs.djangoproject.com/en/5.2/howto/custom-management-commands/
+
+Пример запуска:
+python manage.py import_tasks tasks.csv --user-telegram-id 123456789
+"""
+
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.apps.tasks.constants import IMPORT_BATCH_SIZE
+from core.apps.tasks.importer import (
+    IMPORT_FORMATS,
+    bulk_import_tasks,
+    parse_rows,
+)
+
+
+class Command(BaseCommand):
+    help = "Массовый импорт задач пользователя из JSON или CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", type=Path, help="Путь к файлу импорта")
+        parser.add_argument(
+            "--user-telegram-id",
+            type=int,
+            required=True,
+            help="Telegram ID владельца задач",
+        )
+        parser.add_argument(
+            "--format",
+            choices=IMPORT_FORMATS,
+            help="Формат файла (по умолчанию по расширению)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=IMPORT_BATCH_SIZE,
+            help="Количество задач в одной транзакции",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        if not path.exists():
+            raise CommandError(f"Файл не найден: {path}")
+
+        import_format = options["format"] or path.suffix.lstrip(".").lower()
+        if import_format not in IMPORT_FORMATS:
+            raise CommandError(
+                f"Не удалось определить формат файла: {path.name}",
+            )
+
+        try:
+            rows = parse_rows(path.read_bytes(), import_format)
+        except (ValueError, UnicodeDecodeError) as e:
+            raise CommandError(f"Не удалось разобрать файл: {e}")
+
+        result = bulk_import_tasks(
+            rows,
+            options["user_telegram_id"],
+            batch_size=options["batch_size"],
+        )
+
+        for error in result.errors:
+            self.stderr.write(f"Строка {error['row']}: {error['errors']}")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Импортировано {result.created} из {result.total} "
+                f"(пропущено {result.skipped}), "
+                f"напоминаний: {result.reminders_scheduled}, "
+                f"{result.elapsed:.2f} с, "
+                f"{result.rows_per_second} строк/с"
+            )
+        )
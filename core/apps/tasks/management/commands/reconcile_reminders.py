@@ -0,0 +1,119 @@
+"""
+Документация:
+https://docs.djangoproject.com/en/5.2/howto/custom-management-commands/
+
+Восстановление напоминаний после потери сообщений Celery
+(очистка Redis, потеря брокера, деплой со сбросом очереди).
+
+Пример запуска:
+python manage.py reconcile_reminders --dry-run
+python manage.py reconcile_reminders --all --processes 8
+"""
+
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.apps.tasks.constants import (
+    RECONCILE_BATCH_SIZE,
+    RECONCILE_INSPECT_TIMEOUT,
+    RECONCILE_PROCESSES,
+)
+from core.apps.tasks.reconcile import (
+    get_scheduled_reminder_ids,
+    reconcile_reminders,
+)
+from core.apps.tasks.reminders import REMINDER_MODE_SWEEP
+
+
+class Command(BaseCommand):
+    help = "Перепланирование недостающих и устаревших напоминаний"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=RECONCILE_BATCH_SIZE,
+            help="Количество задач в одной пачке",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=min(RECONCILE_PROCESSES, os.cpu_count() or 1),
+            help="Сколько процессов публикуют сообщения в брокер",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Только посчитать, ничего не перепланировать",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Перепланировать все будущие напоминания (брокер потерян)",
+        )
+        parser.add_argument(
+            "--no-inspect",
+            action="store_true",
+            help="Не спрашивать воркеров, сверять только с БД",
+        )
+        parser.add_argument(
+            "--inspect-timeout",
+            type=float,
+            default=RECONCILE_INSPECT_TIMEOUT,
+            help="Сколько ждать ответа воркеров, секунды",
+        )
+
+    def handle(self, *args, **options):
+        if settings.REMINDER_MODE == REMINDER_MODE_SWEEP:
+            self.stdout.write(
+                "Режим sweep: напоминания выбираются из БД, "
+                "восстанавливать в брокере нечего"
+            )
+            return
+
+        scheduled_ids = None
+        if not options["all"] and not options["no_inspect"]:
+            scheduled_ids = get_scheduled_reminder_ids(
+                options["inspect_timeout"],
+            )
+            if scheduled_ids is None:
+                self.stdout.write(
+                    self.style.WARNING(
+                        "Воркеры не ответили: сверка только с БД. "
+                        "Если брокер потерян, запустите с --all"
+                    )
+                )
+            else:
+                self.stdout.write(
+                    f"У воркеров сообщений с ETA: {len(scheduled_ids)}"
+                )
+
+        def report(result):
+            self.stdout.write(
+                f"Пачка {result.batches}: проверено {result.checked}, "
+                f"к перепланированию {result.selected}, "
+                f"перепланировано {result.rescheduled}, "
+                f"{result.elapsed:.1f} с"
+            )
+
+        result = reconcile_reminders(
+            scheduled_ids=scheduled_ids,
+            reschedule_all=options["all"],
+            batch_size=options["batch_size"],
+            processes=options["processes"],
+            dry_run=options["dry_run"],
+            on_batch=report if options["verbosity"] > 0 else None,
+        )
+
+        action = "перепланировано"
+        if options["dry_run"]:
+            action = "будет перепланировано"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Проверено {result.checked} напоминаний: "
+                f"устаревших {result.stale}, недостающих {result.missing}, "
+                f"{action} {result.selected} за {result.elapsed:.2f} с"
+            )
+        )
@@ -0,0 +1,73 @@
+"""
+Документация:
+https://docs.djangoproject.com/en/5.2/howto/custom-management-commands/
+
+Публикация событий outbox (OutboxEvent) в брокер Celery.
+Та же операция выполняется по расписанию celery beat, а с --loop
+команда работает отдельным процессом relay.
+
+Пример запуска:
+python manage.py relay_outbox --loop --interval 1
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.apps.tasks.constants import (
+    OUTBOX_RELAY_BATCH_SIZE,
+    OUTBOX_RELAY_MAX_BATCHES,
+)
+from core.apps.tasks.outbox import relay_outbox_events
+
+
+class Command(BaseCommand):
+    help = "Публикация событий outbox в брокер Celery"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=OUTBOX_RELAY_BATCH_SIZE,
+            help="Количество событий в одной транзакции",
+        )
+        parser.add_argument(
+            "--max-batches",
+            type=int,
+            default=OUTBOX_RELAY_MAX_BATCHES,
+            help="Максимум пачек за проход",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Повторять проходы до остановки процесса",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Пауза после прохода без событий (--loop), секунды",
+        )
+
+    def relay(self, options) -> int:
+        result = relay_outbox_events(
+            batch_size=options["batch_size"],
+            max_batches=options["max_batches"],
+        )
+        if result.published or not options["loop"]:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Опубликовано {result.published} событий "
+                    f"за {result.batches} пачек, {result.elapsed:.2f} с"
+                )
+            )
+        return result.published
+
+    def handle(self, *args, **options):
+        if not options["loop"]:
+            self.relay(options)
+            return
+
+        while True:
+            if not self.relay(options):
+                time.sleep(options["interval"])
@@ -0,0 +1,137 @@
+"""
+Документация:
+https://docs.djangoproject.com/en/5.2/howto/custom-management-commands/
+https://sre.google/sre-book/service-level-objectives/
+
+Сводка метрик доставки напоминаний (metrics.py): опоздание
+относительно end_date, ожидание в очереди, время ответа Telegram,
+коды ответов, напоминаний в минуту и проверка SLO опоздания.
+С нарушенным SLO команда завершается с ошибкой.
+
+Пример запуска:
+python manage.py reminder_metrics --slo-seconds 60 --slo-target 0.99
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.apps.tasks.constants import (
+    REMINDER_LATENESS_SLO_SECONDS,
+    REMINDER_LATENESS_SLO_TARGET,
+)
+from core.apps.tasks.metrics import (
+    REMINDER_LATENESS,
+    REMINDER_QUEUE_WAIT,
+    REMINDERS_SKIPPED,
+    TELEGRAM_API_LATENCY,
+    TELEGRAM_MESSAGES,
+    TELEGRAM_RESPONSES,
+    get_sent_per_minute,
+    load_metrics,
+    merge_series,
+    reset_metrics,
+)
+
+
+class Command(BaseCommand):
+    help = "Сводка метрик доставки напоминаний и проверка SLO опоздания"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--slo-seconds",
+            type=float,
+            default=REMINDER_LATENESS_SLO_SECONDS,
+            help="Допустимое опоздание напоминания, секунды",
+        )
+        parser.add_argument(
+            "--slo-target",
+            type=float,
+            default=REMINDER_LATENESS_SLO_TARGET,
+            help="Доля напоминаний, которые должны уложиться в порог",
+        )
+        parser.add_argument(
+            "--minutes",
+            type=int,
+            default=60,
+            help="За сколько последних минут считать напоминания в минуту",
+        )
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Удалить накопленные метрики",
+        )
+
+    def write_histogram(self, title: str, snapshot) -> None:
+        if not snapshot.count:
+            self.stdout.write(f"{title}: нет данных")
+            return
+
+        p50, p90, p99 = (
+            snapshot.quantile(q) for q in (0.5, 0.9, 0.99)
+        )
+        self.stdout.write(
+            f"{title}: {snapshot.count} наблюдений, "
+            f"среднее {snapshot.sum / snapshot.count:.2f} с, "
+            f"p50 {p50:.2f} с, p90 {p90:.2f} с, p99 {p99:.2f} с"
+        )
+
+    def handle(self, *args, **options):
+        if options["reset"]:
+            reset_metrics()
+            self.stdout.write(self.style.SUCCESS("Метрики удалены"))
+            return
+
+        loaded = load_metrics()
+
+        lateness = loaded[REMINDER_LATENESS]
+        for labels, snapshot in sorted(lateness.items()):
+            self.write_histogram(f"Опоздание {{{labels}}}", snapshot)
+        total = merge_series(lateness, REMINDER_LATENESS.buckets)
+        self.write_histogram("Опоздание (всего)", total)
+        self.write_histogram(
+            "Ожидание в очереди после ETA",
+            merge_series(
+                loaded[REMINDER_QUEUE_WAIT],
+                REMINDER_QUEUE_WAIT.buckets,
+            ),
+        )
+        self.write_histogram(
+            "Время ответа Telegram API",
+            merge_series(
+                loaded[TELEGRAM_API_LATENCY],
+                TELEGRAM_API_LATENCY.buckets,
+            ),
+        )
+
+        skipped = sum(loaded[REMINDERS_SKIPPED].values())
+        self.stdout.write(f"Устаревших сообщений Celery: {skipped}")
+        for title, metric in (
+            ("Доставка сообщений", TELEGRAM_MESSAGES),
+            ("Ответы Telegram API", TELEGRAM_RESPONSES),
+        ):
+            counters = ", ".join(
+                f"{labels}: {value}"
+                for labels, value in sorted(loaded[metric].items())
+            )
+            self.stdout.write(f"{title}: {counters or 'нет данных'}")
+
+        per_minute = get_sent_per_minute(options["minutes"])
+        self.stdout.write(
+            f"Напоминаний в минуту за {options['minutes']} мин: "
+            f"среднее {sum(per_minute) / len(per_minute):.1f}, "
+            f"максимум {max(per_minute)}, "
+            f"последняя минута {per_minute[-1]}"
+        )
+
+        within = total.fraction_within(options["slo_seconds"])
+        if within is None:
+            self.stdout.write("SLO опоздания: нет данных")
+            return
+
+        summary = (
+            f"SLO опоздания: {within:.2%} напоминаний не позже "
+            f"{options['slo_seconds']:g} с при цели "
+            f"{options['slo_target']:.2%}"
+        )
+        if within < options["slo_target"]:
+            raise CommandError(f"{summary} - нарушен")
+        self.stdout.write(self.style.SUCCESS(f"{summary} - выполнен"))
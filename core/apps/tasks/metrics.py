@@ -0,0 +1,398 @@
+"""
+Документация:
+https://prometheus.io/docs/instrumenting/exposition_formats/#text-based-format
+https://prometheus.io/docs/practices/histograms/
+https://redis.io/docs/latest/develop/use/pipelining/
+
+Метрики доставки напоминаний: опоздание относительно end_date
+(у напоминаний до срока - относительно их момента отправки),
+ожидание сообщения Celery в очереди после ETA, время ответа
+Telegram API, коды ответов и число отправленных напоминаний
+по минутам.
+
+Значения хранятся в Redis и общие для всех воркеров Celery
+и процессов Django. Счетчики и гистограммы с фиксированными
+границами - поля хэша на метрику, наблюдения одной отправки
+записываются одним пайплайном. Prometheus забирает их
+с GET /api/metrics/, сводку печатает команда reminder_metrics.
+"""
+
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import redis
+from django.conf import settings
+from django.utils import timezone
+
+from .constants import (
+    LOG_METRICS_REDIS_ERROR,
+    METRICS_LATENESS_BUCKETS,
+    METRICS_LATENCY_BUCKETS,
+    METRICS_MINUTES_TTL,
+    METRICS_QUEUE_WAIT_BUCKETS,
+)
+from .utils import get_redis_client
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@dataclass(frozen=True)
+class Metric:
+    """Счетчик (buckets пусто) или гистограмма с границами buckets."""
+
+    name: str
+    help: str
+    buckets: tuple = ()
+
+    @property
+    def type(self) -> str:
+        return "histogram" if self.buckets else "counter"
+
+
+REMINDER_LATENESS = Metric(
+    "reminder_lateness_seconds",
+    "Опоздание напоминания: отправка минус срок задачи",
+    METRICS_LATENESS_BUCKETS,
+)
+REMINDER_QUEUE_WAIT = Metric(
+    "reminder_queue_wait_seconds",
+    "Ожидание сообщения Celery от ETA до начала выполнения",
+    METRICS_QUEUE_WAIT_BUCKETS,
+)
+TELEGRAM_API_LATENCY = Metric(
+    "telegram_api_latency_seconds",
+    "Время ответа sendMessage на доставленные сообщения",
+    METRICS_LATENCY_BUCKETS,
+)
+REMINDERS_SENT = Metric(
+    "reminders_sent_total",
+    "Напоминания о задачах, переданные на доставку",
+)
+REMINDERS_SKIPPED = Metric(
+    "reminders_skipped_total",
+    "Сообщения Celery без напоминания: версия устарела или уже отправлено",
+)
+TELEGRAM_RESPONSES = Metric(
+    "telegram_responses_total",
+    "Ответы Telegram API по коду (error - сетевая ошибка)",
+)
+TELEGRAM_MESSAGES = Metric(
+    "telegram_messages_total",
+    "Итог доставки сообщений: sent или failed",
+)
+
+METRICS = (
+    REMINDER_LATENESS,
+    REMINDER_QUEUE_WAIT,
+    TELEGRAM_API_LATENCY,
+    REMINDERS_SENT,
+    REMINDERS_SKIPPED,
+    TELEGRAM_RESPONSES,
+    TELEGRAM_MESSAGES,
+)
+
+
+def get_metric_key(metric: Metric) -> str:
+    """Ключ хэша метрики в Redis."""
+
+    return f"{settings.METRICS_KEY_PREFIX}:{metric.name}"
+
+
+def get_minute_key(minute: int) -> str:
+    """Ключ счетчика напоминаний за минуту (unix-время / 60)."""
+
+    return f"{settings.METRICS_KEY_PREFIX}:reminders_sent:{minute}"
+
+
+def format_labels(labels: dict | None) -> str:
+    """Метки в синтаксисе Prometheus: code="200",mode="eta"."""
+
+    return ",".join(
+        f'{name}="{value}"' for name, value in sorted((labels or {}).items())
+    )
+
+
+class MetricsRecorder:
+    """
+    Наблюдения, накопленные в памяти до flush(): запись в Redis
+    одним пайплайном без ожидания ответа на каждую команду.
+    """
+
+    def __init__(self):
+        self.increments = Counter()
+        self.sums = Counter()
+        self.minutes = Counter()
+
+    def inc(self, metric: Metric, labels: dict | None = None, amount=1):
+        self.increments[(metric, format_labels(labels))] += amount
+        if metric is REMINDERS_SENT:
+            self.minutes[int(time.time() // 60)] += amount
+
+    def observe(self, metric: Metric, value: float, labels=None):
+        series = format_labels(labels)
+        # Поле - номер корзины (не накопительно), len(buckets) - +Inf
+        bucket = bisect_left(metric.buckets, value)
+        self.increments[(metric, f"{series}|{bucket}")] += 1
+        self.increments[(metric, f"{series}|count")] += 1
+        self.sums[(metric, f"{series}|sum")] += value
+
+    def flush(self) -> None:
+        """
+        Записывает наблюдения. Метрики не должны мешать доставке:
+        при недоступности Redis наблюдения теряются (fail open).
+        """
+
+        if not self.increments:
+            return
+
+        pipeline = get_redis_client().pipeline(transaction=False)
+        for (metric, field_name), amount in self.increments.items():
+            pipeline.hincrby(get_metric_key(metric), field_name, amount)
+        for (metric, field_name), amount in self.sums.items():
+            pipeline.hincrbyfloat(get_metric_key(metric), field_name, amount)
+        for minute, amount in self.minutes.items():
+            pipeline.incrby(get_minute_key(minute), amount)
+            pipeline.expire(get_minute_key(minute), METRICS_MINUTES_TTL)
+
+        try:
+            pipeline.execute()
+        except redis.RedisError as e:
+            print(LOG_METRICS_REDIS_ERROR.format(e))
+        self.increments.clear()
+        self.sums.clear()
+        self.minutes.clear()
+
+
+@contextmanager
+def record_metrics():
+    """
+    Использование:
+    with record_metrics() as metrics:
+        metrics.observe(REMINDER_LATENESS, 1.5, {"mode": "eta"})
+    """
+
+    recorder = MetricsRecorder()
+    yield recorder
+    recorder.flush()
+
+
+def record_reminder_delivery(
+    metrics: MetricsRecorder,
+    tasks: list,
+    mode: str,
+    eta: str | datetime | None = None,
+    started: datetime | None = None,
+) -> None:
+    """
+    Опоздание каждого напоминания относительно end_date задачи и,
+    для сообщения Celery с ETA, его ожидание в очереди: от ETA
+    до started (начала выполнения).
+    """
+
+    now = timezone.now()
+    labels = {"mode": mode}
+    for task in tasks:
+        # Задачи, объединенные с более ранней, уходят до своего срока
+        lateness = max((now - task.end_date).total_seconds(), 0.0)
+        metrics.observe(REMINDER_LATENESS, lateness, labels)
+    metrics.inc(REMINDERS_SENT, labels, len(tasks))
+
+    if isinstance(eta, str):
+        eta = datetime.fromisoformat(eta)
+    if eta is not None and started is not None:
+        wait = max((started - eta).total_seconds(), 0.0)
+        metrics.observe(REMINDER_QUEUE_WAIT, wait)
+
+
+def record_offset_reminder_delivery(
+    metrics: MetricsRecorder,
+    reminders: list,
+    mode: str,
+) -> None:
+    """
+    Опоздание напоминаний до срока (DueOffsetReminder) относительно
+    их собственного момента отправки, а не end_date задачи.
+    """
+
+    now = timezone.now()
+    labels = {"mode": mode}
+    for reminder in reminders:
+        lateness = max((now - reminder.fire_at).total_seconds(), 0.0)
+        metrics.observe(REMINDER_LATENESS, lateness, labels)
+    metrics.inc(REMINDERS_SENT, labels, len(reminders))
+
+
+@dataclass
+class HistogramSnapshot:
+    """Накопленные значения гистограммы (одной серии или суммы серий)."""
+
+    buckets: tuple
+    counts: list = field(default_factory=list)
+    count: int = 0
+    sum: float = 0.0
+
+    def __post_init__(self):
+        if not self.counts:
+            self.counts = [0] * (len(self.buckets) + 1)
+
+    def add(self, other: "HistogramSnapshot") -> None:
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.sum += other.sum
+
+    def get_cumulative(self) -> list[int]:
+        cumulative, total = [], 0
+        for count in self.counts:
+            total += count
+            cumulative.append(total)
+        return cumulative
+
+    def get_bucket_bounds(self, index: int) -> tuple[float, float]:
+        lower = self.buckets[index - 1] if index else 0.0
+        return lower, self.buckets[index]
+
+    def quantile(self, q: float) -> float | None:
+        """
+        Оценка квантиля по корзинам, как histogram_quantile
+        в Prometheus: линейно внутри корзины.
+        """
+
+        if not self.count:
+            return None
+
+        rank = q * self.count
+        previous = 0
+        for index, cumulative in enumerate(self.get_cumulative()):
+            if cumulative >= rank and self.counts[index]:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                lower, upper = self.get_bucket_bounds(index)
+                share = (rank - previous) / self.counts[index]
+                return lower + (upper - lower) * share
+            previous = cumulative
+        return self.buckets[-1]
+
+    def fraction_within(self, threshold: float) -> float | None:
+        """Доля наблюдений не больше threshold (оценка по корзинам)."""
+
+        if not self.count:
+            return None
+
+        within = 0.0
+        for index, count in enumerate(self.counts):
+            if index == len(self.buckets):
+                break
+            lower, upper = self.get_bucket_bounds(index)
+            if upper <= threshold:
+                within += count
+            elif lower < threshold:
+                within += count * (threshold - lower) / (upper - lower)
+        return within / self.count
+
+
+def load_metrics() -> dict[Metric, dict]:
+    """
+    Все метрики из Redis одним пайплайном.
+
+    Счетчик - {метки: значение}, гистограмма - {метки: HistogramSnapshot}.
+    """
+
+    pipeline = get_redis_client().pipeline(transaction=False)
+    for metric in METRICS:
+        pipeline.hgetall(get_metric_key(metric))
+
+    loaded = {}
+    for metric, values in zip(METRICS, pipeline.execute()):
+        series = {}
+        for raw_field, raw_value in values.items():
+            field_name = raw_field.decode()
+            if not metric.buckets:
+                series[field_name] = int(raw_value)
+                continue
+
+            labels, part = field_name.rsplit("|", 1)
+            snapshot = series.setdefault(
+                labels,
+                HistogramSnapshot(metric.buckets),
+            )
+            if part == "sum":
+                snapshot.sum = float(raw_value)
+            elif part == "count":
+                snapshot.count = int(raw_value)
+            else:
+                snapshot.counts[int(part)] = int(raw_value)
+        loaded[metric] = series
+    return loaded
+
+
+def merge_series(series: dict, buckets: tuple) -> HistogramSnapshot:
+    """Сумма всех серий гистограммы (например, режимов eta и sweep)."""
+
+    total = HistogramSnapshot(buckets)
+    for snapshot in series.values():
+        total.add(snapshot)
+    return total
+
+
+def get_sent_per_minute(minutes: int) -> list[int]:
+    """Напоминаний за каждую из последних minutes минут, по порядку."""
+
+    current = int(time.time() // 60)
+    keys = [
+        get_minute_key(minute)
+        for minute in range(current - minutes + 1, current + 1)
+    ]
+    return [int(value or 0) for value in get_redis_client().mget(keys)]
+
+
+def reset_metrics() -> None:
+    """Удаляет все накопленные метрики."""
+
+    client = get_redis_client()
+    keys = [get_metric_key(metric) for metric in METRICS]
+    keys += client.scan_iter(match=get_minute_key("*"), count=1000)
+    client.delete(*keys)
+
+
+def join_labels(*parts: str) -> str:
+    labels = ",".join(part for part in parts if part)
+    return f"{{{labels}}}" if labels else ""
+
+
+def format_bound(bound: float) -> str:
+    return f"{bound:g}"
+
+
+def render_metrics() -> str:
+    """Метрики в текстовом формате Prometheus."""
+
+    lines = []
+    for metric, series in load_metrics().items():
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+
+        for labels, value in sorted(series.items()):
+            if not metric.buckets:
+                lines.append(f"{metric.name}{join_labels(labels)} {value}")
+                continue
+
+            bounds = [format_bound(bound) for bound in metric.buckets]
+            for bound, cumulative in zip(
+                bounds + ["+Inf"],
+                value.get_cumulative(),
+            ):
+                bucket_labels = join_labels(labels, f'le="{bound}"')
+                lines.append(
+                    f"{metric.name}_bucket{bucket_labels} {cumulative}"
+                )
+            lines.append(
+                f"{metric.name}_sum{join_labels(labels)} {value.sum}"
+            )
+            lines.append(
+                f"{metric.name}_count{join_labels(labels)} {value.count}"
+            )
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:56
+
+import core.apps.tasks.utils
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0004_task_user_end_date_idx'),
+    ]
+
+    # Существующие строки сохраняют свои ID (формат тот же -
+    # 16 hex-символов), новые создаются generate_time_ordered_id.
+    # Последовательность раздает процессам номера узлов 0..1023.
+    operations = [
+        migrations.RunSQL(
+            sql="CREATE SEQUENCE IF NOT EXISTS tasks_id_node_seq "
+            "MINVALUE 0 MAXVALUE 1023 START 0 CYCLE",
+            reverse_sql="DROP SEQUENCE IF EXISTS tasks_id_node_seq",
+        ),
+        migrations.AlterField(
+            model_name='category',
+            name='id',
+            field=models.CharField(default=core.apps.tasks.utils.generate_time_ordered_id, editable=False, max_length=16, primary_key=True, serialize=False, verbose_name='ID'),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='id',
+            field=models.CharField(default=core.apps.tasks.utils.generate_time_ordered_id, editable=False, max_length=16, primary_key=True, serialize=False, verbose_name='ID'),
+        ),
+    ]
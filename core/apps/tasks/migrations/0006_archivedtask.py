@@ -0,0 +1,52 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:58
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0005_time_ordered_ids'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedTask',
+            fields=[
+                ('id', models.CharField(editable=False, max_length=16, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=128, verbose_name='Название')),
+                ('description', models.TextField(verbose_name='Описание')),
+                ('creation_date', models.DateTimeField(verbose_name='Дата создания')),
+                ('end_date', models.DateTimeField(verbose_name='Дата завершения')),
+                ('reminder_sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Напоминание отправлено')),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Дата архивации')),
+            ],
+            options={
+                'verbose_name': 'Архивную задачу',
+                'verbose_name_plural': 'Архив задач',
+                'ordering': ('-end_date',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['end_date', 'id'], name='task_end_date_id_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedtask',
+            name='category',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_tasks', to='tasks.category', verbose_name='Категория'),
+        ),
+        migrations.AddField(
+            model_name='archivedtask',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_tasks', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedtask',
+            index=models.Index(fields=['user', 'end_date'], name='archivedtask_user_end_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0006_archivedtask'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedtask',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Дата выполнения'),
+        ),
+        migrations.AddField(
+            model_name='archivedtask',
+            name='status',
+            field=models.CharField(choices=[('open', 'Открыта'), ('done', 'Выполнена'), ('cancelled', 'Отменена')], default='open', max_length=16, verbose_name='Статус'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Дата выполнения'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='status',
+            field=models.CharField(choices=[('open', 'Открыта'), ('done', 'Выполнена'), ('cancelled', 'Отменена')], default='open', max_length=16, verbose_name='Статус'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('status', 'open')), fields=['user', 'end_date'], name='task_open_user_end_date_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:17
+
+import datetime
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('tasks', '0008_task_reminder_due_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AgendaSubscription',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='agenda_subscription', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+                ('send_at', models.TimeField(default=datetime.time(8, 0), verbose_name='Время отправки (МСК)')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Включена')),
+                ('last_sent_on', models.DateField(blank=True, null=True, verbose_name='Дата последней сводки')),
+            ],
+            options={
+                'verbose_name': 'Подписку на сводку',
+                'verbose_name_plural': 'Подписки на сводку',
+                'indexes': [models.Index(condition=models.Q(('is_active', True)), fields=['user', 'send_at'], name='agenda_active_user_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0009_agendasubscription'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='reminder_version',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Версия напоминания'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0010_task_reminder_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='reminder_scheduled_for',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Напоминание запланировано на'),
+        ),
+    ]
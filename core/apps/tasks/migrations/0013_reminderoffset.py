@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0012_outboxevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReminderOffset',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('offset_minutes', models.PositiveIntegerField(verbose_name='За сколько минут до срока')),
+                ('next_fire_at', models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Напомнить в')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminder_offsets', to='tasks.task', verbose_name='Задача')),
+            ],
+            options={
+                'verbose_name': 'Напоминание до срока',
+                'verbose_name_plural': 'Напоминания до срока',
+                'ordering': ('task', '-offset_minutes'),
+                'indexes': [models.Index(condition=models.Q(('next_fire_at__isnull', False)), fields=['next_fire_at'], name='reminderoffset_next_fire_idx')],
+                'constraints': [models.UniqueConstraint(fields=('task', 'offset_minutes'), name='reminderoffset_task_offset_uniq')],
+            },
+        ),
+    ]
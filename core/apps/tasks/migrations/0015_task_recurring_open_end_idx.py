@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0014_task_recurrence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('status', 'open'), models.Q(('recurrence', ''), _negated=True)), fields=['end_date'], name='task_recurring_open_end_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:22
+
+import core.apps.tasks.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0015_task_recurring_open_end_idx'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='task',
+            managers=[
+                ('objects', core.apps.tasks.models.TaskManager()),
+            ],
+        ),
+    ]
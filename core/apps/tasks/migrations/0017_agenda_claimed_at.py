@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0016_task_manager'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='agendasubscription',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Захвачена для отправки'),
+        ),
+    ]
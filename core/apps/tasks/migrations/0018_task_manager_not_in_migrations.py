@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:10
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0017_agenda_claimed_at'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='task',
+            managers=[
+            ],
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:05
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0018_task_manager_not_in_migrations'),
+    ]
+
+    # Номера узлов генератора ID теперь раздает счетчик в Redis
+    # (core.apps.tasks.utils.allocate_id_node)
+    operations = [
+        migrations.RunSQL(
+            sql="DROP SEQUENCE IF EXISTS tasks_id_node_seq",
+            reverse_sql="CREATE SEQUENCE IF NOT EXISTS tasks_id_node_seq "
+            "MINVALUE 0 MAXVALUE 1023 START 0 CYCLE",
+        ),
+    ]
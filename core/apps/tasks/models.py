@@ -4,10 +4,14 @@ https://docs.djangoproject.com/en/5.2/topics/db/models/
 """
 
 from django.contrib.auth.models import User
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db import DatabaseError, models, transaction
+from django.db.models.functions import Now
 from django.utils import timezone
 
-from .utils import generate_content_based_id
+from .constants import AGENDA_DEFAULT_SEND_AT, SEARCH_CONFIG
+from .utils import generate_time_ordered_id
 
 
 class Category(models.Model):
@@ -17,7 +21,7 @@ class Category(models.Model):
         primary_key=True,
         max_length=16,
         editable=False,
-        default=generate_content_based_id,
+        default=generate_time_ordered_id,
         verbose_name="ID",
     )
     creation_date = models.DateTimeField(
@@ -42,14 +46,98 @@ class Category(models.Model):
         return self.name
 
 
+class TaskQuerySet(models.QuerySet):
+    """
+    Пакетные записи задач с планированием напоминаний.
+
+    update, bulk_create и bulk_update не вызывают post_save, поэтому
+    напоминания затронутых задач перепланируются здесь: версии и
+    события outbox (OutboxEvent) - одним запросом в той же транзакции,
+    в брокер их публикует relay_outbox. bulk_update выполняет пачки
+    через update, отдельно его переопределять не нужно. Записи,
+    не меняющие срок, статус или владельца (в том числе
+    reminder_sent_at), выполняются как обычно.
+    """
+
+    # Импорт внутри методов: reminders и signals сами импортируют модели
+
+    def touches_reminder(self, names) -> bool:
+        """Меняет ли запись срок, статус или владельца задачи."""
+
+        attnames = {self.model._meta.get_field(name).attname for name in names}
+        return bool(attnames & Task.REMINDER_FIELDS)
+
+    def update(self, **kwargs):
+        if not self.touches_reminder(kwargs):
+            return super().update(**kwargs)
+
+        from .reminders import bump_reminder_versions
+
+        # ПК подходящих задач читаются с блокировкой строк (FOR UPDATE),
+        # и UPDATE затрагивает ровно их: до конца транзакции строки
+        # не изменит и не удалит параллельный запрос
+        with transaction.atomic(using=self.db):
+            task_pks = list(
+                self.select_for_update(of=("self",)).values_list(
+                    "pk",
+                    flat=True,
+                )
+            )
+            if not task_pks:
+                return 0
+            updated = (
+                self.model._base_manager.using(self.db)
+                .filter(pk__in=task_pks)
+                .update(**kwargs)
+            )
+            bump_reminder_versions(task_pks)
+        return updated
+
+    update.alters_data = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        from .outbox import add_reminder_events
+        from .signals import set_bulk_reminder_schedule
+
+        objs = list(objs)
+        rows = set_bulk_reminder_schedule(objs)
+        with transaction.atomic(using=self.db, savepoint=False):
+            created = super().bulk_create(objs, *args, **kwargs)
+            add_reminder_events(rows, using=self.db)
+        return created
+
+    bulk_create.alters_data = True
+
+
+class TaskManager(models.Manager.from_queryset(TaskQuerySet)):
+    """
+    Менеджер задач.
+
+    Историческим моделям в миграциях он недоступен: SQL напоминаний
+    (reminders.py) рассчитан на текущую схему. Миграция данных,
+    меняющая срок, статус или владельца задач, перепланирует их
+    напоминания явно: bump_reminder_versions(task_pks).
+    """
+
+
 class Task(models.Model):
     """Задача."""
 
+    class Status(models.TextChoices):
+        OPEN = "open", "Открыта"
+        DONE = "done", "Выполнена"
+        CANCELLED = "cancelled", "Отменена"
+
+    class Recurrence(models.TextChoices):
+        DAILY = "daily", "Каждый день"
+        WEEKLY = "weekly", "Каждую неделю"
+        MONTHLY = "monthly", "Каждый месяц"
+
     id = models.CharField(
         primary_key=True,
         max_length=16,
         editable=False,
-        default=generate_content_based_id,
+        default=generate_time_ordered_id,
         verbose_name="ID",
     )
     name = models.CharField(
@@ -75,6 +163,42 @@ class Task(models.Model):
         db_index=True,
         verbose_name="Напоминание отправлено",
     )
+    # Увеличивается при изменении срока, статуса или владельца:
+    # напоминание Celery с другой версией устарело и ничего не отправит
+    reminder_version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Версия напоминания",
+    )
+    # Срок сообщения Celery текущей версии (режим eta), NULL - сообщение
+    # не ставилось. Хранится в БД, а не в кэше: вытеснение ключей Redis
+    # не теряет состояние напоминаний
+    reminder_scheduled_for = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Напоминание запланировано на",
+    )
+    status = models.CharField(
+        max_length=16,
+        choices=Status.choices,
+        default=Status.OPEN,
+        verbose_name="Статус",
+    )
+    completed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Дата выполнения",
+    )
+    # Правило повтора: end_date - текущее вхождение, следующие
+    # не хранятся, а вычисляются (recurrence.py). Пустое - без повтора
+    recurrence = models.CharField(
+        max_length=16,
+        choices=Recurrence.choices,
+        blank=True,
+        default="",
+        verbose_name="Повтор",
+    )
     category = models.ForeignKey(
         Category,
         verbose_name="Категория",
@@ -91,14 +215,235 @@ class Task(models.Model):
         # жесткая привязка к пользователю
         on_delete=models.CASCADE,
     )
+    # Поисковый вектор поддерживается самой PostgreSQL:
+    # пересчитывается при каждом INSERT/UPDATE названия или описания
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector("name", weight="A", config=SEARCH_CONFIG)
+            + SearchVector("description", weight="B", config=SEARCH_CONFIG)
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+        verbose_name="Поисковый вектор",
+    )
+
+    objects = TaskManager()
 
     class Meta:
         verbose_name = "Задачу"
         verbose_name_plural = "Задачи"
         ordering = ("-creation_date",)
+        indexes = [
+            # Фильтры по сроку (сегодня, просроченные, ближайшие N дней)
+            models.Index(
+                fields=["user", "end_date"],
+                name="task_user_end_date_idx",
+            ),
+            # Списки по умолчанию: только открытые задачи пользователя.
+            # Частичный индекс не содержит выполненных и отмененных
+            models.Index(
+                fields=["user", "end_date"],
+                condition=models.Q(status="open"),
+                name="task_open_user_end_date_idx",
+            ),
+            # Режим напоминаний sweep: только еще не напомненные
+            # открытые задачи, индекс не растет вместе с историей
+            models.Index(
+                fields=["end_date"],
+                condition=models.Q(
+                    status="open",
+                    reminder_sent_at__isnull=True,
+                ),
+                name="task_reminder_due_idx",
+            ),
+            # Перенос пропущенных вхождений повторяющихся задач
+            models.Index(
+                fields=["end_date"],
+                condition=models.Q(status="open") & ~models.Q(recurrence=""),
+                name="task_recurring_open_end_idx",
+            ),
+            # Архивация: обход просроченных задач по ключу (end_date, id)
+            models.Index(
+                fields=["end_date", "id"],
+                name="task_end_date_id_idx",
+            ),
+            # Полнотекстовый поиск по названию и описанию
+            GinIndex(
+                fields=["search_vector"],
+                name="task_search_vector_gin",
+            ),
+        ]
+
+    # Изменение этих полей перепланирует напоминание
+    REMINDER_FIELDS = frozenset({"end_date", "status", "user_id"})
+    # От этих полей зависит кэш статистики владельца
+    STATS_FIELDS = REMINDER_FIELDS | {"category_id", "reminder_sent_at"}
+    # Состояние напоминания меняют только запросы из reminders.py
+    REMINDER_STATE_FIELDS = frozenset(
+        {"reminder_version", "reminder_scheduled_for"}
+    )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Значения на момент загрузки: по ним get_changed_fields
+        # определяет, что изменилось (отложенные поля не отслеживаются)
+        instance._loaded_values = {
+            name: value
+            for name, value in zip(field_names, values)
+            if value is not models.DEFERRED
+        }
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        """
+        Перечитанные из БД значения - новая точка отсчета изменений:
+        иначе get_changed_fields сравнивал бы их со значениями
+        первой загрузки.
+        """
+
+        deferred = self.get_deferred_fields()
+        super().refresh_from_db(
+            using=using,
+            fields=fields,
+            from_queryset=from_queryset,
+        )
+
+        if fields is None:
+            refreshed = {
+                field.attname
+                for field in self._meta.concrete_fields
+                if field.attname not in deferred
+            }
+        else:
+            refreshed = {
+                field.attname
+                for field in self._meta.concrete_fields
+                if field.attname in fields or field.name in fields
+            }
+        if not hasattr(self, "_loaded_values"):
+            self._loaded_values = {}
+        self._loaded_values.update(
+            (attname, getattr(self, attname)) for attname in refreshed
+        )
+
+    @classmethod
+    def get_saved_fields(cls) -> list[str]:
+        """
+        attname полей, которые отслеживает и записывает save().
+
+        Состояние напоминания меняет только bump_reminder_version
+        (UPDATE ... RETURNING): save() не перезаписывает его значением,
+        прочитанным до параллельного изменения.
+        """
+
+        return [
+            field.attname
+            for field in cls._meta.concrete_fields
+            if not field.primary_key
+            and not field.generated
+            and field.name not in cls.REMINDER_STATE_FIELDS
+        ]
+
+    def get_changed_fields(self) -> set[str]:
+        """
+        attname полей, измененных с загрузки из БД или последнего save().
+        У еще не сохраненной задачи изменены все поля.
+
+        В сигнале post_save возвращает поля, измененные этим save().
+        """
+
+        loaded = getattr(self, "_loaded_values", None)
+        if loaded is None:
+            return set(self.get_saved_fields())
+
+        return {
+            attname
+            for attname in self.get_saved_fields()
+            if attname in loaded and getattr(self, attname) != loaded[attname]
+        }
+
+    def get_loaded_value(self, attname: str):
+        """Значение поля на момент загрузки или последнего save()."""
+
+        return getattr(self, "_loaded_values", {}).get(attname)
 
     def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
+        # Выполненное вхождение повторяющейся задачи: задача остается
+        # открытой со сроком следующего вхождения, напоминание
+        # перепланирует post_save
+        if self.recurrence and self.status == self.Status.DONE:
+            from .recurrence import get_next_occurrence
+
+            self.end_date = get_next_occurrence(self, timezone.now())
+            self.status = self.Status.OPEN
+
+        # Дата выполнения проставляется при закрытии задачи
+        # и сбрасывается, если задачу снова открыли
+        if self.status == self.Status.OPEN:
+            self.completed_at = None
+        elif self.completed_at is None:
+            self.completed_at = timezone.now()
+
+        # UPDATE записывает только измененные поля: устаревший экземпляр
+        # не затирает чужие правки, а save() без изменений не делает
+        # запросов и не вызывает сигналов. Только у загруженной из БД
+        # задачи и только если вызывающий не передал update_fields
+        deferred = self.get_deferred_fields()
+        narrowed = (
+            not self._state.adding
+            and kwargs.get("update_fields") is None
+            and hasattr(self, "_loaded_values")
+        )
+        if narrowed:
+            kwargs["update_fields"] = self.get_changed_fields() - deferred
+
+        # post_save выполняется внутри save(): событие outbox попадает
+        # в ту же транзакцию, что и сама задача. savepoint=False - без
+        # лишних SAVEPOINT, если транзакция уже открыта
+        using = kwargs.get("using")
+        with transaction.atomic(using=using, savepoint=False):
+            if narrowed and kwargs["update_fields"]:
+                self.save_narrowed(using, *args, **kwargs)
+            else:
+                super().save(*args, **kwargs)
+
+        # Сохраненные значения - новая точка отсчета изменений
+        update_fields = kwargs.get("update_fields")
+        saved = (
+            self.get_saved_fields()
+            if update_fields is None
+            else [self._meta.get_field(name).attname for name in update_fields]
+        )
+        if not hasattr(self, "_loaded_values"):
+            self._loaded_values = {}
+        self._loaded_values.update(
+            (attname, getattr(self, attname))
+            for attname in saved
+            if attname not in deferred
+        )
+
+    def save_narrowed(self, using, *args, **kwargs) -> None:
+        """
+        save() с update_fields, вычисленными по изменениям.
+
+        Если строку задачи успели удалить, Django не находит ее для
+        UPDATE и бросает DatabaseError (без исключения драйвера
+        в __cause__: запрос к БД выполнен успешно). Тогда, как при
+        обычном save(), задача сохраняется целиком: UPDATE, а за ним
+        INSERT. Отметку отката, которую save_base ставит транзакции
+        при этой ошибке, снимаем, если ее не было до вызова.
+        """
+
+        needs_rollback = transaction.get_rollback(using=using)
+        try:
+            super().save(*args, **kwargs)
+        except DatabaseError as e:
+            if type(e) is not DatabaseError or e.__cause__ is not None:
+                raise
+            transaction.set_rollback(needs_rollback, using=using)
+            kwargs.pop("update_fields")
+            super().save(*args, **kwargs)
 
     def __str__(self):
         """
@@ -108,3 +453,218 @@ class Task(models.Model):
         Пример: "Завершить ТЗ до 18:00, 15.10.2025"
         """
         return f'{self.name} до {self.end_date.strftime("%H:%M, %d.%m.%Y")}'
+
+
+class ReminderOffset(models.Model):
+    """
+    Напоминание за offset_minutes минут до срока задачи
+    (например, за день и за час) в дополнение к напоминанию в срок.
+
+    next_fire_at - когда напомнить; NULL - напоминание отправлено или
+    не нужно (задача закрыта, момент уже прошел). Пересчитывается тем
+    же запросом, что увеличивает версию напоминания задачи
+    (reminders.py), а отправляет send_offset_reminders по одному
+    индексу для напоминаний с любым отступом: сообщений в брокере
+    на задачу от их числа не прибавляется.
+    """
+
+    task = models.ForeignKey(
+        Task,
+        verbose_name="Задача",
+        related_name="reminder_offsets",
+        on_delete=models.CASCADE,
+    )
+    offset_minutes = models.PositiveIntegerField(
+        verbose_name="За сколько минут до срока",
+    )
+    next_fire_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Напомнить в",
+    )
+
+    class Meta:
+        verbose_name = "Напоминание до срока"
+        verbose_name_plural = "Напоминания до срока"
+        ordering = ("task", "-offset_minutes")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["task", "offset_minutes"],
+                name="reminderoffset_task_offset_uniq",
+            ),
+        ]
+        indexes = [
+            # Выборка наступивших напоминаний: только ожидающие,
+            # отправленные из индекса выпадают
+            models.Index(
+                fields=["next_fire_at"],
+                condition=models.Q(next_fire_at__isnull=False),
+                name="reminderoffset_next_fire_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.task.name}: за {self.offset_minutes} мин"
+
+
+class ArchivedTask(models.Model):
+    """
+    Задача, перенесенная в архив после окончания срока хранения.
+
+    Архив читается только по запросу (GET /api/tasks/archived/),
+    поэтому рабочая таблица задач не растет бесконечно.
+    """
+
+    id = models.CharField(
+        primary_key=True,
+        max_length=16,
+        editable=False,
+        verbose_name="ID",
+    )
+    # Название уникально только среди активных задач
+    name = models.CharField(
+        verbose_name="Название",
+        max_length=128,
+    )
+    description = models.TextField(
+        verbose_name="Описание",
+    )
+    creation_date = models.DateTimeField(
+        verbose_name="Дата создания",
+    )
+    end_date = models.DateTimeField(
+        verbose_name="Дата завершения",
+    )
+    reminder_sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Напоминание отправлено",
+    )
+    status = models.CharField(
+        max_length=16,
+        choices=Task.Status.choices,
+        default=Task.Status.OPEN,
+        verbose_name="Статус",
+    )
+    completed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Дата выполнения",
+    )
+    archived_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="Дата архивации",
+    )
+    category = models.ForeignKey(
+        Category,
+        verbose_name="Категория",
+        related_name="archived_tasks",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    user = models.ForeignKey(
+        User,
+        verbose_name="Пользователь",
+        related_name="archived_tasks",
+        on_delete=models.CASCADE,
+    )
+
+    class Meta:
+        verbose_name = "Архивную задачу"
+        verbose_name_plural = "Архив задач"
+        ordering = ("-end_date",)
+        indexes = [
+            models.Index(
+                fields=["user", "end_date"],
+                name="archivedtask_user_end_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.name} до {self.end_date.strftime("%H:%M, %d.%m.%Y")}'
+
+
+class AgendaSubscription(models.Model):
+    """Подписка пользователя на утреннюю сводку задач."""
+
+    user = models.OneToOneField(
+        User,
+        primary_key=True,
+        verbose_name="Пользователь",
+        related_name="agenda_subscription",
+        on_delete=models.CASCADE,
+    )
+    send_at = models.TimeField(
+        default=AGENDA_DEFAULT_SEND_AT,
+        verbose_name="Время отправки (МСК)",
+    )
+    is_active = models.BooleanField(
+        default=True,
+        verbose_name="Включена",
+    )
+    last_sent_on = models.DateField(
+        null=True,
+        blank=True,
+        verbose_name="Дата последней сводки",
+    )
+    claimed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Захвачена для отправки",
+    )
+
+    class Meta:
+        verbose_name = "Подписку на сводку"
+        verbose_name_plural = "Подписки на сводку"
+        indexes = [
+            # Выборка подписок, которым пора отправить сводку:
+            # только включенные, обход по user_id
+            models.Index(
+                fields=["user", "send_at"],
+                condition=models.Q(is_active=True),
+                name="agenda_active_user_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user} в {self.send_at.strftime('%H:%M')}"
+
+
+class OutboxEvent(models.Model):
+    """
+    Побочный эффект изменения задачи (сообщение Celery), записанный
+    в той же транзакции, что и само изменение (transactional outbox).
+
+    relay_outbox публикует события в брокер пачками и удаляет их.
+    Откат транзакции не оставляет сообщений в брокере, а недоступный
+    брокер не ломает запрос: событие дождется следующего прохода.
+    """
+
+    class Kind(models.TextChoices):
+        # payload: task_pk, version, eta (ISO 8601)
+        REMINDER = "reminder", "Напоминание"
+
+    kind = models.CharField(
+        max_length=16,
+        choices=Kind.choices,
+        verbose_name="Тип",
+    )
+    payload = models.JSONField(
+        verbose_name="Данные",
+    )
+    # Значение по умолчанию на стороне БД: события, вставленные
+    # запросами из reminders.py, получают время так же
+    created_at = models.DateTimeField(
+        db_default=Now(),
+        verbose_name="Дата создания",
+    )
+
+    class Meta:
+        verbose_name = "Событие outbox"
+        verbose_name_plural = "Outbox"
+        ordering = ("id",)
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.pk}"
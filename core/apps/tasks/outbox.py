@@ -0,0 +1,189 @@
+"""
+Документация:
+https://microservices.io/patterns/data/transactional-outbox.html
+https://www.postgresql.org/docs/current/sql-select.html#SQL-FOR-UPDATE-SHARE
+
+Transactional outbox: сообщения Celery, вызванные изменением задачи,
+записываются в таблицу OutboxEvent в той же транзакции, что и сама
+задача, а в брокер их публикует relay_outbox_events - пачками,
+вне запроса к API.
+
+Доставка - не менее одного раза: пачка удаляется из outbox в той же
+транзакции, в которой публикуется, и при ошибке брокера остается
+на месте. Повтор после сбоя между публикацией и коммитом безопасен:
+у сообщения тот же ID, а send_task_reminder сверяет версию
+и захватывает напоминание не более одного раза.
+"""
+
+import json
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone as datetime_timezone
+
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from .constants import OUTBOX_RELAY_BATCH_SIZE, OUTBOX_RELAY_MAX_BATCHES
+from .models import OutboxEvent
+from .reminders import get_reminder_task_id
+
+# Забирает из outbox пачку самых старых событий. SKIP LOCKED
+# пропускает пачки, которые публикует параллельный relay.
+# Строки удаляются только при коммите транзакции публикации.
+# MATERIALIZED: подзапрос в IN планировщик может выполнять повторно,
+# и LIMIT с SKIP LOCKED каждый раз находил бы следующие строки -
+# вместо пачки удалился бы весь outbox
+CLAIM_OUTBOX_BATCH_SQL = """
+WITH batch AS MATERIALIZED (
+    SELECT id FROM {outbox_table}
+    ORDER BY id
+    LIMIT %(batch_size)s
+    FOR UPDATE SKIP LOCKED
+)
+DELETE FROM {outbox_table} AS event
+USING batch
+WHERE event.id = batch.id
+RETURNING event.id, event.kind, event.payload::text
+"""
+
+
+@dataclass
+class RelayResult:
+    """Итог прохода relay_outbox_events."""
+
+    published: int = 0
+    batches: int = 0
+    elapsed: float = 0.0
+
+
+def get_reminder_payload(task_pk: str, version: int, eta: datetime) -> dict:
+    """Данные события REMINDER (как в INSERT_REMINDER_EVENTS_SQL)."""
+
+    return {"task_pk": task_pk, "version": version, "eta": eta.isoformat()}
+
+
+def add_reminder_events(rows: list[tuple], using: str | None = None) -> None:
+    """
+    Добавляет события REMINDER для строк (ПК задачи, версия, срок)
+    одним INSERT. Вызывается внутри транзакции изменения задач.
+    """
+
+    if rows:
+        OutboxEvent.objects.using(using).bulk_create(
+            [
+                OutboxEvent(
+                    kind=OutboxEvent.Kind.REMINDER,
+                    payload=get_reminder_payload(*row),
+                )
+                for row in rows
+            ]
+        )
+
+
+def publish_reminders(rows: list[tuple]) -> int:
+    """
+    Ставит сообщения Celery для строк (ПК задачи, версия, срок)
+    через одно соединение с брокером. К БД не обращается, поэтому
+    выполняется и в дочерних процессах reconcile_reminders.
+
+    Возвращает количество поставленных сообщений.
+    """
+
+    # Импорт внутри функции: tasks сам импортирует outbox (relay_outbox)
+    from .tasks import send_task_reminder
+
+    with send_task_reminder.app.producer_or_acquire() as producer:
+        for task_pk, version, eta in rows:
+            send_task_reminder.apply_async(
+                args=(task_pk, version),
+                eta=eta.astimezone(datetime_timezone.utc),
+                task_id=get_reminder_task_id(task_pk, version),
+                producer=producer,
+            )
+    return len(rows)
+
+
+def publish_reminder_events(payloads: list[dict]) -> int:
+    """
+    Публикует события REMINDER. Из событий одной задачи в пачке
+    публикуется только последняя версия: остальные сообщения
+    устарели еще до публикации, а воркер держал бы каждое в памяти
+    до его ETA.
+
+    Возвращает количество поставленных сообщений.
+    """
+
+    latest = {}
+    for payload in payloads:
+        current = latest.get(payload["task_pk"])
+        if current is None or payload["version"] > current["version"]:
+            latest[payload["task_pk"]] = payload
+
+    return publish_reminders(
+        [
+            (
+                payload["task_pk"],
+                payload["version"],
+                parse_datetime(payload["eta"]),
+            )
+            for payload in latest.values()
+        ]
+    )
+
+
+# Публикация событий по типу
+OUTBOX_HANDLERS = {
+    OutboxEvent.Kind.REMINDER: publish_reminder_events,
+}
+
+
+def relay_outbox_batch(batch_size: int) -> int:
+    """
+    Публикует одну пачку событий в порядке их записи и удаляет ее
+    из outbox. Исключение брокера откатывает удаление - события
+    будут опубликованы следующим проходом.
+
+    Возвращает количество опубликованных событий.
+    """
+
+    sql = CLAIM_OUTBOX_BATCH_SQL.format(
+        outbox_table=OutboxEvent._meta.db_table,
+    )
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(sql, {"batch_size": batch_size})
+        events = sorted(cursor.fetchall())
+
+        payloads = {}
+        for _, kind, payload in events:
+            payloads.setdefault(kind, []).append(json.loads(payload))
+        for kind, kind_payloads in payloads.items():
+            OUTBOX_HANDLERS[kind](kind_payloads)
+
+    return len(events)
+
+
+def relay_outbox_events(
+    batch_size: int = OUTBOX_RELAY_BATCH_SIZE,
+    max_batches: int = OUTBOX_RELAY_MAX_BATCHES,
+) -> RelayResult:
+    """
+    Публикует накопившиеся события outbox пачками по batch_size,
+    не больше max_batches пачек за проход.
+    """
+
+    started = time.perf_counter()
+    result = RelayResult()
+
+    for _ in range(max_batches):
+        published = relay_outbox_batch(batch_size)
+        if not published:
+            break
+
+        result.published += published
+        result.batches += 1
+        if published < batch_size:
+            break
+
+    result.elapsed = time.perf_counter() - started
+    return result
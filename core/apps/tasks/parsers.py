@@ -0,0 +1,15 @@
+"""
+Документация:
+https://www.django-rest-framework.org/api-guide/parsers/#custom-parsers
+"""
+
+from rest_framework.parsers import BaseParser
+
+
+class CSVTextParser(BaseParser):
+    """Принимает тело запроса text/csv как строку."""
+
+    media_type = "text/csv"
+
+    def parse(self, stream, media_type=None, parser_context=None) -> str:
+        return stream.read().decode("utf-8-sig")
@@ -0,0 +1,215 @@
+"""
+Документация:
+https://docs.djangoproject.com/en/5.2/ref/models/querysets/#iterator
+https://docs.celeryq.dev/en/stable/userguide/workers.html#dump-of-scheduled-eta-tasks
+
+Восстановление напоминаний режима eta после потери сообщений
+Celery (очистка Redis, потеря брокера, перезапуск воркеров).
+
+Задачи с будущим сроком читаются курсором на стороне сервера
+и сверяются с состоянием напоминания в строке задачи и со списком
+сообщений с ETA, которые держат воркеры. Перепланируются только
+недостающие и устаревшие напоминания, пачками.
+"""
+
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import islice
+
+from django.db import connection
+from django.utils import timezone
+
+from .constants import RECONCILE_BATCH_SIZE, RECONCILE_INSPECT_TIMEOUT
+from .models import Task
+from .outbox import publish_reminders
+from .reminders import get_reminder_task_id
+from .tasks import send_task_reminder
+
+# Новая версия напоминания для пачки задач: сообщения, которые могли
+# остаться в брокере, устаревают. Задачи, закрытые или уже напомненные
+# после чтения курсором, пропускаются. RETURNING отдает актуальный
+# срок - по нему и ставится новое сообщение.
+RESCHEDULE_BATCH_SQL = """
+UPDATE {task_table}
+SET reminder_version = reminder_version + 1,
+    reminder_scheduled_for = end_date
+WHERE id = ANY(%(task_ids)s)
+  AND status = 'open'
+  AND reminder_sent_at IS NULL
+  AND end_date > %(now)s
+RETURNING id, reminder_version, end_date
+"""
+
+
+@dataclass
+class ReconcileResult:
+    """Итог сверки напоминаний."""
+
+    checked: int = 0
+    # Срок сообщения в БД не совпадает со сроком задачи
+    stale: int = 0
+    # Сообщения текущей версии нет у воркеров
+    missing: int = 0
+    # Отобрано для перепланирования (в том числе при dry_run)
+    selected: int = 0
+    rescheduled: int = 0
+    batches: int = 0
+    elapsed: float = 0.0
+
+
+def get_scheduled_reminder_ids(
+    timeout: float = RECONCILE_INSPECT_TIMEOUT,
+) -> set[str] | None:
+    """
+    ID сообщений с ETA, которые держат воркеры Celery.
+
+    Воркер забирает сообщение с ETA из очереди сразу и хранит его
+    в памяти до срока, поэтому inspect().scheduled() видит все
+    поставленные напоминания. None - ни один воркер не ответил.
+    """
+
+    inspect = send_task_reminder.app.control.inspect(timeout=timeout)
+    replies = inspect.scheduled()
+    if not replies:
+        return None
+
+    return {
+        entry["request"]["id"]
+        for entries in replies.values()
+        for entry in entries
+    }
+
+
+def iter_future_reminders(now: datetime, batch_size: int):
+    """
+    Пачки (id, end_date, reminder_version, reminder_scheduled_for)
+    открытых ненапомненных задач с будущим сроком.
+
+    iterator() читает строки курсором на стороне сервера PostgreSQL:
+    в памяти не больше одной пачки даже на миллионе задач.
+    """
+
+    rows = (
+        Task.objects.filter(
+            status=Task.Status.OPEN,
+            reminder_sent_at__isnull=True,
+            end_date__gt=now,
+            user__username__startswith="tg_",
+        )
+        # Порядок не нужен: сброс Meta.ordering избавляет от сортировки
+        .order_by()
+        .values_list(
+            "id",
+            "end_date",
+            "reminder_version",
+            "reminder_scheduled_for",
+        )
+        .iterator(chunk_size=batch_size)
+    )
+
+    while batch := list(islice(rows, batch_size)):
+        yield batch
+
+
+def bump_reminder_batch(task_pks: list[str], now: datetime) -> list[tuple]:
+    """
+    Увеличивает версию напоминаний пачки одним UPDATE.
+
+    Возвращает (id, reminder_version, end_date) задач, которым нужно
+    поставить сообщение.
+    """
+
+    sql = RESCHEDULE_BATCH_SQL.format(task_table=Task._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, {"task_ids": task_pks, "now": now})
+        return cursor.fetchall()
+
+
+def reconcile_reminders(
+    scheduled_ids: set[str] | None = None,
+    reschedule_all: bool = False,
+    batch_size: int = RECONCILE_BATCH_SIZE,
+    processes: int = 1,
+    dry_run: bool = False,
+    on_batch=None,
+) -> ReconcileResult:
+    """
+    Сверяет напоминания задач с будущим сроком и перепланирует
+    недостающие и устаревшие.
+
+    Перепланируется напоминание, если:
+    - срок сообщения в БД (reminder_scheduled_for) не совпадает
+      со сроком задачи - сообщение не ставилось или задачу изменили
+      в обход сигналов;
+    - scheduled_ids передан (get_scheduled_reminder_ids), а сообщения
+      текущей версии у воркеров нет;
+    - reschedule_all=True (брокер точно потерян).
+
+    Чтение и UPDATE пачек быстрые, а публикация в брокер упирается
+    в процессор (около 2 тыс. сообщений/с на процесс), поэтому при
+    processes > 1 пачки публикуют дочерние процессы, а основной
+    продолжает обход.
+
+    dry_run только считает. on_batch(result) вызывается после каждой
+    пачки (прогресс в команде).
+    """
+
+    started = time.perf_counter()
+    result = ReconcileResult()
+    now = timezone.now()
+
+    executor = None
+    if processes > 1 and not dry_run:
+        # fork: дочерним процессам не нужна повторная настройка Django,
+        # пулы соединений Celery сбрасываются после fork
+        executor = ProcessPoolExecutor(
+            processes,
+            mp_context=multiprocessing.get_context("fork"),
+        )
+    # Публикуемые пачки: не больше двух на процесс, чтобы обход
+    # не уходил далеко вперед и не держал строки в памяти
+    pending = deque()
+
+    try:
+        for batch in iter_future_reminders(now, batch_size):
+            task_pks = []
+            for task_pk, end_date, version, scheduled_for in batch:
+                if scheduled_for != end_date:
+                    result.stale += 1
+                elif scheduled_ids is not None and (
+                    get_reminder_task_id(task_pk, version)
+                    not in scheduled_ids
+                ):
+                    result.missing += 1
+                elif not reschedule_all:
+                    continue
+                task_pks.append(task_pk)
+
+            result.selected += len(task_pks)
+            if task_pks and not dry_run:
+                rows = bump_reminder_batch(task_pks, now)
+                if executor is None:
+                    result.rescheduled += publish_reminders(rows)
+                else:
+                    pending.append(executor.submit(publish_reminders, rows))
+                    while len(pending) > processes * 2:
+                        result.rescheduled += pending.popleft().result()
+
+            result.checked += len(batch)
+            result.batches += 1
+            result.elapsed = time.perf_counter() - started
+            if on_batch:
+                on_batch(result)
+
+        while pending:
+            result.rescheduled += pending.popleft().result()
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    result.elapsed = time.perf_counter() - started
+    return result
@@ -0,0 +1,213 @@
+"""
+Документация:
+https://docs.python.org/3/library/zoneinfo.html
+https://docs.python.org/3/library/calendar.html#calendar.monthrange
+
+Повторяющиеся задачи. Хранится только правило (Task.recurrence)
+и срок текущего вхождения (end_date): следующие вхождения заранее
+не создаются. Срок переносится на следующее вхождение в одном
+из двух случаев, и напоминания перепланируются как при любом
+переносе срока:
+- вхождение выполнено (Task.save со status=done);
+- вхождение пропущено: срок прошел, а следующее вхождение уже
+  близко (advance_missed_occurrences, по расписанию beat).
+Напоминание о сроке срок не переносит: после него вхождение
+остается в списках «сегодня» и «просрочено», пока его не выполнят
+или не пропустят. Списки за окно (сегодня, N дней) разворачивают
+будущие вхождения на лету, в ответе API.
+
+Вхождения считаются в местном времени (TIME_ZONE): ежедневная
+задача на 09:00 остается на 09:00 и при смене смещения часового
+пояса. Ежемесячное вхождение на 29-31 число в коротком месяце
+переносится на его последний день.
+"""
+
+import calendar
+from collections.abc import Iterator
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .constants import (
+    RECURRENCE_ADVANCE_BATCH_SIZE,
+    RECURRENCE_MAX_OCCURRENCES,
+)
+from .models import ReminderOffset, Task
+
+# Шаг повтора в днях; для ежемесячного - верхняя оценка, чтобы
+# пропуск вхождений (get_next_occurrence) не проскочил нужное
+RECURRENCE_DAYS = {
+    Task.Recurrence.DAILY: 1,
+    Task.Recurrence.WEEKLY: 7,
+    Task.Recurrence.MONTHLY: 31,
+}
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    """Тот же день и время через months месяцев (или последний день)."""
+
+    month_index = value.month - 1 + months
+    year = value.year + month_index // 12
+    month = month_index % 12 + 1
+    day = min(value.day, calendar.monthrange(year, month)[1])
+    return value.replace(year=year, month=month, day=day)
+
+
+def get_occurrence(start: datetime, recurrence: str, index: int) -> datetime:
+    """Вхождение номер index после start (0 - сам start)."""
+
+    # Арифметика с ZoneInfo - по местному времени, смещение пояса
+    # пересчитывается для новой даты
+    local_start = timezone.localtime(start)
+    if recurrence == Task.Recurrence.MONTHLY:
+        return add_months(local_start, index)
+    return local_start + timedelta(days=RECURRENCE_DAYS[recurrence] * index)
+
+
+def iter_occurrences(
+    start: datetime,
+    recurrence: str,
+    until: datetime,
+    limit: int = RECURRENCE_MAX_OCCURRENCES,
+) -> Iterator[datetime]:
+    """
+    Вхождения после start (сам start не входит) раньше until,
+    не больше limit. Вычисляются по одному, по мере чтения.
+    """
+
+    for index in range(1, limit + 1):
+        occurrence = get_occurrence(start, recurrence, index)
+        if occurrence >= until:
+            return
+        yield occurrence
+
+
+def get_next_occurrence(task: Task, now: datetime) -> datetime:
+    """
+    Срок следующего вхождения повторяющейся задачи: первое вхождение
+    позже end_date и позже now. Пропущенные вхождения не наверстываются.
+    """
+
+    index = 1
+    if task.end_date < now:
+        # Сразу к последним пропущенным вхождениям, без перебора
+        # всех дней долго просроченной задачи
+        period = timedelta(days=RECURRENCE_DAYS[task.recurrence])
+        index = max((now - task.end_date) // period, 1)
+
+    occurrence = get_occurrence(task.end_date, task.recurrence, index)
+    while occurrence <= now:
+        index += 1
+        occurrence = get_occurrence(task.end_date, task.recurrence, index)
+    return occurrence
+
+
+def get_advance_at(task: Task, lead_minutes: int = 0) -> datetime:
+    """
+    Момент, с которого прошедшее вхождение считается пропущенным:
+    начало местного дня следующего вхождения, раньше на lead_minutes
+    (самое раннее напоминание до срока), чтобы успеть его отправить.
+    """
+
+    following = get_occurrence(task.end_date, task.recurrence, 1)
+    day_start = following.replace(hour=0, minute=0, second=0, microsecond=0)
+    return day_start - timedelta(minutes=lead_minutes)
+
+
+def advance_missed_occurrences(
+    batch_size: int = RECURRENCE_ADVANCE_BATCH_SIZE,
+) -> int:
+    """
+    Переносит пропущенные вхождения открытых повторяющихся задач
+    на следующее. Срок задачи прошел, а get_advance_at наступит
+    до следующего запуска (RECURRENCE_ADVANCE_INTERVAL): вчерашнее
+    ежедневное вхождение уступает сегодняшнему к началу дня.
+
+    Задачи обходятся пачками по ключу id (частичный индекс
+    task_recurring_open_end_idx), срок пачки переносится одним
+    bulk_update: новые версии напоминаний, события outbox
+    и напоминания до срока - тем же запросом (TaskQuerySet.update).
+
+    Возвращает количество перенесенных задач.
+    """
+
+    now = timezone.now()
+    horizon = now + timedelta(seconds=settings.RECURRENCE_ADVANCE_INTERVAL)
+    queryset = (
+        Task.objects.filter(status=Task.Status.OPEN, end_date__lt=now)
+        .exclude(recurrence="")
+        .annotate(
+            lead_minutes=Coalesce(
+                Subquery(
+                    ReminderOffset.objects.filter(task=OuterRef("pk"))
+                    .order_by("-offset_minutes")
+                    .values("offset_minutes")[:1]
+                ),
+                0,
+            ),
+        )
+        .only("id", "end_date", "recurrence", "status")
+        .order_by("id")
+    )
+
+    advanced = 0
+    after = ""
+    while True:
+        batch = list(queryset.filter(id__gt=after)[:batch_size])
+        missed = [
+            task
+            for task in batch
+            if get_advance_at(task, task.lead_minutes) <= horizon
+        ]
+        for task in missed:
+            task.end_date = get_next_occurrence(task, now)
+
+        if missed:
+            Task.objects.bulk_update(missed, ["end_date"])
+            advanced += len(missed)
+
+        if len(batch) < batch_size:
+            return advanced
+        after = batch[-1].id
+
+
+def expand_occurrences(
+    items: list[dict],
+    until: datetime,
+    ordering: str | None = None,
+) -> list[dict]:
+    """
+    Добавляет в ответ списка вхождения повторяющихся задач до until:
+    копию задачи со сроком вхождения и его номером (occurrence,
+    у самой задачи - 0). При ordering=end_date/-end_date вхождения
+    встают на свои места, иначе идут сразу за задачей.
+    """
+
+    expanded = []
+    for item in items:
+        expanded.append({**item, "occurrence": 0})
+        if not item.get("recurrence") or item.get("status") != "open":
+            continue
+
+        start = datetime.fromisoformat(item["end_date"])
+        for index, occurrence in enumerate(
+            iter_occurrences(start, item["recurrence"], until),
+            start=1,
+        ):
+            expanded.append(
+                {
+                    **item,
+                    "end_date": timezone.localtime(occurrence).isoformat(),
+                    "occurrence": index,
+                }
+            )
+
+    if ordering in ("end_date", "-end_date"):
+        expanded.sort(
+            key=lambda item: datetime.fromisoformat(item["end_date"]),
+            reverse=ordering.startswith("-"),
+        )
+    return expanded
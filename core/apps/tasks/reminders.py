@@ -0,0 +1,649 @@
+"""
+Документация:
+https://www.postgresql.org/docs/current/sql-select.html#SQL-FOR-UPDATE-SHARE
+https://docs.djangoproject.com/en/5.2/topics/db/sql/#executing-custom-sql-directly
+
+Построение текста напоминаний, выборка задач для режима sweep
+и напоминания до срока (ReminderOffset).
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .constants import (
+    EMPTY_CATEGORY,
+    EMPTY_DESCRIPTION,
+    LOG_CELERY_INVALID_USERNAME_FORMAT,
+    LOG_CELERY_NO_TELEGRAM_USER,
+    REMINDER_DIGEST_SEPARATOR,
+    REMINDER_DIGEST_TEMPLATE,
+    REMINDER_ITEM_TEMPLATE,
+    REMINDER_MESSAGE_TEMPLATE,
+    REMINDER_OFFSET_TEMPLATE,
+    REMINDER_OFFSET_UNITS,
+    REMINDER_SWEEP_LOOKBACK,
+    RUSSIAN_MONTHS,
+    TELEGRAM_MESSAGE_MAX_LENGTH,
+)
+from .models import OutboxEvent, ReminderOffset, Task
+
+User = get_user_model()
+
+REMINDER_MODE_ETA = "eta"
+REMINDER_MODE_SWEEP = "sweep"
+# Метка метрик напоминаний до срока (send_offset_reminders)
+REMINDER_MODE_OFFSET = "offset"
+
+# Помечает пачку наступивших напоминаний отправленными и возвращает ID.
+# Вместе с ними захватываются задачи тех же пользователей со сроком
+# до %(until)s - они уйдут в том же сообщении.
+# SKIP LOCKED пропускает строки, уже захваченные другим воркером,
+# поэтому несколько sweeper'ов работают параллельно без дублей.
+CLAIM_DUE_REMINDERS_SQL = """
+WITH due AS (
+    SELECT id, user_id FROM {task_table}
+    WHERE status = 'open'
+      AND reminder_sent_at IS NULL
+      AND end_date <= %(now)s
+      AND end_date > %(since)s
+    ORDER BY end_date
+    LIMIT %(batch_size)s
+    FOR UPDATE SKIP LOCKED
+), coalesced AS (
+    SELECT id FROM {task_table}
+    WHERE user_id IN (SELECT user_id FROM due)
+      AND status = 'open'
+      AND reminder_sent_at IS NULL
+      AND end_date > %(now)s
+      AND end_date <= %(until)s
+    FOR UPDATE SKIP LOCKED
+)
+UPDATE {task_table} AS task
+SET reminder_sent_at = %(now)s
+WHERE task.id IN (SELECT id FROM due UNION ALL SELECT id FROM coalesced)
+RETURNING task.id
+"""
+
+# Напоминание одной задачи (режим eta) вместе с задачами того же
+# пользователя со сроком в пределах окна. Если задачу уже захватил
+# другой воркер, напоминание отправлено или версия сообщения
+# устарела (задачу изменили после планирования), не захватывается
+# ничего.
+CLAIM_TASK_REMINDERS_SQL = """
+WITH target AS (
+    SELECT user_id, end_date FROM {task_table}
+    WHERE id = %(task_id)s
+      AND status = 'open'
+      AND reminder_sent_at IS NULL
+      AND (
+          %(version)s::integer IS NULL
+          OR reminder_version = %(version)s::integer
+      )
+    FOR UPDATE SKIP LOCKED
+), batch AS (
+    SELECT task.id FROM {task_table} AS task, target
+    WHERE task.id = %(task_id)s
+       OR (
+           task.user_id = target.user_id
+           AND task.status = 'open'
+           AND task.reminder_sent_at IS NULL
+           AND task.end_date > target.end_date - %(window)s
+           AND task.end_date <= target.end_date + %(window)s
+       )
+    FOR UPDATE OF task SKIP LOCKED
+)
+UPDATE {task_table} AS task
+SET reminder_sent_at = %(now)s
+WHERE task.id IN (SELECT id FROM batch)
+RETURNING task.id
+"""
+
+
+# Новая версия напоминания задачи: все ранее поставленные сообщения
+# Celery устаревают. reset_sent снова разрешает напоминание,
+# scheduled_for - срок сообщения новой версии (NULL - не ставится).
+# Событие outbox для нового сообщения и напоминания до срока
+# пересчитываются тем же запросом.
+BUMP_REMINDER_VERSION_SQL = """
+WITH bumped AS (
+    UPDATE {task_table}
+    SET reminder_version = reminder_version + 1,
+        reminder_scheduled_for = %(scheduled_for)s,
+        reminder_sent_at = CASE
+            WHEN %(reset_sent)s THEN NULL
+            ELSE reminder_sent_at
+        END
+    WHERE id = %(task_id)s
+    RETURNING id, reminder_version, reminder_scheduled_for, end_date, status
+), events AS (
+    {insert_events}
+), offsets AS (
+    {rearm_offsets}
+)
+SELECT reminder_version FROM bumped
+"""
+
+
+# Новые версии напоминаний задач, измененных пакетной записью
+# (QuerySet.update, bulk_update). Напоминание снова разрешается
+# и получает срок сообщения, если задача открыта, срок в будущем,
+# а владелец связан с Telegram. События outbox и напоминания
+# до срока - тем же запросом.
+BUMP_REMINDER_VERSIONS_SQL = """
+WITH bumped AS (
+    UPDATE {task_table} AS task
+    SET reminder_version = task.reminder_version + 1,
+        reminder_sent_at = CASE
+            WHEN task.status = 'open' AND task.end_date > %(now)s THEN NULL
+            ELSE task.reminder_sent_at
+        END,
+        reminder_scheduled_for = CASE
+            WHEN %(schedule)s
+             AND task.status = 'open'
+             AND task.end_date > %(now)s
+             AND starts_with(owner.username, 'tg_')
+            THEN task.end_date
+        END
+    FROM {user_table} AS owner
+    WHERE owner.id = task.user_id
+      AND task.id = ANY(%(task_ids)s)
+    RETURNING task.id, task.reminder_version, task.reminder_scheduled_for,
+        task.end_date, task.status
+), events AS (
+    {insert_events}
+), offsets AS (
+    {rearm_offsets}
+)
+SELECT id, reminder_version, reminder_scheduled_for FROM bumped
+WHERE reminder_scheduled_for IS NOT NULL
+"""
+
+# События outbox для строк bumped, которым нужно сообщение Celery.
+# payload совпадает с outbox.get_reminder_payload
+INSERT_REMINDER_EVENTS_SQL = """
+INSERT INTO {outbox_table} (kind, payload)
+    SELECT %(kind)s, jsonb_build_object(
+        'task_pk', id,
+        'version', reminder_version,
+        'eta', reminder_scheduled_for
+    )
+    FROM bumped
+    WHERE reminder_scheduled_for IS NOT NULL
+"""
+
+
+# Напоминания до срока задач из bumped: момент отправки от нового
+# срока, если задача открыта и момент еще не наступил, иначе NULL.
+# Срок перенесли в будущее - отправленные напоминания снова ждут
+REARM_REMINDER_OFFSETS_SQL = """
+UPDATE {offset_table} AS reminder
+    SET next_fire_at = CASE
+        WHEN bumped.status = 'open'
+         AND bumped.end_date
+             > %(now)s + make_interval(mins => reminder.offset_minutes)
+        THEN bumped.end_date - make_interval(mins => reminder.offset_minutes)
+    END
+    FROM bumped
+    WHERE reminder.task_id = bumped.id
+"""
+
+# Захватывает пачку наступивших напоминаний до срока по индексу
+# next_fire_at (любой отступ) и снимает их с ожидания.
+# Возвращает момент отправки: слишком старые не отправляются
+CLAIM_DUE_OFFSETS_SQL = """
+WITH due AS (
+    SELECT id, next_fire_at FROM {offset_table}
+    WHERE next_fire_at <= %(now)s
+    ORDER BY next_fire_at
+    LIMIT %(batch_size)s
+    FOR UPDATE SKIP LOCKED
+)
+UPDATE {offset_table} AS reminder
+SET next_fire_at = NULL
+FROM due
+WHERE reminder.id = due.id
+RETURNING reminder.task_id, reminder.offset_minutes, due.next_fire_at
+"""
+
+
+@dataclass
+class DueOffsetReminder:
+    """Захваченное напоминание за offset_minutes до срока задачи."""
+
+    task: Task
+    offset_minutes: int
+    fire_at: datetime
+
+
+def format_bump_sql(sql: str) -> str:
+    """
+    Запрос новых версий с вставкой событий outbox и пересчетом
+    напоминаний до срока.
+    """
+
+    return sql.format(
+        task_table=Task._meta.db_table,
+        user_table=User._meta.db_table,
+        insert_events=INSERT_REMINDER_EVENTS_SQL.format(
+            outbox_table=OutboxEvent._meta.db_table,
+        ),
+        rearm_offsets=REARM_REMINDER_OFFSETS_SQL.format(
+            offset_table=ReminderOffset._meta.db_table,
+        ),
+    )
+
+
+def format_russian_datetime(dt):
+    """Форматирование даты в русский формат."""
+
+    hour = dt.hour
+    minute = f"{dt.minute:02d}"
+
+    return f"{hour}:{minute}, {dt.day} {RUSSIAN_MONTHS[dt.month-1]} {dt.year}"
+
+
+def get_task_telegram_id(task: Task) -> int | None:
+    """
+    Извлекает Telegram ID владельца из username (формат: tg_123456).
+
+    Возвращает None, если пользователь не связан с Telegram.
+    """
+
+    if not task.user or not task.user.username.startswith("tg_"):
+        print(LOG_CELERY_NO_TELEGRAM_USER.format(task.name))
+        return None
+
+    try:
+        return int(task.user.username.replace("tg_", ""))
+    except (ValueError, AttributeError):
+        print(LOG_CELERY_INVALID_USERNAME_FORMAT.format(task.user.username))
+        return None
+
+
+def get_reminder_fields(task: Task) -> tuple[str, str, str, str]:
+    """Название, описание, срок и категория задачи для напоминания."""
+
+    # Конвертация времени в часовой зоне Москвы для отображения
+    moscow_tz = timezone.get_current_timezone()
+    local_dt = timezone.localtime(task.end_date, moscow_tz)
+
+    description = task.description or EMPTY_DESCRIPTION
+    category_name = task.category.name if task.category else EMPTY_CATEGORY
+
+    return (
+        task.name,
+        description,
+        format_russian_datetime(local_dt),
+        category_name,
+    )
+
+
+def build_reminder_message(task: Task) -> str:
+    """
+    Текст напоминания о задаче.
+
+    Пример:
+    ⏰ Напоминание о задаче
+
+    📌 Купить молоко
+    📃 Не меньше 3,2%
+    🔥 Срок выполнения: 8:00, 15 октября 2025
+    🔖 Категория: Покупки
+    """
+
+    return REMINDER_MESSAGE_TEMPLATE.format(*get_reminder_fields(task))
+
+
+def build_digest_messages(tasks: list[Task]) -> list[str]:
+    """
+    Тексты напоминаний о нескольких задачах одного пользователя.
+
+    Одна задача - обычное напоминание (build_reminder_message),
+    несколько - одно сообщение со списком задач. Если список не
+    помещается в TELEGRAM_MESSAGE_MAX_LENGTH, он делится на части.
+    """
+
+    if len(tasks) == 1:
+        return [build_reminder_message(tasks[0])]
+
+    header_length = len(REMINDER_DIGEST_TEMPLATE.format(len(tasks), ""))
+    chunks = [[]]
+    length = header_length
+    for task in tasks:
+        item = REMINDER_ITEM_TEMPLATE.format(*get_reminder_fields(task))
+        item_length = len(item) + len(REMINDER_DIGEST_SEPARATOR)
+        if chunks[-1] and length + item_length > TELEGRAM_MESSAGE_MAX_LENGTH:
+            chunks.append([])
+            length = header_length
+        chunks[-1].append(item)
+        length += item_length
+
+    return [
+        REMINDER_DIGEST_TEMPLATE.format(
+            len(items),
+            REMINDER_DIGEST_SEPARATOR.join(items),
+        )
+        for items in chunks
+    ]
+
+
+def group_reminders_by_chat(tasks: list[Task]) -> dict[int, list[Task]]:
+    """Задачи по Telegram ID владельцев, без задач вне Telegram."""
+
+    reminders = defaultdict(list)
+    for task in tasks:
+        telegram_id = get_task_telegram_id(task)
+        if telegram_id is not None:
+            reminders[telegram_id].append(task)
+    return reminders
+
+
+def build_reminder_messages(tasks: list[Task]) -> list[tuple[int, str]]:
+    """
+    Сообщения (Telegram ID, текст) для захваченных напоминаний:
+    по одному сообщению-сводке на пользователя.
+    """
+
+    return [
+        (telegram_id, text)
+        for telegram_id, chat_tasks in group_reminders_by_chat(tasks).items()
+        for text in build_digest_messages(chat_tasks)
+    ]
+
+
+def get_coalesce_window() -> timedelta:
+    """Окно объединения напоминаний (REMINDER_COALESCE_WINDOW)."""
+
+    return timedelta(seconds=settings.REMINDER_COALESCE_WINDOW)
+
+
+def get_claimed_tasks(task_ids: list[str]) -> list[Task]:
+    """Захваченные задачи с пользователем и категорией, по сроку."""
+
+    if not task_ids:
+        return []
+
+    return list(
+        Task.objects.select_related("user", "category")
+        .defer("search_vector")
+        .filter(pk__in=task_ids)
+        .order_by("end_date")
+    )
+
+
+def claim_due_reminders(batch_size: int) -> list[Task]:
+    """
+    Захватывает пачку задач, срок которых наступил, а напоминание
+    еще не отправлено, и возвращает их с пользователем и категорией.
+
+    Вместе с ними захватываются задачи тех же пользователей, срок
+    которых наступит в течение REMINDER_COALESCE_WINDOW секунд.
+
+    reminder_sent_at выставляется сразу всем задачам одним UPDATE:
+    напоминание отправляется не более одного раза. Задачи старше
+    REMINDER_SWEEP_LOOKBACK не напоминаются - они уже неактуальны.
+    """
+
+    now = timezone.now()
+    sql = CLAIM_DUE_REMINDERS_SQL.format(task_table=Task._meta.db_table)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            sql,
+            {
+                "now": now,
+                "since": now - timedelta(seconds=REMINDER_SWEEP_LOOKBACK),
+                "until": now + get_coalesce_window(),
+                "batch_size": batch_size,
+            },
+        )
+        task_ids = [row[0] for row in cursor.fetchall()]
+
+    return get_claimed_tasks(task_ids)
+
+
+def claim_task_reminders(
+    task_pk: str,
+    version: int | None = None,
+) -> list[Task]:
+    """
+    Захватывает напоминание задачи task_pk (режим eta) и напоминания
+    задач того же пользователя со сроком не дальше
+    REMINDER_COALESCE_WINDOW секунд от ее срока.
+
+    reminder_sent_at выставляется всем задачам одним UPDATE, поэтому
+    сообщения Celery остальных задач ничего не отправят. Пустой
+    список - версия сообщения устарела, напоминание уже отправлено
+    или задача закрыта. version=None (сообщения, поставленные до
+    появления версий) версию не проверяет.
+    """
+
+    sql = CLAIM_TASK_REMINDERS_SQL.format(task_table=Task._meta.db_table)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            sql,
+            {
+                "task_id": task_pk,
+                "version": version,
+                "now": timezone.now(),
+                "window": get_coalesce_window(),
+            },
+        )
+        task_ids = [row[0] for row in cursor.fetchall()]
+
+    return get_claimed_tasks(task_ids)
+
+
+def get_reminder_task_id(task_pk: str, version: int) -> str:
+    """
+    ID сообщения Celery с напоминанием задачи.
+
+    Выводится из ПК задачи и версии напоминания, поэтому сообщение
+    текущей версии находится (AsyncResult, inspect().scheduled())
+    по одной строке Task, без реестра ID в кэше.
+    """
+
+    return f"reminder_{task_pk}_{version}"
+
+
+def get_reminder_eta(task: Task, now: datetime) -> datetime | None:
+    """
+    Срок сообщения Celery с напоминанием задачи или None, если
+    сообщение не ставится: задача закрыта, срок прошел или включен
+    режим sweep.
+    """
+
+    if (
+        task.status != Task.Status.OPEN
+        or task.end_date <= now
+        or settings.REMINDER_MODE == REMINDER_MODE_SWEEP
+    ):
+        return None
+    return task.end_date
+
+
+def bump_reminder_version(
+    task_pk: str,
+    reset_sent: bool,
+    scheduled_for: datetime | None = None,
+) -> int:
+    """
+    Увеличивает версию напоминания задачи одним запросом и возвращает
+    новую версию для следующего сообщения Celery.
+
+    Вместо AsyncResult.revoke: старое сообщение останется в брокере,
+    но send_task_reminder увидит другую версию и ничего не отправит.
+    Рассылки revoke всем воркерам и рост их списка отозванных задач
+    не нужны. reset_sent=True сбрасывает reminder_sent_at (срок
+    перенесен в будущее - напомнить снова). scheduled_for - срок
+    сообщения новой версии: тот же запрос добавляет событие outbox,
+    само сообщение поставит relay_outbox.
+    """
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            format_bump_sql(BUMP_REMINDER_VERSION_SQL),
+            {
+                "task_id": task_pk,
+                "reset_sent": reset_sent,
+                "scheduled_for": scheduled_for,
+                "kind": OutboxEvent.Kind.REMINDER,
+                "now": timezone.now(),
+            },
+        )
+        return cursor.fetchone()[0]
+
+
+def bump_reminder_versions(task_pks: list[str]) -> list[tuple]:
+    """
+    Пакетный вариант bump_reminder_version для записей в обход
+    post_save: один запрос на все задачи вместе с событиями outbox.
+
+    Возвращает (ПК задачи, версия, срок) задач, которым поставлено
+    событие outbox (в режиме sweep - ни одной).
+    """
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            format_bump_sql(BUMP_REMINDER_VERSIONS_SQL),
+            {
+                "task_ids": list(task_pks),
+                "now": timezone.now(),
+                "schedule": settings.REMINDER_MODE != REMINDER_MODE_SWEEP,
+                "kind": OutboxEvent.Kind.REMINDER,
+            },
+        )
+        return cursor.fetchall()
+
+
+def format_offset(minutes: int) -> str:
+    """Отступ напоминания в минутах: 1500 -> "1 д 1 ч"."""
+
+    parts = []
+    for unit_minutes, unit in REMINDER_OFFSET_UNITS:
+        value, minutes = divmod(minutes, unit_minutes)
+        if value:
+            parts.append(f"{value} {unit}")
+    return " ".join(parts)
+
+
+def build_offset_reminder_messages(
+    reminders: list[DueOffsetReminder],
+) -> list[tuple[int, str]]:
+    """
+    Сообщения (Telegram ID, текст) для напоминаний до срока:
+    по одному на напоминание, без задач вне Telegram.
+
+    Пример:
+    🔔 До срока задачи: 1 ч
+
+    📌 Купить молоко
+    ...
+    """
+
+    messages = []
+    for reminder in reminders:
+        telegram_id = get_task_telegram_id(reminder.task)
+        if telegram_id is not None:
+            text = REMINDER_OFFSET_TEMPLATE.format(
+                format_offset(reminder.offset_minutes),
+                *get_reminder_fields(reminder.task),
+            )
+            messages.append((telegram_id, text))
+    return messages
+
+
+def claim_due_offset_reminders(
+    batch_size: int,
+) -> tuple[int, list[DueOffsetReminder]]:
+    """
+    Захватывает пачку наступивших напоминаний до срока (любых
+    отступов - один индекс по next_fire_at) и снимает их с ожидания
+    одним UPDATE: каждое отправляется не более одного раза.
+
+    Напоминания старше REMINDER_SWEEP_LOOKBACK и напоминания
+    закрытых задач снимаются без отправки.
+
+    Возвращает число захваченных напоминаний и те, что нужно отправить.
+    """
+
+    now = timezone.now()
+    since = now - timedelta(seconds=REMINDER_SWEEP_LOOKBACK)
+    sql = CLAIM_DUE_OFFSETS_SQL.format(
+        offset_table=ReminderOffset._meta.db_table,
+    )
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(sql, {"now": now, "batch_size": batch_size})
+        rows = cursor.fetchall()
+
+    due = [row for row in rows if row[2] > since]
+    tasks = {
+        task.pk: task
+        for task in get_claimed_tasks([task_pk for task_pk, _, _ in due])
+    }
+    reminders = [
+        DueOffsetReminder(tasks[task_pk], offset_minutes, fire_at)
+        for task_pk, offset_minutes, fire_at in due
+        if task_pk in tasks and tasks[task_pk].status == Task.Status.OPEN
+    ]
+    return len(rows), reminders
+
+
+def get_offset_fire_at(
+    task: Task,
+    offset_minutes: int,
+    now: datetime,
+) -> datetime | None:
+    """
+    Когда напомнить за offset_minutes до срока задачи, или None:
+    задача закрыта или момент уже прошел (как REARM_REMINDER_OFFSETS_SQL).
+    """
+
+    fire_at = task.end_date - timedelta(minutes=offset_minutes)
+    if task.status != Task.Status.OPEN or fire_at <= now:
+        return None
+    return fire_at
+
+
+def set_reminder_offsets(
+    task: Task,
+    offsets: list[int],
+    created: bool = False,
+) -> list[int]:
+    """
+    Заменяет напоминания до срока задачи на offsets (минуты):
+    удаляет лишние и добавляет новые, не больше двух запросов
+    (у только что созданной задачи удалять нечего).
+    Уже заданные отступы остаются как есть.
+
+    Возвращает отступы задачи по убыванию.
+    """
+
+    offsets = sorted(set(offsets), reverse=True)
+    now = timezone.now()
+
+    if not created:
+        ReminderOffset.objects.filter(task=task).exclude(
+            offset_minutes__in=offsets,
+        ).delete()
+    if offsets:
+        ReminderOffset.objects.bulk_create(
+            [
+                ReminderOffset(
+                    task=task,
+                    offset_minutes=offset_minutes,
+                    next_fire_at=get_offset_fire_at(task, offset_minutes, now),
+                )
+                for offset_minutes in offsets
+            ],
+            ignore_conflicts=True,
+        )
+    return offsets
@@ -5,8 +5,12 @@ https://www.django-rest-framework.org/api-guide/serializers/#modelserializer
 """
 
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from rest_framework import serializers
-from .models import Task, Category
+
+from .constants import REMINDER_OFFSET_MAX_MINUTES, REMINDER_OFFSETS_LIMIT
+from .models import AgendaSubscription, ArchivedTask, Task, Category
+from .reminders import set_reminder_offsets
 
 User = get_user_model()
 
@@ -48,6 +52,17 @@ class TaskSerializer(serializers.ModelSerializer):
         write_only=True,
         required=True,
     )
+    # Напоминания до срока, минуты: [1440, 60] - за день и за час.
+    # Читается из аннотации TaskViewSet.get_queryset
+    reminder_offsets = serializers.ListField(
+        child=serializers.IntegerField(
+            min_value=1,
+            max_value=REMINDER_OFFSET_MAX_MINUTES,
+        ),
+        max_length=REMINDER_OFFSETS_LIMIT,
+        source="reminder_offset_minutes",
+        required=False,
+    )
 
     class Meta:
         model = Task
@@ -57,14 +72,19 @@ class TaskSerializer(serializers.ModelSerializer):
             "description",
             "creation_date",
             "end_date",
+            "status",
+            "completed_at",
+            "recurrence",
             "category",
             "category_id",
             "user",
             "user_telegram_id",
+            "reminder_offsets",
         ]
         read_only_fields = (
             "id",
             "creation_date",
+            "completed_at",
             "user",
             "category",
         )
@@ -85,4 +105,95 @@ class TaskSerializer(serializers.ModelSerializer):
             defaults={"first_name": f"Telegram User {tg_id}"},
         )
         validated_data["user"] = user
-        return super().create(validated_data)
+
+        # Задача и ее напоминания до срока - в одной транзакции
+        offsets = validated_data.pop("reminder_offset_minutes", [])
+        with transaction.atomic(savepoint=False):
+            task = super().create(validated_data)
+            task.reminder_offset_minutes = set_reminder_offsets(
+                task,
+                offsets,
+                created=True,
+            )
+        return task
+
+    def update(self, instance, validated_data):
+        """
+        Обновляет задачу. Напоминания до срока заменяются, только если
+        переданы: при переносе срока их пересчитывает сам save().
+        """
+
+        offsets = validated_data.pop("reminder_offset_minutes", None)
+        with transaction.atomic(savepoint=False):
+            task = super().update(instance, validated_data)
+            if offsets is not None:
+                task.reminder_offset_minutes = set_reminder_offsets(
+                    task,
+                    offsets,
+                )
+        return task
+
+
+class ArchivedTaskSerializer(serializers.ModelSerializer):
+    """Сериализатор архивных задач (только чтение)."""
+
+    category = CategorySerializer(read_only=True)
+    user = serializers.StringRelatedField(read_only=True)
+
+    class Meta:
+        model = ArchivedTask
+        fields = [
+            "id",
+            "name",
+            "description",
+            "creation_date",
+            "end_date",
+            "status",
+            "completed_at",
+            "archived_at",
+            "category",
+            "user",
+        ]
+        read_only_fields = fields
+
+
+class AgendaSubscriptionSerializer(serializers.ModelSerializer):
+    """Сериализатор подписки на утреннюю сводку."""
+
+    send_at = serializers.TimeField(format="%H:%M", input_formats=["%H:%M"])
+
+    class Meta:
+        model = AgendaSubscription
+        fields = [
+            "send_at",
+            "is_active",
+            "last_sent_on",
+        ]
+        read_only_fields = [
+            "is_active",
+            "last_sent_on",
+        ]
+
+
+class TaskImportSerializer(serializers.Serializer):
+    """
+    Сериализатор строки импорта задач.
+
+    Проверяет только формат полей, без запросов к БД:
+    уникальность названий и категории проверяются пачками в импорте.
+    """
+
+    name = serializers.CharField(max_length=128)
+    description = serializers.CharField(
+        required=False,
+        allow_blank=True,
+        default="",
+    )
+    end_date = serializers.DateTimeField()
+    category = serializers.CharField(
+        max_length=32,
+        required=False,
+        allow_blank=True,
+        allow_null=True,
+        default=None,
+    )
@@ -1,187 +1,228 @@
 """
 Документация:
 https://docs.djangoproject.com/en/4.2/ref/signals/
+https://docs.djangoproject.com/en/5.2/ref/models/instances/#customizing-model-loading
 """
 
+from django.conf import settings
+from django.contrib.auth import get_user_model
 from django.utils import timezone
-from datetime import timezone as datetime_timezone
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.db import transaction
 from django.dispatch import receiver
-from celery.result import AsyncResult
-from django.core.cache import cache
 
 from .models import Task
-from .tasks import send_task_reminder
+from .outbox import add_reminder_events
+from .reminders import (
+    REMINDER_MODE_SWEEP,
+    bump_reminder_version,
+    get_reminder_eta,
+)
+from .stats import invalidate_user_stats
 from .constants import (
     LOG_SIGNALS_NO_TELEGRAM_USER,
     LOG_SIGNALS_DEADLINE_PASSED,
     LOG_SIGNALS_NOTIFICATION_SCHEDULED,
     LOG_SIGNALS_NOTIFICATION_RESCHEDULED,
-    LOG_SIGNALS_TASK_REVOKED,
+    LOG_SIGNALS_TASK_CLOSED,
+    LOG_SIGNALS_REMINDER_UNCHANGED,
 )
 
-
-def get_reminder_task_id(task_pk: int) -> str | None:
-    """
-    Получает ID запланированной задачи Celery из кэша.
-    """
-    return cache.get(f"reminder_task_{task_pk}")
+User = get_user_model()
 
 
-def set_reminder_task_id(task_pk: int, task_id: str) -> None:
+def set_bulk_reminder_schedule(tasks: list[Task]) -> list[tuple]:
     """
-    Сохраняет ID задачи Celery в кэш.
+    Срок сообщений Celery для задач bulk_create - до INSERT, как
+    set_reminder_schedule делает для save(). Владельцы, не загруженные
+    вместе с задачами, проверяются одним запросом.
+
+    Возвращает строки (ПК задачи, версия, срок) для add_reminder_events.
     """
-    cache.set(
-        f"reminder_task_{task_pk}",
-        task_id,
-        timeout=None,
-    )
 
+    now = timezone.now()
+    user_ids = {
+        task.user_id for task in tasks if not Task.user.is_cached(task)
+    }
+    telegram_user_ids = set()
+    if user_ids:
+        telegram_user_ids = set(
+            User.objects.filter(
+                pk__in=user_ids,
+                username__startswith="tg_",
+            ).values_list("pk", flat=True)
+        )
 
-def delete_reminder_task_id(task_pk: int) -> None:
-    """
-    Удаляет ID задачи Celery из кэша.
-    """
-    cache.delete(f"reminder_task_{task_pk}")
+    rows = []
+    for task in tasks:
+        if Task.user.is_cached(task):
+            is_telegram = has_telegram_user(task)
+        else:
+            is_telegram = task.user_id in telegram_user_ids
+        if not is_telegram:
+            continue
+
+        task.reminder_scheduled_for = get_reminder_eta(task, now)
+        if task.reminder_scheduled_for is not None:
+            rows.append(
+                (task.pk, task.reminder_version, task.reminder_scheduled_for)
+            )
+    return rows
 
 
-def cancel_existing_reminder(
-    task_pk: int,
-    task_name: str,
-) -> bool:
-    """
-    Отменяет существующую запланированную задачу Celery.
-    Возвращает True если задача была отменена,
-    False если не было задачи или ошибка.
-    """
-    existing_task_id = get_reminder_task_id(task_pk)
-    if not existing_task_id:
-        return False
+def has_telegram_user(task: Task) -> bool:
+    """Связан ли владелец задачи с Telegram (username tg_123456)."""
 
-    try:
-        existing_task = AsyncResult(existing_task_id)
-        if not existing_task.ready():
-            existing_task.revoke(terminate=True)
-            print(LOG_SIGNALS_TASK_REVOKED.format(task_name))
-            return True
-    except Exception as e:
-        print(f"Ошибка при отмене задачи {existing_task_id}: {e}")
+    return bool(task.user) and getattr(
+        task.user,
+        "username",
+        "",
+    ).startswith("tg_")
 
-    return False
 
+def schedule_task_reminder(instance: Task, created: bool) -> None:
+    """
+    Планирует и перепланирует напоминание.
 
-@receiver(post_save, sender=Task)
-def schedule_task_reminder(
-    sender,
-    instance: Task,
-    created,
-    **kwargs,
-):
-    """Планирует и перепланирует напоминания."""
+    Сообщение Celery несет версию напоминания задачи. При изменении
+    срока, статуса или владельца версия увеличивается, и ранее
+    поставленное сообщение становится устаревшим: send_task_reminder
+    сверит версию и ничего не отправит. Отменять его через revoke
+    не нужно.
+
+    Брокер здесь не вызывается: сообщение новой версии записывается
+    событием outbox в транзакции save(), публикует его relay_outbox.
+    """
 
     # Проверка, что пользователь связан с Telegram
-    if not instance.user or not getattr(
-        instance.user,
-        "username",
-        "",
-    ).startswith("tg_"):
+    if not has_telegram_user(instance):
         print(LOG_SIGNALS_NO_TELEGRAM_USER.format(instance.name))
         return
 
     now = timezone.now()
+    is_open = instance.status == Task.Status.OPEN
 
-    if instance.end_date > now and instance.reminder_sent_at is not None:
-        Task.objects.filter(pk=instance.pk).update(reminder_sent_at=None)
+    # Срок сообщения новой задачи записан в INSERT (set_reminder_schedule),
+    # событие outbox - отдельным INSERT. У измененной задачи и то и
+    # другое записывает запрос, увеличивающий версию
+    if created:
+        eta = instance.reminder_scheduled_for
+        if eta is not None:
+            add_reminder_events(
+                [(instance.pk, instance.reminder_version, eta)],
+                using=instance._state.db,
+            )
+    else:
+        eta = get_reminder_eta(instance, now)
+        instance.reminder_version = bump_reminder_version(
+            instance.pk,
+            reset_sent=is_open and instance.end_date > now,
+            scheduled_for=eta,
+        )
+        instance.reminder_scheduled_for = eta
 
-    # Проверка, что дедлайн в будущем
-    if instance.end_date <= now:
-        print(LOG_SIGNALS_DEADLINE_PASSED.format(instance.name))
+    # Выполненной или отмененной задаче напоминание не нужно
+    if not is_open:
+        print(LOG_SIGNALS_TASK_CLOSED.format(instance.name))
+        return
 
-        # Отмена существующей задачи если есть
-        cancel_existing_reminder(instance.pk, instance.name)
-        delete_reminder_task_id(instance.pk)
+    # В режиме sweep напоминание отправит sweep_reminders по end_date,
+    # достаточно сброшенного reminder_sent_at
+    if settings.REMINDER_MODE == REMINDER_MODE_SWEEP:
         return
 
-    # Конвертация в UTC для Celery
-    eta_utc = instance.end_date.astimezone(datetime_timezone.utc)
+    # Проверка, что дедлайн в будущем
+    if eta is None:
+        print(LOG_SIGNALS_DEADLINE_PASSED.format(instance.name))
+        return
 
-    if created:
-        # Новая задача - отменяет старую задачу и планирует новую
-        cancel_existing_reminder(
-            instance.pk,
-            instance.name,
-        )
+    log_message = (
+        LOG_SIGNALS_NOTIFICATION_SCHEDULED
+        if created
+        else LOG_SIGNALS_NOTIFICATION_RESCHEDULED
+    )
+    print(log_message.format(instance.name, eta.isoformat()))
 
-        result = send_task_reminder.apply_async(
-            args=(instance.pk,),
-            eta=eta_utc,
-        )
 
-        set_reminder_task_id(
-            instance.pk,
-            result.id,
-        )
+def reset_task_stats(instance: Task, changed: set[str]) -> None:
+    """
+    Сбрасывает кэш статистики владельца задачи, а при смене
+    владельца - и прежнего владельца. Одна команда delete_many
+    после коммита: откатившийся save() кэш не трогает.
+    """
 
-        print(
-            LOG_SIGNALS_NOTIFICATION_SCHEDULED.format(
-                instance.name,
-                eta_utc.isoformat(),
-            )
-        )
+    user_ids = [instance.user_id]
+    previous_user_id = instance.get_loaded_value("user_id")
+    if "user_id" in changed and previous_user_id is not None:
+        user_ids.append(previous_user_id)
+    transaction.on_commit(
+        lambda: invalidate_user_stats(*user_ids),
+        using=instance._state.db,
+    )
 
-    else:
-        # Отмена существующей задачи
-        was_cancelled = cancel_existing_reminder(
-            instance.pk,
-            instance.name,
-        )
 
-        # Планирование нового напоминания
-        result = send_task_reminder.apply_async(
-            args=(instance.pk,),
-            eta=eta_utc,
-        )
+@receiver(pre_save, sender=Task)
+def set_reminder_schedule(
+    sender,
+    instance: Task,
+    **kwargs,
+):
+    """
+    Срок сообщения Celery новой задачи попадает в тот же INSERT:
+    отдельный UPDATE после планирования не нужен.
+    """
 
-        set_reminder_task_id(
-            instance.pk,
-            result.id,
+    if instance._state.adding and has_telegram_user(instance):
+        instance.reminder_scheduled_for = get_reminder_eta(
+            instance,
+            timezone.now(),
         )
 
-        if was_cancelled:
-            print(
-                LOG_SIGNALS_NOTIFICATION_RESCHEDULED.format(
-                    instance.name,
-                    eta_utc.isoformat(),
-                )
-            )
-        else:
-            print(
-                LOG_SIGNALS_NOTIFICATION_SCHEDULED.format(
-                    instance.name,
-                    eta_utc.isoformat(),
-                )
-            )
-
 
 @receiver(post_save, sender=Task)
-def cleanup_past_reminders(
+def on_task_saved(
     sender,
     instance: Task,
     created,
+    update_fields=None,
     **kwargs,
 ):
-    """Очистка данных о напоминаниях для задач с прошедшим дедлайном."""
+    """
+    Единственный обработчик post_save задачи.
 
-    if created:
-        return
+    Смотрит, какие поля изменил этот save() (Task.get_changed_fields):
+    правка названия или описания не трогает ни напоминание в Celery,
+    ни кэш статистики.
+    """
 
-    now = timezone.now()
+    changed = instance.get_changed_fields()
+    if update_fields is not None:
+        changed &= {
+            Task._meta.get_field(name).attname for name in update_fields
+        }
 
-    # Проверка стала ли дата завершения в прошлом
-    if instance.end_date <= now:
-        cancel_existing_reminder(
-            instance.pk,
-            instance.name,
-        )
-        delete_reminder_task_id(instance.pk)
+    if changed & Task.STATS_FIELDS:
+        reset_task_stats(instance, changed)
+
+    if created or changed & Task.REMINDER_FIELDS:
+        schedule_task_reminder(instance, created)
+    else:
+        print(LOG_SIGNALS_REMINDER_UNCHANGED.format(instance.name))
+
+
+@receiver(post_delete, sender=Task)
+def reset_user_stats(
+    sender,
+    instance: Task,
+    **kwargs,
+):
+    """
+    Сброс кэша статистики владельца удаленной задачи после коммита.
+    Ключ строится по instance.user_id: владелец не загружается.
+    """
+
+    user_id = instance.user_id
+    transaction.on_commit(
+        lambda: invalidate_user_stats(user_id),
+        using=instance._state.db,
+    )
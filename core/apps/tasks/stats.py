@@ -0,0 +1,130 @@
+"""
+Документация:
+https://docs.djangoproject.com/en/5.2/topics/db/aggregation/
+https://docs.djangoproject.com/en/5.2/topics/cache/#the-low-level-cache-api
+"""
+
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .constants import STATS_CACHE_TIMEOUT, STATS_USER_CACHE_TIMEOUT
+from .models import Task
+
+User = get_user_model()
+
+
+def get_stats_cache_key(user_id: int) -> str:
+    """Ключ кэша статистики пользователя по user_id."""
+
+    return f"task_stats_{user_id}"
+
+
+def get_stats_user_id(username: str) -> int | None:
+    """
+    user_id по username (tg_123) для ключа кэша статистики.
+
+    Связка username и user_id не меняется, поэтому она тоже
+    кэшируется: запрос к статистике из кэша не обращается к БД.
+    Несуществующий пользователь не кэшируется.
+    """
+
+    cache_key = f"task_stats_user_{username}"
+    user_id = cache.get(cache_key)
+    if user_id is None:
+        user_id = (
+            User.objects.filter(username=username)
+            .values_list("pk", flat=True)
+            .first()
+        )
+        if user_id is not None:
+            cache.set(cache_key, user_id, timeout=STATS_USER_CACHE_TIMEOUT)
+    return user_id
+
+
+def compute_user_stats(user_id: int | None) -> dict:
+    """
+    Считает статистику задач пользователя одним GROUP BY запросом.
+
+    Строк в результате столько, сколько категорий у пользователя,
+    итоговые значения суммируются уже в Python. Все счетчики,
+    кроме done, считают только открытые задачи.
+    """
+
+    now = timezone.now()
+    week_end = now + timedelta(days=7)
+    is_open = Q(status=Task.Status.OPEN)
+
+    rows = (
+        Task.objects.filter(user_id=user_id)
+        .values("category__name")
+        .annotate(
+            total=Count("pk", filter=is_open),
+            done=Count("pk", filter=Q(status=Task.Status.DONE)),
+            overdue=Count("pk", filter=is_open & Q(end_date__lt=now)),
+            due_week=Count(
+                "pk",
+                filter=is_open & Q(end_date__gte=now, end_date__lt=week_end),
+            ),
+            reminders_pending=Count(
+                "pk",
+                filter=is_open
+                & Q(end_date__gte=now, reminder_sent_at__isnull=True),
+            ),
+        )
+        # Сброс Meta.ordering, иначе creation_date попадет в GROUP BY
+        .order_by()
+    )
+
+    stats = {
+        "total": 0,
+        "done": 0,
+        "overdue": 0,
+        "due_week": 0,
+        "reminders_pending": 0,
+        "categories": [],
+        "generated_at": now.isoformat(),
+    }
+    counters = ("total", "done", "overdue", "due_week", "reminders_pending")
+    for row in rows:
+        for field in counters:
+            stats[field] += row[field]
+        # В разбивке по категориям - только открытые задачи
+        if row["total"]:
+            stats["categories"].append(
+                {"name": row["category__name"], "total": row["total"]}
+            )
+
+    stats["categories"].sort(key=lambda item: -item["total"])
+    return stats
+
+
+def get_user_stats(username: str) -> dict:
+    """
+    Возвращает статистику из кэша или пересчитывает ее.
+    У несуществующего пользователя статистика пустая.
+    """
+
+    user_id = get_stats_user_id(username)
+    if user_id is None:
+        return compute_user_stats(None)
+
+    cache_key = get_stats_cache_key(user_id)
+    stats = cache.get(cache_key)
+    if stats is None:
+        stats = compute_user_stats(user_id)
+        cache.set(cache_key, stats, timeout=STATS_CACHE_TIMEOUT)
+    return stats
+
+
+def invalidate_user_stats(*user_ids: int) -> None:
+    """
+    Сбрасывает кэш статистики после изменения задач пользователей.
+    Ключи всех пользователей удаляются одной командой (delete_many),
+    user_id есть в самой задаче, поэтому запросы к БД не нужны.
+    """
+
+    cache.delete_many([get_stats_cache_key(user_id) for user_id in user_ids])
@@ -3,146 +3,328 @@
 https://docs.celeryq.dev/en/stable/django/first-steps-with-django.html
 """
 
+import time
+
 from celery import shared_task
 from django.utils import timezone
-import requests
 
-from .models import Task
+from .agenda import complete_agenda_batch, iter_agenda_batches
+from .archive import archive_expired_tasks
+from .delivery import DeliveryReport, deliver_messages
+from .metrics import (
+    REMINDERS_SKIPPED,
+    TELEGRAM_API_LATENCY,
+    TELEGRAM_MESSAGES,
+    TELEGRAM_RESPONSES,
+    record_metrics,
+    record_offset_reminder_delivery,
+    record_reminder_delivery,
+)
+from .outbox import relay_outbox_events
+from .recurrence import advance_missed_occurrences
+from .reminders import (
+    REMINDER_MODE_ETA,
+    REMINDER_MODE_OFFSET,
+    REMINDER_MODE_SWEEP,
+    build_offset_reminder_messages,
+    build_reminder_messages,
+    claim_due_offset_reminders,
+    claim_due_reminders,
+    claim_task_reminders,
+)
 from .constants import (
     TELEGRAM_API_URL,
-    LOG_CELERY_TASK_NOT_FOUND,
-    LOG_CELERY_NO_TELEGRAM_USER,
-    LOG_CELERY_INVALID_USERNAME_FORMAT,
+    TELEGRAM_LIMITS_KEY,
     LOG_CELERY_MESSAGE_SENT,
-    LOG_CELERY_TELEGRAM_API_ERROR,
-    LOG_CELERY_SEND_ERROR,
+    LOG_CELERY_REMINDER_SKIPPED,
+    LOG_CELERY_DELIVERY_REPORT,
     LOG_CELERY_MISSING_CREDENTIALS,
-    REMINDER_MESSAGE_TEMPLATE,
-    EMPTY_DESCRIPTION,
-    EMPTY_CATEGORY,
-    RUSSIAN_MONTHS,
+    LOG_CELERY_TASKS_ARCHIVED,
+    LOG_CELERY_OUTBOX_RELAYED,
+    LOG_CELERY_REMINDERS_SWEPT,
+    LOG_CELERY_OFFSET_REMINDERS_SENT,
+    LOG_CELERY_AGENDAS_SENT,
+    LOG_CELERY_RECURRING_ADVANCED,
+    REMINDER_OFFSETS_BATCH_SIZE,
+    REMINDER_OFFSETS_MAX_BATCHES,
+    REMINDER_SWEEP_BATCH_SIZE,
+    REMINDER_SWEEP_MAX_BATCHES,
 )
 
 
-def send_tg_message(chat_id: int, text: str) -> None:
+def deliver_tg_messages(messages: list[tuple[int, str]]) -> DeliveryReport:
     """
-    ОТПРАВЛЯЕТ СООБЩЕНИЕ В TELEGRAM ЧЕРЕЗ BOT API
+    ОТПРАВЛЯЕТ ПАЧКУ СООБЩЕНИЙ В TELEGRAM ЧЕРЕЗ BOT API
 
     Что делает:
-    1. Проверяет наличие токена бота и ID чата
-    2. Отправляет POST-запрос к Telegram API
-    3. Обрабатывает возможные ошибки
-    4. Логирует результат отправки
+    1. Проверяет наличие токена бота и ID чатов
+    2. Отправляет сообщения конкурентно через DeliveryEngine
+       (пул соединений, общие для воркеров лимиты Telegram,
+       429 retry_after, повторы)
+    3. Логирует итог доставки и записывает метрики: время ответа
+       API, коды ответов, доставлено и не доставлено
 
     Параметры:
-    - chat_id: ID пользователя в Telegram (123456789)
-    - text: Текст сообщения для отправки
+    - messages: список пар (ID пользователя в Telegram, текст)
 
-    Пример вызова:
-    send_tg_message(123456789, "⏰ Напоминание о задаче!")
+    Возвращает итоги доставки (DeliveryReport). Без токена бота
+    все сообщения остаются недоставленными (report.undelivered).
     """
 
     from .constants import BOT_TOKEN
 
-    if not BOT_TOKEN or not chat_id:
+    missing = [chat_id for chat_id, _ in messages if not chat_id]
+    if not BOT_TOKEN or missing:
         print(
             LOG_CELERY_MISSING_CREDENTIALS.format(
                 bool(BOT_TOKEN),
-                chat_id,
+                missing or "ok",
             )
         )
-        return
+    messages = [(chat_id, text) for chat_id, text in messages if chat_id]
+    if not BOT_TOKEN or not messages:
+        return DeliveryReport(
+            undelivered={chat_id for chat_id, _ in messages},
+        )
 
-    try:
-        response = requests.post(
-            TELEGRAM_API_URL,
-            json={
-                "chat_id": chat_id,
-                "text": text,
-                "parse_mode": "HTML",
-            },
-            timeout=10,
+    # Лимиты Telegram общие для всех вызовов и воркеров (Redis):
+    # в режиме eta каждое напоминание - отдельный вызов
+    report = deliver_messages(
+        messages,
+        api_url=TELEGRAM_API_URL,
+        limits_key=TELEGRAM_LIMITS_KEY,
+    )
+
+    with record_metrics() as metrics:
+        for latency in report.latencies:
+            metrics.observe(TELEGRAM_API_LATENCY, latency)
+        for code, count in report.statuses.items():
+            metrics.inc(TELEGRAM_RESPONSES, {"code": code}, count)
+        metrics.inc(TELEGRAM_MESSAGES, {"outcome": "sent"}, report.sent)
+        metrics.inc(TELEGRAM_MESSAGES, {"outcome": "failed"}, report.failed)
+
+    print(
+        LOG_CELERY_DELIVERY_REPORT.format(
+            report.sent,
+            report.failed,
+            report.retries,
+            report.elapsed,
         )
-        if response.status_code != 200:
-            print(
-                LOG_CELERY_TELEGRAM_API_ERROR.format(
-                    response.status_code,
-                    response.text,
-                )
-            )
-        else:
-            print(LOG_CELERY_MESSAGE_SENT.format(chat_id))
-    except Exception as e:
-        print(LOG_CELERY_SEND_ERROR.format(e))
+    )
+    return report
 
 
-def format_russian_datetime(dt):
-    """Форматирование даты в русский формат."""
+def send_tg_messages(messages: list[tuple[int, str]]) -> int:
+    """
+    ОТПРАВЛЯЕТ ПАЧКУ СООБЩЕНИЙ В TELEGRAM (deliver_tg_messages)
 
-    hour = dt.hour
-    minute = f"{dt.minute:02d}"
+    Возвращает количество доставленных сообщений.
+    """
 
-    return f"{hour}:{minute}, {dt.day} {RUSSIAN_MONTHS[dt.month-1]} {dt.year}"
+    return deliver_tg_messages(messages).sent
 
 
-@shared_task
-def send_task_reminder(task_pk):
+@shared_task(bind=True, ignore_result=True)
+def send_task_reminder(self, task_pk, version=None):
     """
     ОТПРАВЛЯЕТ НАПОМИНАНИЕ В TELEGRAM О ЗАДАЧЕ
 
     Что делает:
-    1. Находит задачу в базе данных по primary key
-    2. Извлекает Telegram ID пользователя из username (формат: tg_123456)
-    3. Форматирует дату выполнения в русском формате
-    4. Отправляет сообщение в Telegram пользователю
+    1. Сверяет version с версией напоминания задачи: если задачу
+       изменили после планирования, сообщение устарело и ничего
+       не отправляет (вместо отмены через revoke)
+    2. Атомарно помечает отправленными напоминание задачи и задач того
+       же пользователя со сроком в пределах REMINDER_COALESCE_WINDOW
+       (не более одного раза, claim_task_reminders)
+    3. Извлекает Telegram ID пользователя из username (формат: tg_123456)
+    4. Отправляет одно сообщение на все эти задачи в Telegram
+    5. Записывает метрики: опоздание каждого напоминания относительно
+       end_date и ожидание сообщения в очереди после ETA
 
-    Пример сообщения:
-    ⏰ Напоминание о задаче
-
-    📌 Купить молоко
-    📃 Не меньше 3,2%
-    🔥 Срок выполнения: 8:00, 15 октября 2025
-    🔖 Категория: Покупки
+    Используется в режиме REMINDER_MODE=eta, в режиме sweep
+    напоминания отправляет sweep_reminders.
     """
 
-    now = timezone.now()
-    updated = Task.objects.filter(
-        pk=task_pk,
-        reminder_sent_at__isnull=True,
-    ).update(reminder_sent_at=now)
+    started = timezone.now()
 
-    if updated == 0:
+    tasks = claim_task_reminders(task_pk, version)
+    if not tasks:
+        print(LOG_CELERY_REMINDER_SKIPPED.format(task_pk, version))
+        with record_metrics() as metrics:
+            metrics.inc(REMINDERS_SKIPPED)
         return
 
-    try:
-        task = Task.objects.select_related("user", "category").get(pk=task_pk)
-    except Task.DoesNotExist:
-        print(LOG_CELERY_TASK_NOT_FOUND.format(task_pk))
-        return
+    # Части сообщения уходят одной пачкой через общий пул соединений
+    messages = list(build_reminder_messages(tasks))
+    if send_tg_messages(messages):
+        print(LOG_CELERY_MESSAGE_SENT.format(messages[0][0]))
 
-    # Извлечение telegram_id из username пользователя (формат: tg_123456)
-    if not task.user or not task.user.username.startswith("tg_"):
-        print(LOG_CELERY_NO_TELEGRAM_USER.format(task.name))
-        return
+    with record_metrics() as metrics:
+        record_reminder_delivery(
+            metrics,
+            tasks,
+            REMINDER_MODE_ETA,
+            eta=self.request.eta,
+            started=started,
+        )
 
-    try:
-        telegram_id = int(task.user.username.replace("tg_", ""))
-    except (ValueError, AttributeError):
-        print(LOG_CELERY_INVALID_USERNAME_FORMAT.format(task.user.username))
-        return
 
-    # Конвертация времени в часовой зоне Москвы для отображения
-    moscow_tz = timezone.get_current_timezone()
-    local_dt = timezone.localtime(task.end_date, moscow_tz)
+@shared_task
+def sweep_reminders():
+    """
+    ОТПРАВЛЯЕТ НАСТУПИВШИЕ НАПОМИНАНИЯ ИЗ БАЗЫ ДАННЫХ (REMINDER_MODE=sweep)
 
-    # Формирование сообщения
-    description = task.description or EMPTY_DESCRIPTION
-    category_name = task.category.name if task.category else EMPTY_CATEGORY
-    formatted_date = format_russian_datetime(local_dt)
+    Запускается celery beat каждые REMINDER_SWEEP_INTERVAL секунд.
+    Вместо сообщения с ETA на каждую задачу брокер получает одно
+    сообщение за интервал, а сами напоминания выбираются из PostgreSQL
+    пачками (claim_due_reminders, FOR UPDATE SKIP LOCKED).
+    Несколько воркеров могут выполнять sweep параллельно.
+    Напоминания одного пользователя уходят одним сообщением.
+    """
 
-    # Напоминание о задаче
-    message = REMINDER_MESSAGE_TEMPLATE.format(
-        task.name, description, formatted_date, category_name
-    )
+    sent = 0
+    for _ in range(REMINDER_SWEEP_MAX_BATCHES):
+        tasks = claim_due_reminders(REMINDER_SWEEP_BATCH_SIZE)
+
+        messages = build_reminder_messages(tasks)
+
+        # Пачка доставляется конкурентно в пределах лимитов Telegram
+        if messages:
+            sent += send_tg_messages(messages)
+            with record_metrics() as metrics:
+                record_reminder_delivery(metrics, tasks, REMINDER_MODE_SWEEP)
+
+        if len(tasks) < REMINDER_SWEEP_BATCH_SIZE:
+            break
+
+    if sent:
+        print(LOG_CELERY_REMINDERS_SWEPT.format(sent))
+
+
+@shared_task(ignore_result=True)
+def send_offset_reminders():
+    """
+    ОТПРАВЛЯЕТ НАПОМИНАНИЯ ДО СРОКА (ReminderOffset: за день, за час...)
+
+    Запускается celery beat каждые REMINDER_OFFSETS_INTERVAL секунд
+    в любом режиме напоминаний. Наступившие напоминания всех отступов
+    выбираются пачками по одному индексу next_fire_at
+    (claim_due_offset_reminders, FOR UPDATE SKIP LOCKED), поэтому
+    новые отступы не добавляют сообщений в брокер. Несколько воркеров
+    могут выполнять его параллельно.
+    """
+
+    reminders_sent = 0
+    sent = 0
+    for _ in range(REMINDER_OFFSETS_MAX_BATCHES):
+        claimed, reminders = claim_due_offset_reminders(
+            REMINDER_OFFSETS_BATCH_SIZE,
+        )
+
+        messages = build_offset_reminder_messages(reminders)
+        if messages:
+            sent += send_tg_messages(messages)
+            reminders_sent += len(reminders)
+            with record_metrics() as metrics:
+                record_offset_reminder_delivery(
+                    metrics,
+                    reminders,
+                    REMINDER_MODE_OFFSET,
+                )
 
-    send_tg_message(telegram_id, message)
+        if claimed < REMINDER_OFFSETS_BATCH_SIZE:
+            break
+
+    if reminders_sent:
+        print(LOG_CELERY_OFFSET_REMINDERS_SENT.format(reminders_sent, sent))
+
+
+@shared_task
+def send_agendas():
+    """
+    ОТПРАВЛЯЕТ УТРЕННИЕ СВОДКИ ЗАДАЧ (AgendaSubscription)
+
+    Запускается celery beat каждые 5 минут и отправляет сводку тем
+    подписчикам, чье время send_at уже наступило, а сегодняшней сводки
+    еще не было. Подписки обходятся пачками (iter_agenda_batches),
+    сообщения пачки доставляются через deliver_tg_messages, и только
+    после доставки пачка отмечается отправленной
+    (complete_agenda_batch). Сводки, не доставленные из-за сети,
+    5xx или лимитов Telegram, уйдут следующим запуском.
+    """
+
+    started = time.perf_counter()
+    subscriptions = 0
+    sent = 0
+    retried = 0
+
+    for batch in iter_agenda_batches():
+        subscriptions += len(batch.user_ids)
+        undelivered = set()
+        if batch.messages:
+            report = deliver_tg_messages(batch.messages)
+            sent += report.sent
+            undelivered = report.undelivered
+        retried += complete_agenda_batch(batch, undelivered)
+
+    if subscriptions:
+        print(
+            LOG_CELERY_AGENDAS_SENT.format(
+                subscriptions,
+                sent,
+                retried,
+                time.perf_counter() - started,
+            )
+        )
+
+
+@shared_task(ignore_result=True)
+def advance_recurring_tasks():
+    """
+    ПЕРЕНОСИТ ПРОПУЩЕННЫЕ ВХОЖДЕНИЯ ПОВТОРЯЮЩИХСЯ ЗАДАЧ
+
+    Запускается celery beat каждые RECURRENCE_ADVANCE_INTERVAL секунд.
+    Выполненные вхождения переносит сам Task.save, здесь - только те,
+    чей срок прошел без выполнения, к началу дня следующего вхождения
+    (advance_missed_occurrences).
+    """
+
+    advanced = advance_missed_occurrences()
+    if advanced:
+        print(LOG_CELERY_RECURRING_ADVANCED.format(advanced))
+
+
+@shared_task
+def archive_tasks():
+    """
+    ПЕРЕНОСИТ В АРХИВ ЗАДАЧИ С ИСТЕКШИМ СРОКОМ ХРАНЕНИЯ
+
+    Запускается celery beat (CELERY_BEAT_SCHEDULE), срок хранения -
+    ARCHIVE_RETENTION_DAYS дней после end_date.
+    То же самое вручную: python manage.py archive_tasks
+    """
+
+    result = archive_expired_tasks()
+    print(LOG_CELERY_TASKS_ARCHIVED.format(result.archived, result.elapsed))
+
+
+@shared_task(ignore_result=True)
+def relay_outbox():
+    """
+    ПУБЛИКУЕТ СОБЫТИЯ OUTBOX В БРОКЕР (OutboxEvent)
+
+    Запускается celery beat каждые OUTBOX_RELAY_INTERVAL секунд.
+    Изменения задач записывают сообщения Celery в outbox в своей
+    транзакции, а этот relay публикует их пачками и удаляет.
+    Ошибка брокера откатывает пачку - ее опубликует следующий запуск.
+    То же самое вручную: python manage.py relay_outbox
+    """
+
+    result = relay_outbox_events()
+    if result.published:
+        print(
+            LOG_CELERY_OUTBOX_RELAYED.format(
+                result.published,
+                result.elapsed,
+            )
+        )
@@ -0,0 +1,179 @@
+"""
+Документация:
+https://docs.aiohttp.org/en/stable/web_lowlevel.html
+https://core.telegram.org/bots/api#making-requests
+
+Локальная заглушка Bot API для тестов и замеров доставки.
+Отвечает на sendMessage с задержкой, соблюдает лимиты Telegram
+(429 с parameters.retry_after) и может возвращать ошибки.
+
+Использование:
+server = FakeTelegramServer(latency=0.15)
+api_url = server.start()
+...
+server.stop()
+print(server.stats)
+"""
+
+import asyncio
+import random
+import socket
+import threading
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+
+from aiohttp import web
+
+# Запас на разброс задержек сети при проверке лимитов
+LIMIT_TOLERANCE = 0.05
+
+
+@dataclass
+class FakeTelegramStats:
+    """Что увидел сервер."""
+
+    received: int = 0
+    sent: int = 0
+    rate_limited: int = 0
+    errors: int = 0
+    in_flight: int = 0
+    max_in_flight: int = 0
+    # Время принятых сообщений по чатам
+    chats: dict = field(default_factory=lambda: defaultdict(list))
+
+
+class FakeTelegramServer:
+    """
+    Заглушка sendMessage в отдельном потоке со своим event loop.
+
+    - latency: задержка ответа, с
+    - global_limit: сообщений в секунду всем ботом (None - без лимита)
+    - chat_limit: сообщений в секунду в один чат (None - без лимита)
+    - retry_after: значение parameters.retry_after в ответе 429
+    - error_rate: доля ответов 500
+    - responses: коды ответов для первых запросов, по порядку
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        global_limit: int | None = 30,
+        chat_limit: int | None = 1,
+        retry_after: int = 1,
+        error_rate: float = 0.0,
+        responses: list[int] | None = None,
+    ):
+        self.latency = latency
+        self.global_limit = global_limit
+        self.chat_limit = chat_limit
+        self.retry_after = retry_after
+        self.error_rate = error_rate
+        self.responses = deque(responses or [])
+
+        self.stats = FakeTelegramStats()
+        self.recent = deque()
+        self.port = None
+        self.loop = None
+        self.runner = None
+        self.thread = None
+
+    def is_over_limit(self, chat_id: int, now: float) -> bool:
+        window = 1 - LIMIT_TOLERANCE
+        while self.recent and now - self.recent[0] > window:
+            self.recent.popleft()
+        if self.global_limit and len(self.recent) >= self.global_limit:
+            return True
+
+        if self.chat_limit:
+            chat_times = self.stats.chats[chat_id]
+            in_window = [t for t in chat_times if now - t <= window]
+            if len(in_window) >= self.chat_limit:
+                return True
+        return False
+
+    def get_status(self, chat_id: int) -> int:
+        if self.responses:
+            return self.responses.popleft()
+        if self.error_rate and random.random() < self.error_rate:
+            return 500
+        if self.is_over_limit(chat_id, time.monotonic()):
+            return 429
+        return 200
+
+    async def send_message(self, request: web.Request) -> web.Response:
+        stats = self.stats
+        stats.received += 1
+        stats.in_flight += 1
+        stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+        try:
+            payload = await request.json()
+            chat_id = payload["chat_id"]
+            await asyncio.sleep(self.latency)
+
+            status = self.get_status(chat_id)
+            if status == 200:
+                now = time.monotonic()
+                stats.sent += 1
+                stats.chats[chat_id].append(now)
+                self.recent.append(now)
+                return web.json_response(
+                    {
+                        "ok": True,
+                        "result": {
+                            "message_id": stats.sent,
+                            "chat": {"id": chat_id},
+                            "text": payload.get("text", ""),
+                        },
+                    }
+                )
+            if status == 429:
+                stats.rate_limited += 1
+                return web.json_response(
+                    {
+                        "ok": False,
+                        "error_code": 429,
+                        "description": f"Too Many Requests: retry after {self.retry_after}",  # noqa: E501
+                        "parameters": {"retry_after": self.retry_after},
+                    },
+                    status=429,
+                )
+            stats.errors += 1
+            return web.json_response(
+                {"ok": False, "error_code": status, "description": "Error"},
+                status=status,
+            )
+        finally:
+            stats.in_flight -= 1
+
+    async def serve(self) -> None:
+        app = web.Application()
+        app.router.add_post("/bot{token}/sendMessage", self.send_message)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        self.port = sock.getsockname()[1]
+        await web.SockSite(self.runner, sock).start()
+
+    def start(self) -> str:
+        """Запускает сервер, возвращает адрес sendMessage."""
+
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(
+            self.serve(),
+            self.loop,
+        ).result(timeout=5)
+        return f"http://127.0.0.1:{self.port}/botTEST/sendMessage"
+
+    def stop(self) -> None:
+        asyncio.run_coroutine_threadsafe(
+            self.runner.cleanup(),
+            self.loop,
+        ).result(timeout=5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5)
+        self.loop.close()
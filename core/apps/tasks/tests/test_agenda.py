@@ -0,0 +1,187 @@
+"""
+Документация:
+https://docs.djangoproject.com/en/5.2/topics/testing/tools/#django.test.TransactionTestCase.assertNumQueries
+
+Утренняя сводка: пачки подписок, число запросов на пачку,
+содержание сообщений, повтор недоставленных сводок и подписка
+после времени сегодняшней сводки.
+
+Запуск:
+make test
+"""
+
+from datetime import datetime, time, timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from core.apps.tasks.agenda import (
+    complete_agenda_batch,
+    iter_agenda_batches,
+    subscribe_agenda,
+)
+from core.apps.tasks.constants import (
+    AGENDA_CLAIM_TIMEOUT_MINUTES,
+    AGENDA_TASKS_LIMIT,
+)
+from core.apps.tasks.models import AgendaSubscription, Task
+
+User = get_user_model()
+
+FIRST_TELEGRAM_ID = 300500
+
+
+class AgendaBatchTest(TestCase):
+    """Сводки отправляются пачками, по два запроса на пачку."""
+
+    @classmethod
+    def setUpTestData(cls):
+        # 10:00 по Москве: подписки на 08:00 уже пора отправлять
+        cls.now = datetime.combine(
+            timezone.localdate(),
+            time(10, 0),
+            tzinfo=timezone.get_current_timezone(),
+        )
+
+        cls.users = [
+            User.objects.create(username=f"tg_{FIRST_TELEGRAM_ID + i}")
+            for i in range(5)
+        ]
+        AgendaSubscription.objects.bulk_create(
+            [AgendaSubscription(user=user) for user in cls.users[:4]]
+        )
+        # Сводка позже по времени, выключенная сводка
+        # и пользователь без подписки
+        AgendaSubscription.objects.filter(user=cls.users[2]).update(
+            send_at=time(18, 0),
+        )
+        AgendaSubscription.objects.filter(user=cls.users[3]).update(
+            is_active=False,
+        )
+
+        tasks = []
+        for index, user in enumerate(cls.users):
+            # Первому пользователю - больше задач, чем помещается
+            count = AGENDA_TASKS_LIMIT + 5 if index == 0 else 2
+            for i in range(count):
+                tasks.append(
+                    Task(
+                        id=f"a{index}{i:014d}",
+                        name=f"Сводка {index}-{i}",
+                        end_date=cls.now + timedelta(minutes=10 * (i - 1)),
+                        user=user,
+                    )
+                )
+            # Завтрашняя и выполненная задачи в сводку не попадают
+            tasks.append(
+                Task(
+                    id=f"b{index}{0:014d}",
+                    name=f"Завтра {index}",
+                    end_date=cls.now + timedelta(days=1, hours=1),
+                    user=user,
+                )
+            )
+            tasks.append(
+                Task(
+                    id=f"c{index}{0:014d}",
+                    name=f"Выполнена {index}",
+                    end_date=cls.now,
+                    status=Task.Status.DONE,
+                    user=user,
+                )
+            )
+        Task.objects.bulk_create(tasks)
+
+    def test_batches(self):
+        batches = iter_agenda_batches(now=self.now, batch_size=1)
+
+        with self.assertNumQueries(2):
+            first = next(batches)
+        with self.assertNumQueries(2):
+            second = next(batches)
+        with self.assertNumQueries(1):
+            self.assertEqual(list(batches), [])
+
+        self.assertEqual(
+            first.user_ids + second.user_ids,
+            [self.users[0].pk, self.users[1].pk],
+        )
+
+        telegram_id, text = first.messages[0]
+        self.assertEqual(telegram_id, FIRST_TELEGRAM_ID)
+        self.assertIn("Просрочено", text)
+        self.assertIn("Сводка 0-0", text)
+        self.assertIn(f"Сводка 0-{AGENDA_TASKS_LIMIT - 1}", text)
+        self.assertNotIn(f"Сводка 0-{AGENDA_TASKS_LIMIT}", text)
+        self.assertNotIn("Завтра", text)
+        self.assertNotIn("Выполнена", text)
+        self.assertIn("...и еще задач: 5", text)
+
+        # Повторный запуск в тот же день ничего не отправляет
+        self.assertEqual(list(iter_agenda_batches(now=self.now)), [])
+
+    def test_one_batch(self):
+        with self.assertNumQueries(2):
+            batches = list(iter_agenda_batches(now=self.now))
+
+        self.assertEqual(len(batches), 1)
+        self.assertEqual(len(batches[0].messages), 2)
+        # Захваченная пачка до отметки отправленной не считается
+        self.assertFalse(
+            AgendaSubscription.objects.filter(
+                last_sent_on=self.now.date(),
+            ).exists(),
+        )
+
+        with self.assertNumQueries(1):
+            complete_agenda_batch(batches[0], set())
+        self.assertEqual(
+            AgendaSubscription.objects.filter(
+                last_sent_on=self.now.date(),
+                claimed_at__isnull=True,
+            ).count(),
+            2,
+        )
+
+    def test_undelivered_retried(self):
+        batch = next(iter_agenda_batches(now=self.now))
+
+        # Сообщение второго пользователя не доставлено (сеть, 5xx)
+        self.assertEqual(
+            complete_agenda_batch(batch, {FIRST_TELEGRAM_ID + 1}),
+            1,
+        )
+
+        retry = next(iter_agenda_batches(now=self.now))
+        self.assertEqual(retry.user_ids, [self.users[1].pk])
+
+    def test_expired_claim_retried(self):
+        # Воркер упал, не отметив пачку
+        list(iter_agenda_batches(now=self.now))
+        self.assertEqual(list(iter_agenda_batches(now=self.now)), [])
+
+        later = self.now + timedelta(minutes=AGENDA_CLAIM_TIMEOUT_MINUTES + 1)
+        self.assertEqual(len(list(iter_agenda_batches(now=later))), 1)
+
+    def test_subscribe_after_send_at(self):
+        telegram_id = FIRST_TELEGRAM_ID + 4
+        send_at = time(8, 0)
+
+        with mock.patch(
+            "django.utils.timezone.now",
+            return_value=self.now,
+        ):
+            subscription = subscribe_agenda(telegram_id, send_at)
+
+        # 08:00 сегодня уже прошло: первая сводка - завтра
+        self.assertEqual(subscription.last_sent_on, self.now.date())
+        self.assertNotIn(
+            self.users[4].pk,
+            [
+                user_id
+                for batch in iter_agenda_batches(now=self.now)
+                for user_id in batch.user_ids
+            ],
+        )
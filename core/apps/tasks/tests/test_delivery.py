@@ -0,0 +1,154 @@
+"""
+Документация:
+https://docs.djangoproject.com/en/5.2/topics/testing/tools/#simpletestcase
+
+Доставка сообщений на локальной заглушке Bot API (без Telegram и БД).
+Общие лимиты (limits_key) проверяются на Redis (REDIS_URL).
+
+Запуск:
+make test
+"""
+
+import time
+from unittest import SkipTest
+
+import redis
+from django.test import SimpleTestCase
+
+from core.apps.tasks.delivery import deliver_messages
+from core.apps.tasks.utils import get_redis_client
+from core.apps.tasks.tests.fake_telegram import FakeTelegramServer
+
+
+class DeliveryEngineTestCase(SimpleTestCase):
+    """Конкурентность, лимиты Telegram и повторы DeliveryEngine."""
+
+    def start_server(self, **options) -> str:
+        self.server = FakeTelegramServer(**options)
+        api_url = self.server.start()
+        self.addCleanup(self.server.stop)
+        return api_url
+
+    def deliver(self, api_url: str, messages, **options):
+        options.setdefault("global_rate", 1000)
+        options.setdefault("global_burst", 1000)
+        options.setdefault("backoff_base", 0.01)
+        return deliver_messages(messages, api_url=api_url, **options)
+
+    def test_concurrent_delivery(self):
+        """40 сообщений по 100 мс отправляются параллельно, а не 4 с."""
+
+        api_url = self.start_server(latency=0.1, global_limit=None)
+        messages = [(chat_id, "текст") for chat_id in range(40)]
+
+        started = time.monotonic()
+        report = self.deliver(api_url, messages, concurrency=20)
+        elapsed = time.monotonic() - started
+
+        self.assertEqual(report.sent, 40)
+        self.assertLess(elapsed, 1.5)
+        self.assertGreater(self.server.stats.max_in_flight, 10)
+        self.assertLessEqual(self.server.stats.max_in_flight, 20)
+
+    def test_chat_rate_limit(self):
+        """Сообщения в один чат идут не чаще chat_rate, без 429."""
+
+        api_url = self.start_server(chat_limit=10)
+        messages = [(1, f"текст {number}") for number in range(4)]
+
+        report = self.deliver(api_url, messages, chat_rate=10)
+
+        self.assertEqual(report.sent, 4)
+        self.assertEqual(self.server.stats.rate_limited, 0)
+        sent_at = self.server.stats.chats[1]
+        for previous, current in zip(sent_at, sent_at[1:]):
+            self.assertGreaterEqual(current - previous, 0.09)
+
+    def test_retry_after_honored(self):
+        """После 429 повтор не раньше parameters.retry_after."""
+
+        api_url = self.start_server(responses=[429], retry_after=1)
+
+        started = time.monotonic()
+        report = self.deliver(api_url, [(1, "текст")])
+        elapsed = time.monotonic() - started
+
+        self.assertEqual(report.sent, 1)
+        self.assertEqual(report.rate_limited, 1)
+        self.assertEqual(report.retries, 1)
+        self.assertGreaterEqual(elapsed, 1)
+
+    def test_server_error_retried(self):
+        """5xx повторяются с задержкой до успешной отправки."""
+
+        api_url = self.start_server(responses=[500, 502])
+
+        report = self.deliver(api_url, [(1, "текст")], chat_rate=100)
+
+        self.assertEqual(report.sent, 1)
+        self.assertEqual(report.retries, 2)
+        self.assertEqual(self.server.stats.received, 3)
+
+    def test_client_error_not_retried(self):
+        """400 (чат не найден, бот заблокирован) не повторяется."""
+
+        api_url = self.start_server(responses=[400])
+
+        report = self.deliver(api_url, [(1, "текст")])
+
+        self.assertEqual(report.sent, 0)
+        self.assertEqual(report.failed, 1)
+        self.assertEqual(report.retries, 0)
+        self.assertEqual(report.undelivered, set())
+        self.assertEqual(self.server.stats.received, 1)
+
+    def test_attempts_exhausted(self):
+        """После max_attempts ошибок сообщение считается недоставленным."""
+
+        api_url = self.start_server(error_rate=1.0)
+
+        report = self.deliver(
+            api_url,
+            [(1, "текст")],
+            chat_rate=100,
+            max_attempts=3,
+        )
+
+        self.assertEqual(report.failed, 1)
+        self.assertEqual(report.retries, 2)
+        # Временная ошибка: доставку стоит повторить позже
+        self.assertEqual(report.undelivered, {1})
+        self.assertEqual(self.server.stats.received, 3)
+
+    def test_shared_limits_across_calls(self):
+        """
+        С limits_key лимит чата общий для отдельных вызовов, как
+        у напоминаний в режиме eta: по одному сообщению на вызов.
+        """
+
+        limits_key = "test_telegram_limits"
+        client = get_redis_client()
+        try:
+            client.delete(f"{limits_key}:global", f"{limits_key}:chat:1")
+        except redis.RedisError:
+            raise SkipTest("Redis недоступен")
+        self.addCleanup(
+            client.delete,
+            f"{limits_key}:global",
+            f"{limits_key}:chat:1",
+        )
+
+        api_url = self.start_server(chat_limit=5)
+        for number in range(3):
+            report = self.deliver(
+                api_url,
+                [(1, f"текст {number}")],
+                chat_rate=5,
+                limits_key=limits_key,
+            )
+            self.assertEqual(report.sent, 1)
+
+        self.assertEqual(self.server.stats.rate_limited, 0)
+        sent_at = self.server.stats.chats[1]
+        for previous, current in zip(sent_at, sent_at[1:]):
+            self.assertGreaterEqual(current - previous, 0.19)
@@ -0,0 +1,60 @@
+"""
+Документация:
+https://docs.djangoproject.com/en/5.2/ref/request-response/#telling-the-browser-to-treat-the-response-as-a-file-attachment
+
+Экспорт задач: user_telegram_id проверяется до того, как попадет
+в имя файла заголовка Content-Disposition.
+
+Запуск:
+make test
+"""
+
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.apps.tasks.models import Task
+
+User = get_user_model()
+
+TELEGRAM_ID = 900500
+
+
+class ExportFilenameTest(TestCase):
+    """Имя файла экспорта строится только из числового ID."""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create(username=f"tg_{TELEGRAM_ID}")
+        Task.objects.create(
+            name="Экспортируемая задача",
+            end_date=timezone.now() + timedelta(days=1),
+            user=user,
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_export_invalid_telegram_id(self):
+        # Значение не попадает в заголовок Content-Disposition
+        response = self.client.get(
+            "/api/tasks/export/",
+            {
+                "user_telegram_id": '1"; filename="x.exe',
+                "export_format": "csv",
+            },
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn("Content-Disposition", response)
+
+        response = self.client.get(
+            "/api/tasks/export/",
+            {"user_telegram_id": TELEGRAM_ID, "export_format": "csv"},
+        )
+        self.assertEqual(
+            response["Content-Disposition"],
+            f'attachment; filename="tasks_{TELEGRAM_ID}.csv"',
+        )
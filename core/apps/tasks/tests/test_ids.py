@@ -0,0 +1,55 @@
+"""
+Документация:
+https://docs.djangoproject.com/en/5.2/topics/testing/tools/#simpletestcase
+
+Генератор ID: аренда номера узла ключом в Redis. После оборота
+счетчика занятый живым процессом узел пропускается.
+
+Запуск:
+make test
+"""
+
+from django.test import SimpleTestCase
+
+from core.apps.tasks.constants import ID_NODE_KEY, ID_NODE_SEQUENCE
+from core.apps.tasks.utils import (
+    ID_NODE_RELEASE_SCRIPT,
+    allocate_id_node,
+    get_id_node_script,
+    get_redis_client,
+)
+
+
+class IdNodeLeaseTest(SimpleTestCase):
+    """Два живых владельца не получают один номер узла."""
+
+    def lease(self) -> tuple[int, str]:
+        node, owner = allocate_id_node()
+        self.addCleanup(self.release, node, owner)
+        return node, owner
+
+    def release(self, node: int, owner: str) -> None:
+        get_id_node_script(ID_NODE_RELEASE_SCRIPT)(
+            keys=[ID_NODE_KEY.format(node)],
+            args=[owner],
+        )
+
+    def rewind(self, node: int) -> None:
+        # Следующий INCR счетчика вернет этот узел
+        get_redis_client().set(ID_NODE_SEQUENCE, node - 1)
+
+    def test_leased_node_skipped_after_wraparound(self):
+        node, owner = self.lease()
+
+        # Счетчик вернулся к занятому узлу
+        self.rewind(node)
+        other, _ = self.lease()
+
+        self.assertNotEqual(other, node)
+
+        # Владелец снял аренду: узел снова свободен
+        self.release(node, owner)
+        self.rewind(node)
+        again, _ = self.lease()
+
+        self.assertEqual(again, node)
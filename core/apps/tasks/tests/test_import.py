@@ -0,0 +1,69 @@
+"""
+Документация:
+https://docs.djangoproject.com/en/5.2/topics/testing/tools/#testcase
+
+Импорт задач: название, созданное параллельным запросом между
+проверкой и вставкой пачки, попадает в ошибки строки, а не в 500.
+
+Запуск:
+make test
+"""
+
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from core.apps.tasks import importer
+from core.apps.tasks.models import Task
+
+User = get_user_model()
+
+TELEGRAM_ID = 800500
+
+
+class ImportRaceTest(TestCase):
+    """Пачка с параллельно созданным названием вставляется по строке."""
+
+    def test_concurrent_duplicate_reported(self):
+        user = User.objects.create(username="tg_800501")
+        rows = [
+            {
+                "name": f"Гонка {i}",
+                "description": "",
+                "end_date": "2030-01-01T10:00:00+03:00",
+                "category": "",
+            }
+            for i in range(3)
+        ]
+        build_tasks = importer.build_tasks
+
+        def create_concurrently(batch_rows, *args):
+            # Параллельный запрос успел после проверки названий
+            if not Task.objects.filter(name="Гонка 1").exists():
+                Task.objects.create(
+                    name="Гонка 1",
+                    end_date=timezone.now() + timedelta(days=1),
+                    user=user,
+                )
+            return build_tasks(batch_rows, *args)
+
+        with mock.patch.object(
+            importer,
+            "build_tasks",
+            side_effect=create_concurrently,
+        ):
+            result = importer.bulk_import_tasks(rows, TELEGRAM_ID)
+
+        self.assertEqual(result.created, 2)
+        self.assertEqual(result.skipped, 1)
+        self.assertEqual(
+            result.errors,
+            [{"row": 2, "errors": importer.ERROR_NAME_EXISTS}],
+        )
+        self.assertEqual(
+            Task.objects.filter(user__username=f"tg_{TELEGRAM_ID}").count(),
+            2,
+        )
@@ -0,0 +1,161 @@
+"""
+Документация:
+https://prometheus.io/docs/instrumenting/exposition_formats/#text-based-format
+
+Метрики доставки напоминаний: запись в Redis, формат Prometheus,
+оценка квантилей и SLO. Нужен Redis (REDIS_URL), ключи метрик
+тестов - под отдельным префиксом. Telegram заменен заглушкой.
+
+Запуск:
+make test
+"""
+
+from datetime import timedelta
+from unittest import SkipTest, mock
+
+import redis
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.apps.tasks.delivery import DeliveryReport
+from core.apps.tasks.metrics import (
+    REMINDER_LATENESS,
+    REMINDERS_SENT,
+    REMINDERS_SKIPPED,
+    HistogramSnapshot,
+    get_sent_per_minute,
+    load_metrics,
+    record_metrics,
+    reset_metrics,
+)
+from core.apps.tasks.models import Task
+from core.apps.tasks.tasks import send_task_reminder, send_tg_messages
+from core.apps.tasks.utils import get_redis_client
+
+User = get_user_model()
+
+TELEGRAM_ID = 400500
+
+
+@override_settings(
+    METRICS_KEY_PREFIX="test_metrics",
+    METRICS_TOKEN="secret",
+    ALLOWED_HOSTS=["testserver"],
+)
+class ReminderMetricsTest(TestCase):
+    """Наблюдения доставки попадают в гистограммы и счетчики."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        try:
+            get_redis_client().ping()
+        except redis.RedisError:
+            raise SkipTest("Redis недоступен")
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username=f"tg_{TELEGRAM_ID}")
+
+    def setUp(self):
+        reset_metrics()
+        self.addCleanup(reset_metrics)
+
+    def test_histogram_quantiles(self):
+        snapshot = HistogramSnapshot((1, 5, 15))
+        snapshot.counts = [50, 40, 10, 0]
+        snapshot.count = 100
+
+        self.assertAlmostEqual(snapshot.quantile(0.5), 1.0)
+        self.assertAlmostEqual(snapshot.quantile(0.7), 3.0)
+        self.assertAlmostEqual(snapshot.fraction_within(5), 0.9)
+        self.assertAlmostEqual(snapshot.fraction_within(10), 0.95)
+
+    @mock.patch("core.apps.tasks.tasks.send_tg_messages")
+    def test_send_task_reminder_records_lateness(self, send_tg_messages):
+        now = timezone.now()
+        late, coalesced = Task.objects.bulk_create(
+            [
+                Task(
+                    id=f"m{i:015d}",
+                    name=f"Метрики {i}",
+                    end_date=end_date,
+                    user=self.user,
+                )
+                for i, end_date in enumerate(
+                    (now - timedelta(seconds=10), now + timedelta(seconds=5))
+                )
+            ]
+        )
+
+        send_task_reminder(late.pk)
+        # Напоминание уже отправлено вместе с первой задачей
+        send_task_reminder(coalesced.pk)
+
+        loaded = load_metrics()
+        lateness = loaded[REMINDER_LATENESS]['mode="eta"']
+        self.assertEqual(lateness.count, 2)
+        # 10 с опоздания - в корзине (5, 15], объединенная - вовремя
+        self.assertEqual(lateness.counts[0], 1)
+        self.assertEqual(lateness.counts[2], 1)
+        self.assertEqual(loaded[REMINDERS_SENT], {'mode="eta"': 2})
+        self.assertEqual(loaded[REMINDERS_SKIPPED], {"": 1})
+        # Две последние минуты: запись могла попасть на границу минут
+        self.assertEqual(sum(get_sent_per_minute(2)), 2)
+
+    @mock.patch("core.apps.tasks.tasks.deliver_messages")
+    def test_delivery_outcomes(self, deliver_messages):
+        report = DeliveryReport(sent=2, failed=1, latencies=[0.2, 0.3])
+        report.statuses.update({"200": 2, "429": 1, "400": 1})
+        deliver_messages.return_value = report
+
+        with mock.patch("core.apps.tasks.constants.BOT_TOKEN", "123:abc"):
+            send_tg_messages([(1, "текст"), (2, "текст"), (3, "текст")])
+
+        response = self.client.get(
+            "/api/metrics/",
+            HTTP_AUTHORIZATION="Bearer secret",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        text = response.content.decode()
+        self.assertIn('telegram_responses_total{code="429"} 1', text)
+        self.assertIn('telegram_messages_total{outcome="failed"} 1', text)
+        self.assertIn('telegram_api_latency_seconds_bucket{le="0.25"} 1', text)
+        self.assertIn('telegram_api_latency_seconds_bucket{le="+Inf"} 2', text)
+        self.assertIn("telegram_api_latency_seconds_count 2", text)
+
+    def test_slo_check(self):
+        with record_metrics() as metrics:
+            for lateness in (0.5, 0.5, 0.5, 90):
+                metrics.observe(REMINDER_LATENESS, lateness, {"mode": "eta"})
+
+        call_command("reminder_metrics", slo_seconds=120, stdout=mock.Mock())
+        with self.assertRaisesMessage(CommandError, "75.00%"):
+            call_command(
+                "reminder_metrics",
+                slo_seconds=60,
+                slo_target=0.99,
+                stdout=mock.Mock(),
+            )
+
+    def test_token_required(self):
+        self.assertEqual(self.client.get("/api/metrics/").status_code, 401)
+        self.assertEqual(
+            self.client.get(
+                "/api/metrics/",
+                HTTP_AUTHORIZATION="Bearer wrong",
+            ).status_code,
+            401,
+        )
+        response = self.client.get(
+            "/api/metrics/",
+            HTTP_AUTHORIZATION="Bearer secret",
+        )
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(METRICS_TOKEN="")
+    def test_disabled_without_token(self):
+        self.assertEqual(self.client.get("/api/metrics/").status_code, 404)
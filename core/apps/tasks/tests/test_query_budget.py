@@ -0,0 +1,459 @@
+"""
+Бюджет SQL-запросов и времени ответа для всех эндпоинтов API.
+
+Тест падает, если эндпоинт стал делать больше (или меньше) запросов,
+чем зафиксировано в бюджете. Время ответа печатается всегда,
+а проверяется только с CHECK_TIME_BUDGET=1: на загруженной машине
+лимит по часам дает ложные падения.
+Побочные эффекты post_save входят в бюджет: сообщения Celery
+записываются в outbox тем же запросом или одним INSERT, брокер
+в запросе не вызывается. Redis-кэш и Redis-ограничитель запросов
+заменены локальными заглушками.
+
+Документация:
+https://docs.djangoproject.com/en/5.2/topics/testing/tools/#django.test.TransactionTestCase.assertNumQueries
+
+Запуск:
+make test
+CHECK_TIME_BUDGET=1 make test
+"""
+
+import os
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.apps.tasks.models import Category, OutboxEvent, Task
+from core.apps.tasks.stats import invalidate_user_stats
+
+User = get_user_model()
+
+TELEGRAM_ID = 100500
+OTHER_TELEGRAM_ID = 100501
+TASKS_PER_USER = 200
+CATEGORIES = ("Работа", "Дом", "Покупки", "Учеба", "Спорт")
+
+# Лимит времени ответа по умолчанию, мс (проверка по CHECK_TIME_BUDGET)
+DEFAULT_TIME_BUDGET_MS = 500
+CHECK_TIME_BUDGET = os.getenv("CHECK_TIME_BUDGET") == "1"
+
+LOCMEM_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES, ALLOWED_HOSTS=["testserver"])
+class QueryBudgetTestCase(TestCase):
+    """Базовый класс: данные, заглушки и проверка бюджета."""
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.user = User.objects.create(username=f"tg_{TELEGRAM_ID}")
+        cls.other_user = User.objects.create(
+            username=f"tg_{OTHER_TELEGRAM_ID}",
+        )
+        cls.categories = Category.objects.bulk_create(
+            [Category(name=name, id=f"cat{i:013d}")
+             for i, name in enumerate(CATEGORIES)]
+        )
+
+        tasks = []
+        for owner_index, owner in enumerate((cls.user, cls.other_user)):
+            for i in range(TASKS_PER_USER):
+                tasks.append(
+                    Task(
+                        id=f"t{owner_index}{i:014d}",
+                        name=f"Задача {owner_index}-{i} купить молоко"
+                        if i % 10 == 0
+                        else f"Задача {owner_index}-{i}",
+                        description=f"Описание задачи {i}",
+                        end_date=now + timedelta(hours=i - 50),
+                        category=cls.categories[i % len(CATEGORIES)]
+                        if i % 4
+                        else None,
+                        user=owner,
+                    )
+                )
+        Task.objects.bulk_create(tasks)
+        cls.task = Task.objects.filter(user=cls.user).first()
+        # События outbox проверяются в тестах, начиная с пустой таблицы
+        OutboxEvent.objects.all().delete()
+
+    def setUp(self):
+        self.client = APIClient()
+
+        patch = mock.patch(
+            "core.apps.tasks.throttling.get_token_bucket_script",
+            return_value=lambda keys, args: 0,
+        )
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.timings: dict[str, float] = {}
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        for name, elapsed in sorted(cls.timings.items()):
+            print(f"{name}: {elapsed:.1f} мс")
+
+    def assert_outbox_events(self, count: int):
+        """Сколько сообщений Celery записано в outbox."""
+
+        self.assertEqual(OutboxEvent.objects.count(), count)
+
+    def request(
+        self,
+        name: str,
+        queries: int,
+        method: str,
+        path: str,
+        time_budget_ms: int = DEFAULT_TIME_BUDGET_MS,
+        **kwargs,
+    ):
+        """
+        Выполняет запрос, проверяя число SQL-запросов
+        и (с CHECK_TIME_BUDGET) время ответа.
+        """
+
+        with self.assertNumQueries(queries):
+            started = time.perf_counter()
+            response = getattr(self.client, method)(path, **kwargs)
+            if response.streaming:
+                b"".join(response.streaming_content)
+            elapsed = (time.perf_counter() - started) * 1000
+
+        self.timings[name] = elapsed
+        if CHECK_TIME_BUDGET:
+            self.assertLess(
+                elapsed,
+                time_budget_ms,
+                f"{name}: {elapsed:.1f} мс при бюджете {time_budget_ms} мс",
+            )
+        return response
+
+
+class CategoryEndpointsTest(QueryBudgetTestCase):
+    def test_list(self):
+        response = self.request(
+            "categories.list",
+            1,
+            "get",
+            "/api/categories/",
+        )
+        self.assertEqual(len(response.json()), len(CATEGORIES))
+
+    def test_list_by_name(self):
+        self.request(
+            "categories.list_by_name",
+            1,
+            "get",
+            "/api/categories/?name=Дом",
+        )
+
+    def test_create(self):
+        # SAVEPOINT + проверка уникальности имени + INSERT
+        self.request(
+            "categories.create",
+            2,
+            "post",
+            "/api/categories/",
+            data={"name": "Новая"},
+            format="json",
+        )
+
+    def test_retrieve(self):
+        category = self.categories[0]
+        self.request(
+            "categories.retrieve",
+            1,
+            "get",
+            f"/api/categories/{category.pk}/",
+        )
+
+    def test_partial_update(self):
+        category = self.categories[0]
+        self.request(
+            "categories.partial_update",
+            3,
+            "patch",
+            f"/api/categories/{category.pk}/",
+            data={"name": "Работа!"},
+            format="json",
+        )
+
+    def test_destroy(self):
+        category = self.categories[0]
+        # категория, SET NULL в задачах и в архиве, DELETE
+        self.request(
+            "categories.destroy",
+            4,
+            "delete",
+            f"/api/categories/{category.pk}/",
+        )
+
+
+class TaskEndpointsTest(QueryBudgetTestCase):
+    def url(self, suffix: str = "", **params) -> str:
+        params.setdefault("user_telegram_id", TELEGRAM_ID)
+        query = "&".join(f"{key}={value}" for key, value in params.items())
+        return f"/api/tasks/{suffix}?{query}"
+
+    def test_list(self):
+        response = self.request("tasks.list", 1, "get", self.url())
+        self.assertEqual(len(response.json()), TASKS_PER_USER)
+
+    def test_list_due_today(self):
+        self.request("tasks.list_due_today", 1, "get", self.url(due="today"))
+
+    def test_list_within_days_by_category(self):
+        self.request(
+            "tasks.list_within_days_by_category",
+            1,
+            "get",
+            self.url(within_days=3, category_name="Дом", ordering="end_date"),
+        )
+
+    def test_retrieve(self):
+        self.request(
+            "tasks.retrieve",
+            1,
+            "get",
+            self.url(f"{self.task.pk}/"),
+        )
+
+    def test_create(self):
+        # проверка уникальности названия, категория, пользователь, INSERT,
+        # событие outbox
+        self.request(
+            "tasks.create",
+            5,
+            "post",
+            self.url(),
+            data={
+                "name": "Новая задача",
+                "description": "Описание",
+                "end_date": (timezone.now() + timedelta(days=1)).isoformat(),
+                "category_id": self.categories[0].pk,
+                "user_telegram_id": TELEGRAM_ID,
+            },
+            format="json",
+        )
+        self.assert_outbox_events(1)
+
+    def test_create_with_offsets(self):
+        # как tasks.create и один INSERT напоминаний до срока;
+        # событие outbox по-прежнему одно
+        response = self.request(
+            "tasks.create_with_offsets",
+            6,
+            "post",
+            self.url(),
+            data={
+                "name": "Задача с напоминаниями",
+                "description": "Описание",
+                "end_date": (timezone.now() + timedelta(days=2)).isoformat(),
+                "category_id": self.categories[0].pk,
+                "user_telegram_id": TELEGRAM_ID,
+                "reminder_offsets": [60, 1440],
+            },
+            format="json",
+        )
+        self.assertEqual(response.json()["reminder_offsets"], [1440, 60])
+        self.assert_outbox_events(1)
+
+    def test_create_idempotent_replay(self):
+        payload = {
+            "name": "Задача с ключом",
+            "description": "Описание",
+            "end_date": (timezone.now() + timedelta(days=1)).isoformat(),
+            "user_telegram_id": TELEGRAM_ID,
+        }
+        first = self.request(
+            "tasks.create_idempotent",
+            4,
+            "post",
+            self.url(),
+            data=payload,
+            format="json",
+            HTTP_IDEMPOTENCY_KEY="create-1",
+        )
+        # повтор отдается из кэша: ни запросов, ни нового напоминания
+        replay = self.request(
+            "tasks.create_replay",
+            0,
+            "post",
+            self.url(),
+            data=payload,
+            format="json",
+            HTTP_IDEMPOTENCY_KEY="create-1",
+        )
+        self.assertEqual(replay.status_code, 201)
+        self.assertEqual(replay.json(), first.json())
+        self.assertEqual(replay.headers["Idempotent-Replayed"], "true")
+        self.assert_outbox_events(1)
+
+        other = self.request(
+            "tasks.create_key_reused",
+            0,
+            "post",
+            self.url(),
+            data={**payload, "name": "Другая задача"},
+            format="json",
+            HTTP_IDEMPOTENCY_KEY="create-1",
+        )
+        self.assertEqual(other.status_code, 422)
+
+    def test_partial_update_idempotent_replay(self):
+        for name in ("tasks.partial_update_idempotent", "tasks.patch_replay"):
+            response = self.request(
+                name,
+                2 if name == "tasks.partial_update_idempotent" else 0,
+                "patch",
+                self.url(f"{self.task.pk}/"),
+                data={"description": "Описание по ключу"},
+                format="json",
+                HTTP_IDEMPOTENCY_KEY="patch-1",
+            )
+            self.assertEqual(response.status_code, 200)
+        # Срок не менялся - напоминание не перепланируется
+        self.assert_outbox_events(0)
+
+    def test_partial_update(self):
+        # задача (вместе с проверкой принадлежности), UPDATE описания;
+        # срок не менялся - версия напоминания и outbox не трогаются
+        self.request(
+            "tasks.partial_update",
+            2,
+            "patch",
+            self.url(f"{self.task.pk}/"),
+            data={"description": "Новое описание"},
+            format="json",
+        )
+        self.assert_outbox_events(0)
+
+    def test_mark_done(self):
+        # задача, UPDATE, новая версия напоминания: уже поставленное
+        # сообщение Celery устаревает без revoke
+        response = self.request(
+            "tasks.mark_done",
+            3,
+            "patch",
+            self.url(f"{self.task.pk}/"),
+            data={"status": "done"},
+            format="json",
+        )
+        self.assertEqual(response.json()["status"], "done")
+        self.assertIsNotNone(response.json()["completed_at"])
+        self.assert_outbox_events(0)
+
+        response = self.request("tasks.list_open", 1, "get", self.url())
+        self.assertEqual(len(response.json()), TASKS_PER_USER - 1)
+
+    def test_update(self):
+        # задача, проверка уникальности названия, UPDATE,
+        # новая версия напоминания вместе с событием outbox
+        self.request(
+            "tasks.update",
+            4,
+            "put",
+            self.url(f"{self.task.pk}/"),
+            data={
+                "name": self.task.name,
+                "description": "Полное обновление",
+                "end_date": (timezone.now() + timedelta(days=2)).isoformat(),
+                "user_telegram_id": TELEGRAM_ID,
+            },
+            format="json",
+        )
+        self.assert_outbox_events(1)
+
+    def test_destroy(self):
+        # задача, DELETE напоминаний до срока, DELETE
+        self.request(
+            "tasks.destroy",
+            3,
+            "delete",
+            self.url(f"{self.task.pk}/"),
+        )
+
+    def test_search(self):
+        response = self.request(
+            "tasks.search",
+            1,
+            "get",
+            self.url("search/", q="молоко"),
+        )
+        self.assertTrue(response.json())
+
+    def test_archived(self):
+        self.request("tasks.archived", 1, "get", self.url("archived/"))
+
+    def test_agenda(self):
+        self.request("tasks.agenda_get", 1, "get", self.url("agenda/"))
+        # пользователь, затем update_or_create: SAVEPOINT, SELECT FOR
+        # UPDATE, SAVEPOINT, INSERT, RELEASE, RELEASE
+        response = self.request(
+            "tasks.agenda_put",
+            7,
+            "put",
+            self.url("agenda/"),
+            data={"send_at": "07:30"},
+            format="json",
+        )
+        self.assertEqual(response.json()["send_at"], "07:30")
+        self.assertTrue(response.json()["is_active"])
+        self.request("tasks.agenda_delete", 1, "delete", self.url("agenda/"))
+
+    def test_stats_cold_and_cached(self):
+        # user_id по username (для ключа кэша) и GROUP BY
+        self.request("tasks.stats_cold", 2, "get", self.url("stats/"))
+        self.request("tasks.stats_cached", 0, "get", self.url("stats/"))
+        # После изменения задач user_id уже в кэше: только GROUP BY
+        invalidate_user_stats(self.user.pk)
+        self.request("tasks.stats_reset", 1, "get", self.url("stats/"))
+
+    def test_export(self):
+        for export_format in ("ndjson", "csv"):
+            self.request(
+                f"tasks.export_{export_format}",
+                1,
+                "get",
+                self.url("export/", export_format=export_format),
+            )
+
+    def test_import(self):
+        rows = "\n".join(
+            f"Импорт {i},описание,2030-01-01T10:00:00+03:00,Импортная"
+            for i in range(100)
+        )
+        # пользователь, категории (поиск, вставка, повторное чтение),
+        # затем на пачку: SAVEPOINT, проверка названий, INSERT, события
+        # outbox, RELEASE; срок сообщений Celery записывается тем же INSERT
+        response = self.request(
+            "tasks.import",
+            9,
+            "post",
+            self.url("import/"),
+            data={
+                "file": SimpleUploadedFile(
+                    "tasks.csv",
+                    ("name,description,end_date,category\n" + rows).encode(),
+                )
+            },
+            format="multipart",
+        )
+        self.assertEqual(response.json()["created"], 100)
+        self.assert_outbox_events(100)
@@ -0,0 +1,218 @@
+"""
+Документация:
+https://docs.djangoproject.com/en/5.2/topics/testing/tools/#testcase
+
+Повторяющиеся задачи: следующее вхождение при выполнении
+и после пропуска, вхождения за окно списка без запросов к БД.
+Telegram заменен заглушкой.
+
+Запуск:
+make test
+"""
+
+from datetime import datetime, time, timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.apps.tasks.models import OutboxEvent, ReminderOffset, Task
+from core.apps.tasks.recurrence import (
+    advance_missed_occurrences,
+    get_next_occurrence,
+)
+from core.apps.tasks.tasks import send_task_reminder
+
+User = get_user_model()
+
+TELEGRAM_ID = 500500
+
+
+class NextOccurrenceTest(TestCase):
+    """Вычисление следующего вхождения."""
+
+    def local(self, *args) -> datetime:
+        return datetime(*args, tzinfo=timezone.get_current_timezone())
+
+    def test_monthly_short_month(self):
+        task = Task(
+            end_date=self.local(2027, 1, 31, 9, 0),
+            recurrence=Task.Recurrence.MONTHLY,
+        )
+
+        self.assertEqual(
+            get_next_occurrence(task, self.local(2027, 1, 31, 10, 0)),
+            self.local(2027, 2, 28, 9, 0),
+        )
+
+    def test_missed_occurrences_skipped(self):
+        task = Task(
+            end_date=self.local(2027, 3, 1, 9, 0),
+            recurrence=Task.Recurrence.DAILY,
+        )
+
+        # Десять дней просрочки: следующее вхождение - завтра в 09:00
+        self.assertEqual(
+            get_next_occurrence(task, self.local(2027, 3, 11, 12, 0)),
+            self.local(2027, 3, 12, 9, 0),
+        )
+        self.assertEqual(
+            get_next_occurrence(task, self.local(2027, 2, 1, 12, 0)),
+            self.local(2027, 3, 2, 9, 0),
+        )
+
+
+@override_settings(ALLOWED_HOSTS=["testserver"])
+class RecurringTaskTest(TestCase):
+    """Выполнение, пропуск, напоминание и список повторяющихся задач."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username=f"tg_{TELEGRAM_ID}")
+
+    def url(self, suffix: str = "", query: str = "") -> str:
+        return f"/api/tasks/{suffix}?user_telegram_id={TELEGRAM_ID}{query}"
+
+    def create_task(self, end_date, recurrence=Task.Recurrence.WEEKLY):
+        return Task.objects.create(
+            name=f"Повтор {recurrence} {end_date.isoformat()}",
+            end_date=end_date,
+            recurrence=recurrence,
+            user=self.user,
+        )
+
+    def test_done_moves_to_next_occurrence(self):
+        end_date = timezone.now() + timedelta(hours=2)
+        task = self.create_task(end_date)
+        ReminderOffset.objects.create(
+            task=task,
+            offset_minutes=60,
+            next_fire_at=end_date - timedelta(hours=1),
+        )
+
+        response = self.client.patch(
+            self.url(f"{task.pk}/"),
+            {"status": "done"},
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], "open")
+        task.refresh_from_db()
+        self.assertEqual(task.end_date, end_date + timedelta(days=7))
+        self.assertIsNone(task.completed_at)
+        # Напоминания следующего вхождения: в срок и за час
+        self.assertEqual(
+            OutboxEvent.objects.latest("id").payload["version"],
+            task.reminder_version,
+        )
+        self.assertEqual(
+            ReminderOffset.objects.get(task=task).next_fire_at,
+            task.end_date - timedelta(hours=1),
+        )
+
+    def test_cancel_stops_series(self):
+        task = self.create_task(timezone.now() + timedelta(hours=2))
+        task.status = Task.Status.CANCELLED
+        task.save()
+
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.Status.CANCELLED)
+
+    @mock.patch("core.apps.tasks.tasks.send_tg_messages")
+    def test_reminder_then_done_advances_once(self, send_tg_messages):
+        end_date = timezone.now() - timedelta(seconds=5)
+        task = self.create_task(end_date, Task.Recurrence.DAILY)
+
+        send_task_reminder(task.pk, task.reminder_version)
+
+        # Напоминание срок не переносит: вхождение ждет выполнения
+        send_tg_messages.assert_called_once()
+        task.refresh_from_db()
+        self.assertEqual(task.end_date, end_date)
+        self.assertIsNotNone(task.reminder_sent_at)
+
+        response = self.client.patch(
+            self.url(f"{task.pk}/"),
+            {"status": "done"},
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        task.refresh_from_db()
+        self.assertEqual(task.end_date, end_date + timedelta(days=1))
+        self.assertIsNone(task.reminder_sent_at)
+        self.assertEqual(
+            OutboxEvent.objects.latest("id").payload["version"],
+            task.reminder_version,
+        )
+
+    def test_missed_occurrence_advanced_before_next_day(self):
+        now = timezone.localtime()
+        # Вчерашнее и сегодняшнее вхождения прошли: следующее - завтра
+        missed = self.create_task(
+            now - timedelta(days=1, minutes=5),
+            Task.Recurrence.DAILY,
+        )
+        # Еженедельное: следующее вхождение только через неделю
+        weekly = self.create_task(now - timedelta(minutes=5))
+        # Напоминание за 7 дней до следующего еженедельного вхождения
+        early = self.create_task(
+            now - timedelta(days=1, minutes=5),
+            Task.Recurrence.WEEKLY,
+        )
+        ReminderOffset.objects.create(task=early, offset_minutes=7 * 1440)
+
+        self.assertEqual(advance_missed_occurrences(batch_size=1), 2)
+
+        missed.refresh_from_db()
+        self.assertEqual(missed.end_date, now + timedelta(minutes=-5, days=1))
+        weekly.refresh_from_db()
+        self.assertEqual(weekly.end_date, now - timedelta(minutes=5))
+        early.refresh_from_db()
+        self.assertEqual(
+            early.end_date,
+            now + timedelta(days=6, minutes=-5),
+        )
+
+    def test_list_expands_occurrences(self):
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        daily = self.create_task(
+            datetime.combine(
+                tomorrow,
+                time(9, 0),
+                tzinfo=timezone.get_current_timezone(),
+            ),
+            Task.Recurrence.DAILY,
+        )
+        once = Task.objects.create(
+            name="Разовая",
+            end_date=daily.end_date + timedelta(days=1, hours=3),
+            user=self.user,
+        )
+
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                self.url(
+                    query="&within_days=3&ordering=end_date&occurrences=true",
+                ),
+            )
+
+        items = [
+            (item["id"], item["occurrence"]) for item in response.json()
+        ]
+        # Завтра, послезавтра (и разовая задача), через 3 дня
+        self.assertEqual(
+            items,
+            [(daily.pk, 0), (daily.pk, 1), (once.pk, 0), (daily.pk, 2)],
+        )
+        self.assertEqual(
+            datetime.fromisoformat(response.json()[3]["end_date"]),
+            daily.end_date + timedelta(days=2),
+        )
+
+        # Без occurrences - по одной строке на задачу
+        response = self.client.get(self.url(query="&within_days=3"))
+        self.assertEqual(len(response.json()), 2)
+        self.assertNotIn("occurrence", response.json()[0])
@@ -0,0 +1,744 @@
+"""
+Документация:
+https://docs.djangoproject.com/en/5.2/topics/testing/tools/#testcase
+
+Объединение напоминаний одного пользователя в одно сообщение
+(режимы eta и sweep), версии напоминаний вместо revoke, публикация
+сообщений Celery через outbox, напоминания до срока и очереди
+Celery.
+Telegram и брокер заменены заглушками.
+
+Запуск:
+make test
+"""
+
+import json
+from datetime import timedelta
+from unittest import mock
+
+from celery.app.control import Control
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.migrations.loader import MigrationLoader
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from kombu.exceptions import OperationalError
+
+from core.apps.tasks.constants import TELEGRAM_MESSAGE_MAX_LENGTH
+from core.apps.tasks.models import OutboxEvent, ReminderOffset, Task
+from core.apps.tasks.outbox import relay_outbox_events
+from core.apps.tasks.reconcile import reconcile_reminders
+from core.apps.tasks.reminders import (
+    build_digest_messages,
+    bump_reminder_versions,
+    get_reminder_task_id,
+)
+from core.apps.tasks.tasks import (
+    archive_tasks,
+    send_agendas,
+    send_offset_reminders,
+    send_task_reminder,
+    sweep_reminders,
+)
+from core.project.celery import app as celery_app
+
+User = get_user_model()
+
+TELEGRAM_ID = 200500
+OTHER_TELEGRAM_ID = 200501
+VERSION_TELEGRAM_ID = 200502
+RECONCILE_TELEGRAM_ID = 200503
+BULK_TELEGRAM_ID = 200504
+OUTBOX_TELEGRAM_ID = 200505
+OFFSET_TELEGRAM_ID = 200506
+
+
+@override_settings(REMINDER_COALESCE_WINDOW=60)
+class ReminderCoalescingTest(TestCase):
+    """Напоминания со сроками в пределах окна - одним сообщением."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username=f"tg_{TELEGRAM_ID}")
+        cls.other_user = User.objects.create(
+            username=f"tg_{OTHER_TELEGRAM_ID}",
+        )
+
+    def create_tasks(self, *deadlines, user=None):
+        """Задачи без сигналов post_save (Celery не нужен)."""
+
+        user = user or self.user
+        created = Task.objects.count()
+        return Task.objects.bulk_create(
+            [
+                Task(
+                    id=f"r{created + i:015d}",
+                    name=f"Задача {created + i}",
+                    end_date=end_date,
+                    user=user,
+                )
+                for i, end_date in enumerate(deadlines)
+            ]
+        )
+
+    def assert_reminded(self, tasks, reminded=True):
+        for task in tasks:
+            task.refresh_from_db()
+            self.assertEqual(task.reminder_sent_at is not None, reminded)
+
+    @mock.patch("core.apps.tasks.tasks.send_tg_messages")
+    def test_eta_reminder_coalesced(self, send_tg_messages):
+        deadline = timezone.now() + timedelta(seconds=5)
+        coalesced = self.create_tasks(
+            deadline,
+            deadline,
+            deadline + timedelta(seconds=30),
+        )
+        later = self.create_tasks(
+            deadline + timedelta(minutes=10),
+            user=self.other_user,
+        )
+
+        send_task_reminder(coalesced[0].pk)
+
+        send_tg_messages.assert_called_once()
+        [(telegram_id, text)] = send_tg_messages.call_args.args[0]
+        self.assertEqual(telegram_id, TELEGRAM_ID)
+        self.assertIn("Напоминание о задачах (3)", text)
+        self.assert_reminded(coalesced)
+        self.assert_reminded(later, reminded=False)
+
+        # Сообщения Celery остальных задач ничего не отправляют
+        send_task_reminder(coalesced[1].pk)
+        send_task_reminder(coalesced[2].pk)
+        send_tg_messages.assert_called_once()
+
+    @mock.patch("core.apps.tasks.tasks.send_tg_messages")
+    def test_eta_single_reminder(self, send_tg_messages):
+        deadline = timezone.now()
+        task, later = self.create_tasks(
+            deadline,
+            deadline + timedelta(minutes=5),
+        )
+
+        send_task_reminder(task.pk)
+
+        [(_, text)] = send_tg_messages.call_args.args[0]
+        self.assertIn("Напоминание о задаче</b>", text)
+        self.assert_reminded([task])
+        self.assert_reminded([later], reminded=False)
+
+    @mock.patch("core.apps.tasks.tasks.send_tg_messages", return_value=0)
+    def test_sweep_reminders_coalesced(self, send_tg_messages):
+        now = timezone.now()
+        due = self.create_tasks(
+            now - timedelta(seconds=10),
+            now - timedelta(seconds=5),
+            now + timedelta(seconds=20),
+        )
+        other_due = self.create_tasks(now, user=self.other_user)
+        later = self.create_tasks(
+            now + timedelta(minutes=10),
+            user=self.other_user,
+        )
+
+        sweep_reminders()
+
+        messages = send_tg_messages.call_args.args[0]
+        self.assertEqual(
+            sorted(telegram_id for telegram_id, _ in messages),
+            [TELEGRAM_ID, OTHER_TELEGRAM_ID],
+        )
+        texts = dict(messages)
+        self.assertIn("Напоминание о задачах (3)", texts[TELEGRAM_ID])
+        self.assert_reminded(due + other_due)
+        self.assert_reminded(later, reminded=False)
+
+    def test_digest_split_by_length(self):
+        deadline = timezone.now()
+        tasks = self.create_tasks(*[deadline] * 40)
+        for task in tasks:
+            task.description = "описание " * 20
+
+        messages = build_digest_messages(tasks)
+
+        self.assertGreater(len(messages), 1)
+        for text in messages:
+            self.assertLessEqual(len(text), TELEGRAM_MESSAGE_MAX_LENGTH)
+        self.assertEqual(sum(text.count("📌") for text in messages), 40)
+
+
+@override_settings(REMINDER_MODE="eta")
+class ReminderVersionTest(TestCase):
+    """Правки задачи делают старые сообщения Celery устаревшими."""
+
+    EDITS = 1000
+    RELAYED_EDITS = 10
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username=f"tg_{VERSION_TELEGRAM_ID}")
+
+    @mock.patch.object(Control, "broadcast")
+    @mock.patch.object(Control, "revoke")
+    @mock.patch("core.apps.tasks.tasks.send_tg_messages")
+    def test_many_edits_one_reminder(
+        self,
+        send_tg_messages,
+        revoke,
+        broadcast,
+    ):
+        # Воркер держит в памяти каждое опубликованное сообщение с ETA
+        # до его срока, поэтому память воркера под напоминания задачи -
+        # это число опубликованных сообщений (held)
+        held = []
+
+        def apply_async(args, eta, task_id, producer=None):
+            self.assertEqual(task_id, get_reminder_task_id(*args))
+            held.append(args)
+
+        deadline = timezone.now() + timedelta(hours=1)
+        with mock.patch.object(send_task_reminder, "apply_async", apply_async):
+            task = Task.objects.create(
+                name="Часто меняемая задача",
+                end_date=deadline,
+                user=self.user,
+            )
+            stale = Task.objects.get(pk=task.pk)
+            for number in range(self.EDITS):
+                task.description = f"Правка {number}"
+                task.end_date = deadline + timedelta(seconds=number + 1)
+                task.save()
+                # Правка только описания не перепланирует напоминание
+                task.description = f"Описание {number}"
+                task.save()
+
+            # Устаревший экземпляр без изменений ничего не перезаписывает
+            stale.save()
+
+            # Сохранения только пишут outbox, публикует relay
+            self.assertEqual(held, [])
+            result = relay_outbox_events(batch_size=300)
+
+            # 1001 событие в 4 пачках: по одному сообщению на пачку,
+            # а не на правку
+            self.assertEqual(result.published, self.EDITS + 1)
+            self.assertEqual(
+                [version for _, version in held],
+                [299, 599, 899, self.EDITS],
+            )
+
+            # Худший случай - relay после каждой правки: одно
+            # устаревшее сообщение на проход, до его ETA
+            for number in range(self.RELAYED_EDITS):
+                task.end_date = deadline - timedelta(seconds=number + 1)
+                task.save()
+                relay_outbox_events()
+            self.assertEqual(len(held), 4 + self.RELAYED_EDITS)
+
+        revoke.assert_not_called()
+        broadcast.assert_not_called()
+
+        # Срок наступил: брокер доставляет все сообщения
+        for args in held:
+            send_task_reminder(*args)
+
+        send_tg_messages.assert_called_once()
+        [(telegram_id, _)] = send_tg_messages.call_args.args[0]
+        self.assertEqual(telegram_id, VERSION_TELEGRAM_ID)
+
+    @mock.patch("core.apps.tasks.tasks.send_tg_messages")
+    def test_closed_task_not_reminded(self, send_tg_messages):
+        with mock.patch.object(send_task_reminder, "apply_async") as apply:
+            task = Task.objects.create(
+                name="Закрытая задача",
+                end_date=timezone.now() + timedelta(hours=1),
+                user=self.user,
+            )
+            task.status = Task.Status.DONE
+            task.save()
+            relay_outbox_events()
+
+        apply.assert_called_once()
+        send_task_reminder(*apply.call_args.kwargs["args"])
+        send_tg_messages.assert_not_called()
+
+    def test_schedule_stored_in_database(self):
+        deadline = timezone.now() + timedelta(hours=1)
+        with mock.patch.object(send_task_reminder, "apply_async") as apply:
+            task = Task.objects.create(
+                name="Задача с расписанием",
+                end_date=deadline,
+                user=self.user,
+            )
+            task.end_date = deadline + timedelta(hours=1)
+            task.save()
+            relay_outbox_events()
+
+        # Расписание в строке задачи: кэш и его вытеснение не участвуют
+        task.refresh_from_db()
+        self.assertEqual(task.reminder_scheduled_for, task.end_date)
+        self.assertEqual(
+            apply.call_args.kwargs["task_id"],
+            get_reminder_task_id(task.pk, task.reminder_version),
+        )
+
+        task.status = Task.Status.DONE
+        task.save()
+        task.refresh_from_db()
+        self.assertIsNone(task.reminder_scheduled_for)
+
+    def test_refresh_then_save(self):
+        deadline = timezone.now() + timedelta(hours=1)
+        task = Task.objects.create(
+            name="Перечитанная задача",
+            end_date=deadline,
+            user=self.user,
+        )
+        Task.objects.filter(pk=task.pk).update(
+            end_date=deadline + timedelta(hours=1),
+        )
+        task.refresh_from_db()
+        events = OutboxEvent.objects.count()
+
+        # Перечитанные значения - не изменения: save() без правок
+        # ничего не пишет
+        self.assertEqual(task.get_changed_fields(), set())
+        with self.assertNumQueries(0):
+            task.save()
+        self.assertEqual(OutboxEvent.objects.count(), events)
+
+        # Возврат к значению до refresh_from_db - изменение
+        task.end_date = deadline
+        self.assertEqual(task.get_changed_fields(), {"end_date"})
+        task.save()
+        self.assertEqual(Task.objects.get(pk=task.pk).end_date, deadline)
+
+    def test_save_deleted_row(self):
+        task = Task.objects.create(
+            name="Удаленная задача",
+            end_date=timezone.now() + timedelta(hours=1),
+            user=self.user,
+        )
+        Task.objects.filter(pk=task.pk).delete()
+
+        # Как save() без update_fields: строка создается заново
+        task.description = "Правка после удаления"
+        task.save()
+
+        self.assertEqual(
+            Task.objects.get(pk=task.pk).description,
+            "Правка после удаления",
+        )
+
+
+@override_settings(REMINDER_MODE="eta")
+class ReminderReconcileTest(TestCase):
+    """Восстановление недостающих и устаревших напоминаний."""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create(username=f"tg_{RECONCILE_TELEGRAM_ID}")
+        deadline = timezone.now() + timedelta(hours=1)
+        # Сообщения Celery поставлены (события outbox записаны,
+        # relay в тесте не запускается), состояние меняется ниже
+        cls.tasks = Task.objects.bulk_create(
+            [
+                Task(
+                    id=f"n{i:015d}",
+                    name=f"Сверка {i}",
+                    end_date=deadline,
+                    user=user,
+                )
+                for i in range(5)
+            ]
+        )
+        # Сообщение не ставилось
+        Task.objects.filter(pk=cls.tasks[0].pk).update(
+            reminder_scheduled_for=None,
+        )
+        # Срок задачи изменен без перепланирования
+        Task.objects.filter(pk=cls.tasks[1].pk).update(
+            reminder_scheduled_for=deadline - timedelta(minutes=5),
+        )
+        # tasks[2] - сообщение есть у воркеров,
+        # tasks[3] - потеряно вместе с брокером
+        # Уже напомнено
+        Task.objects.filter(pk=cls.tasks[4].pk).update(
+            reminder_sent_at=timezone.now(),
+        )
+        cls.scheduled_ids = {
+            get_reminder_task_id(cls.tasks[2].pk, 0),
+        }
+
+    @mock.patch("core.apps.tasks.tasks.send_task_reminder")
+    def test_dry_run(self, celery_task):
+        result = reconcile_reminders(self.scheduled_ids, dry_run=True)
+
+        self.assertEqual(result.checked, 4)
+        self.assertEqual((result.stale, result.missing), (2, 1))
+        self.assertEqual((result.selected, result.rescheduled), (3, 0))
+        celery_task.apply_async.assert_not_called()
+
+    @mock.patch("core.apps.tasks.tasks.send_task_reminder")
+    def test_reschedule_in_batches(self, celery_task):
+        progress = []
+
+        # DECLARE курсора и по одному UPDATE на пачку с расхождениями
+        with self.assertNumQueries(3):
+            result = reconcile_reminders(
+                self.scheduled_ids,
+                batch_size=2,
+                on_batch=lambda result: progress.append(result.checked),
+            )
+
+        self.assertEqual(progress, [2, 4])
+        self.assertEqual(result.rescheduled, 3)
+        task_ids = sorted(
+            call.kwargs["task_id"]
+            for call in celery_task.apply_async.call_args_list
+        )
+        self.assertEqual(
+            task_ids,
+            [get_reminder_task_id(self.tasks[i].pk, 1) for i in (0, 1, 3)],
+        )
+        for task in self.tasks[:4]:
+            task.refresh_from_db()
+            self.assertEqual(task.reminder_scheduled_for, task.end_date)
+
+        # Повторная сверка без воркеров: все сроки уже совпадают
+        self.assertEqual(reconcile_reminders().selected, 0)
+
+
+@override_settings(REMINDER_MODE="eta")
+@mock.patch("core.apps.tasks.tasks.send_tg_messages")
+@mock.patch("core.apps.tasks.tasks.send_task_reminder.apply_async")
+class ReminderBulkWriteTest(TestCase):
+    """Пакетные записи в обход post_save перепланируют напоминания."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username=f"tg_{BULK_TELEGRAM_ID}")
+
+    def create_tasks(self, count=3):
+        deadline = timezone.now() + timedelta(hours=1)
+        return Task.objects.bulk_create(
+            [
+                Task(
+                    id=f"b{i:015d}",
+                    name=f"Пакет {i}",
+                    end_date=deadline,
+                    user=self.user,
+                )
+                for i in range(count)
+            ]
+        )
+
+    def scheduled(self, apply_async):
+        """Сообщения, опубликованные relay из outbox."""
+
+        relay_outbox_events()
+        return sorted(call.kwargs["args"] for call in apply_async.mock_calls)
+
+    def test_bulk_create(self, apply_async, send_tg_messages):
+        tasks = self.create_tasks()
+
+        self.assertEqual(
+            self.scheduled(apply_async),
+            [(task.pk, 0) for task in tasks],
+        )
+        for task in tasks:
+            task.refresh_from_db()
+            self.assertEqual(task.reminder_scheduled_for, task.end_date)
+
+    def test_update_reschedules(self, apply_async, send_tg_messages):
+        tasks = self.create_tasks()
+        Task.objects.filter(pk=tasks[0].pk).update(
+            reminder_sent_at=timezone.now(),
+        )
+        OutboxEvent.objects.all().delete()
+        new_deadline = timezone.now() + timedelta(days=1)
+
+        # SAVEPOINT, ПК задач с блокировкой (FOR UPDATE), UPDATE,
+        # новые версии вместе с событиями outbox одним запросом, RELEASE
+        with self.assertNumQueries(5):
+            Task.objects.filter(user=self.user).update(
+                end_date=new_deadline,
+            )
+
+        self.assertEqual(
+            self.scheduled(apply_async),
+            [(task.pk, 1) for task in tasks],
+        )
+        task = Task.objects.get(pk=tasks[0].pk)
+        self.assertIsNone(task.reminder_sent_at)
+        self.assertEqual(task.reminder_scheduled_for, new_deadline)
+
+        # Старые сообщения устарели
+        send_task_reminder(tasks[1].pk, 0)
+        send_tg_messages.assert_not_called()
+
+    def test_bulk_update_reschedules(self, apply_async, send_tg_messages):
+        tasks = self.create_tasks()
+        OutboxEvent.objects.all().delete()
+        for task in tasks:
+            task.end_date += timedelta(minutes=30)
+
+        Task.objects.bulk_update(tasks, ["end_date"])
+
+        self.assertEqual(
+            self.scheduled(apply_async),
+            [(task.pk, 1) for task in tasks],
+        )
+
+    def test_data_migration_reschedules(self, apply_async, send_tg_messages):
+        tasks = self.create_tasks()
+        OutboxEvent.objects.all().delete()
+        state = MigrationLoader(connection).project_state(
+            ("tasks", "0018_task_manager_not_in_migrations"),
+        )
+        HistoricalTask = state.apps.get_model("tasks", "Task")
+
+        # Как в RunPython миграции данных: исторический менеджер
+        # напоминания не трогает, миграция перепланирует их явно
+        queryset = HistoricalTask.objects.filter(user_id=self.user.pk)
+        task_pks = list(queryset.values_list("pk", flat=True))
+        updated = queryset.update(
+            end_date=timezone.now() + timedelta(days=2),
+        )
+        self.assertEqual(self.scheduled(apply_async), [])
+        bump_reminder_versions(task_pks)
+
+        self.assertEqual(updated, len(tasks))
+        self.assertEqual(
+            self.scheduled(apply_async),
+            [(task.pk, 1) for task in tasks],
+        )
+
+    def test_other_fields_not_rescheduled(self, apply_async, send_tg_messages):
+        tasks = self.create_tasks()
+        OutboxEvent.objects.all().delete()
+
+        with self.assertNumQueries(1):
+            Task.objects.filter(user=self.user).update(
+                description="Новое описание",
+            )
+        Task.objects.bulk_update(tasks, ["name"])
+
+        self.assertEqual(self.scheduled(apply_async), [])
+
+
+@override_settings(REMINDER_MODE="eta")
+@mock.patch("core.apps.tasks.tasks.send_task_reminder.apply_async")
+class OutboxRelayTest(TestCase):
+    """Сообщения Celery публикуются из outbox после коммита задачи."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username=f"tg_{OUTBOX_TELEGRAM_ID}")
+
+    def create_task(self, name="Задача outbox"):
+        return Task.objects.create(
+            name=name,
+            end_date=timezone.now() + timedelta(hours=1),
+            user=self.user,
+        )
+
+    def test_save_does_not_call_broker(self, apply_async):
+        task = self.create_task()
+        task.end_date += timedelta(hours=1)
+        task.save()
+
+        apply_async.assert_not_called()
+        self.assertEqual(OutboxEvent.objects.count(), 2)
+
+        result = relay_outbox_events()
+
+        self.assertEqual((result.published, result.batches), (2, 1))
+        # Версия 0 устарела еще в outbox: публикуется только версия 1
+        self.assertEqual(
+            [call.kwargs["args"] for call in apply_async.call_args_list],
+            [(task.pk, 1)],
+        )
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_rollback_leaves_no_event(self, apply_async):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.create_task()
+            raise RuntimeError
+
+        self.assertFalse(OutboxEvent.objects.exists())
+        self.assertEqual(relay_outbox_events().published, 0)
+        apply_async.assert_not_called()
+
+    def test_broker_error_keeps_events(self, apply_async):
+        self.create_task()
+        apply_async.side_effect = OperationalError("брокер недоступен")
+
+        with self.assertRaises(OperationalError):
+            relay_outbox_events()
+        self.assertEqual(OutboxEvent.objects.count(), 1)
+
+        # Брокер вернулся: событие публикуется следующим проходом
+        apply_async.side_effect = None
+        self.assertEqual(relay_outbox_events().published, 1)
+        self.assertFalse(OutboxEvent.objects.exists())
+
+
+@override_settings(ALLOWED_HOSTS=["testserver"])
+class ReminderOffsetTest(TestCase):
+    """Напоминания за заданное время до срока (ReminderOffset)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username=f"tg_{OFFSET_TELEGRAM_ID}")
+
+    def url(self, suffix: str = "") -> str:
+        return f"/api/tasks/{suffix}?user_telegram_id={OFFSET_TELEGRAM_ID}"
+
+    def send(self, method: str, path: str, data: dict):
+        response = getattr(self.client, method)(
+            path,
+            json.dumps(data),
+            content_type="application/json",
+        )
+        self.assertIn(response.status_code, (200, 201), response.content)
+        return response.json()
+
+    def fire_times(self, task_pk: str) -> dict:
+        return dict(
+            ReminderOffset.objects.filter(task_id=task_pk).values_list(
+                "offset_minutes",
+                "next_fire_at",
+            )
+        )
+
+    def test_offsets_follow_task(self):
+        end_date = timezone.now() + timedelta(days=2)
+        task = self.send(
+            "post",
+            self.url(),
+            {
+                "name": "Отчет",
+                "description": "Квартальный",
+                "end_date": end_date.isoformat(),
+                "user_telegram_id": OFFSET_TELEGRAM_ID,
+                "reminder_offsets": [60, 1440, 60],
+            },
+        )
+
+        self.assertEqual(task["reminder_offsets"], [1440, 60])
+        self.assertEqual(
+            self.fire_times(task["id"]),
+            {
+                1440: end_date - timedelta(days=1),
+                60: end_date - timedelta(hours=1),
+            },
+        )
+        # Отступы не добавляют событий outbox: одно - напоминание в срок
+        self.assertEqual(OutboxEvent.objects.count(), 1)
+
+        # Срок через 30 минут: оба момента уже прошли
+        soon = timezone.now() + timedelta(minutes=30)
+        self.send(
+            "patch",
+            self.url(f"{task['id']}/"),
+            {"end_date": soon.isoformat()},
+        )
+        self.assertEqual(self.fire_times(task["id"]), {1440: None, 60: None})
+
+        # Перенос срока пакетной записью снова включает напоминания,
+        # замена списка удаляет лишний отступ и добавляет новый
+        later = timezone.now() + timedelta(days=3)
+        Task.objects.filter(pk=task["id"]).update(end_date=later)
+        response = self.send(
+            "patch",
+            self.url(f"{task['id']}/"),
+            {"reminder_offsets": [15, 60]},
+        )
+        self.assertEqual(response["reminder_offsets"], [60, 15])
+        self.assertEqual(
+            self.fire_times(task["id"]),
+            {
+                60: later - timedelta(hours=1),
+                15: later - timedelta(minutes=15),
+            },
+        )
+
+        self.send("patch", self.url(f"{task['id']}/"), {"status": "done"})
+        self.assertEqual(self.fire_times(task["id"]), {60: None, 15: None})
+
+    @mock.patch("core.apps.tasks.tasks.send_tg_messages", return_value=2)
+    def test_send_due_offsets(self, send_tg_messages):
+        now = timezone.now()
+        task = Task.objects.create(
+            name="Созвон",
+            end_date=now + timedelta(minutes=50),
+            user=self.user,
+        )
+        ReminderOffset.objects.bulk_create(
+            [
+                # Наступили, устарело и еще не наступило
+                ReminderOffset(
+                    task=task,
+                    offset_minutes=60,
+                    next_fire_at=now - timedelta(minutes=10),
+                ),
+                ReminderOffset(
+                    task=task,
+                    offset_minutes=24 * 60 + 90,
+                    next_fire_at=now - timedelta(minutes=1),
+                ),
+                ReminderOffset(
+                    task=task,
+                    offset_minutes=5 * 24 * 60,
+                    next_fire_at=now - timedelta(days=4),
+                ),
+                ReminderOffset(
+                    task=task,
+                    offset_minutes=10,
+                    next_fire_at=now + timedelta(minutes=40),
+                ),
+            ]
+        )
+
+        send_offset_reminders()
+
+        send_tg_messages.assert_called_once()
+        messages = send_tg_messages.call_args.args[0]
+        self.assertEqual(
+            sorted(text.splitlines()[0] for _, text in messages),
+            [
+                "🔔 <b>До срока задачи: 1 д 1 ч 30 мин</b>",
+                "🔔 <b>До срока задачи: 1 ч</b>",
+            ],
+        )
+        self.assertEqual(
+            ReminderOffset.objects.filter(next_fire_at__isnull=False).count(),
+            1,
+        )
+        # Напоминание в срок остается за send_task_reminder
+        task.refresh_from_db()
+        self.assertIsNone(task.reminder_sent_at)
+
+        # Повторный запуск ничего не отправляет
+        send_offset_reminders()
+        send_tg_messages.assert_called_once()
+
+
+class CeleryRoutingTest(SimpleTestCase):
+    """Напоминания, сводки и обслуживание уходят в свои очереди."""
+
+    @mock.patch.object(celery_app.amqp, "send_task_message")
+    def test_task_routes(self, send_task_message):
+        send_task_reminder.apply_async(args=("task", 1))
+        send_agendas.delay()
+        archive_tasks.delay()
+
+        self.assertEqual(
+            [
+                (call.kwargs["queue"].name, call.kwargs["priority"])
+                for call in send_task_message.call_args_list
+            ],
+            [("reminders", 0), ("digests", 3), ("maintenance", 9)],
+        )
@@ -0,0 +1,72 @@
+"""
+Документация:
+https://docs.djangoproject.com/en/5.2/topics/testing/tools/#testcase
+
+Статус задачи: список по умолчанию отдает открытые задачи,
+а маршруты одной задачи находят ее в любом статусе.
+
+Запуск:
+make test
+"""
+
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.apps.tasks.models import Task
+
+User = get_user_model()
+
+TELEGRAM_ID = 600500
+
+
+@override_settings(ALLOWED_HOSTS=["testserver"])
+class TaskStatusTest(TestCase):
+    """Выполненную задачу можно открыть, вернуть в работу и удалить."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username=f"tg_{TELEGRAM_ID}")
+
+    def url(self, suffix: str = "", query: str = "") -> str:
+        return f"/api/tasks/{suffix}?user_telegram_id={TELEGRAM_ID}{query}"
+
+    def test_done_task_detail_routes(self):
+        task = Task.objects.create(
+            name="Выполненная",
+            end_date=timezone.now() + timedelta(hours=1),
+            user=self.user,
+        )
+        response = self.client.patch(
+            self.url(f"{task.pk}/"),
+            {"status": "done"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+
+        # Список по умолчанию - только открытые
+        self.assertEqual(self.client.get(self.url()).json(), [])
+        self.assertEqual(
+            len(self.client.get(self.url(query="&status=done")).json()),
+            1,
+        )
+
+        response = self.client.get(self.url(f"{task.pk}/"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], "done")
+
+        response = self.client.patch(
+            self.url(f"{task.pk}/"),
+            {"status": "open"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.json()["completed_at"])
+
+        task.status = Task.Status.DONE
+        task.save()
+        response = self.client.delete(self.url(f"{task.pk}/"))
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Task.objects.filter(pk=task.pk).exists())
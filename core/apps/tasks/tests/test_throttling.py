@@ -0,0 +1,87 @@
+"""
+Документация:
+https://www.django-rest-framework.org/api-guide/testing/#apirequestfactory
+
+Ключ ограничителя запросов: пользователь Telegram из заголовка
+или параметров, без них - IP. Поверх корзины пользователя действует
+корзина IP. Проверка корзин требует Redis (REDIS_URL).
+
+Запуск:
+make test
+"""
+
+import uuid
+
+from django.test import SimpleTestCase
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from core.apps.tasks.throttling import (
+    TELEGRAM_USER_HEADER,
+    TelegramUserReadThrottle,
+    TelegramUserWriteThrottle,
+)
+from core.apps.tasks.utils import get_redis_client
+
+
+class ThrottleKeyTest(SimpleTestCase):
+    """Запросы категорий от бота не делят одну корзину."""
+
+    def get_key(self, path: str, **headers) -> str:
+        request = Request(APIRequestFactory().get(path, headers=headers))
+        return TelegramUserReadThrottle().get_cache_key(request, None)
+
+    def test_keys(self):
+        self.assertEqual(
+            self.get_key(
+                "/api/categories/?name=Дом",
+                **{TELEGRAM_USER_HEADER: "700500"},
+            ),
+            "throttle:telegram_user_read:tg_700500",
+        )
+        self.assertEqual(
+            self.get_key("/api/tasks/?user_telegram_id=700501"),
+            "throttle:telegram_user_read:tg_700501",
+        )
+        self.assertEqual(
+            self.get_key("/api/categories/?name=Дом"),
+            "throttle:telegram_user_read:ip_127.0.0.1",
+        )
+
+
+class IpBucketThrottle(TelegramUserWriteThrottle):
+    """Ограничитель с малыми лимитами и своими ключами в Redis."""
+
+    scope = f"test_user_{uuid.uuid4().hex}"
+    ip_scope = f"test_ip_{uuid.uuid4().hex}"
+    THROTTLE_RATES = {scope: "2/min", ip_scope: "3/min"}
+
+
+class IpBucketTest(SimpleTestCase):
+    """Новый ID пользователя в каждом запросе не обходит лимит IP."""
+
+    def tearDown(self):
+        get_redis_client().delete(
+            *get_redis_client().keys("throttle:test_*"),
+        )
+
+    def allow(self, telegram_id: str) -> bool:
+        request = Request(
+            APIRequestFactory().post(
+                "/api/tasks/",
+                headers={TELEGRAM_USER_HEADER: telegram_id},
+            )
+        )
+        return IpBucketThrottle().allow_request(request, None)
+
+    def test_forged_ids(self):
+        self.assertEqual(
+            [self.allow(str(700600 + i)) for i in range(4)],
+            [True, True, True, False],
+        )
+
+    def test_user_bucket(self):
+        self.assertEqual(
+            [self.allow("700700") for _ in range(3)],
+            [True, True, False],
+        )
@@ -0,0 +1,219 @@
+"""
+Документация:
+https://www.django-rest-framework.org/api-guide/throttling/#custom-throttles
+https://redis.io/docs/latest/develop/interact/programmability/eval-intro/
+"""
+
+import redis
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import SimpleRateThrottle
+
+from .constants import LOG_THROTTLE_REDIS_ERROR
+from .utils import get_redis_client
+
+# Token bucket: одна атомарная операция в Redis на запрос.
+# Состояние - два поля хэша, память не зависит от лимита.
+# Корзин может быть несколько (KEYS, в ARGV - пары емкость и скорость):
+# токен берется из всех сразу и только если он есть в каждой.
+# Возвращает 0, если запрос разрешен, иначе ожидание в миллисекундах.
+TOKEN_BUCKET_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+
+local levels = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local rate = tonumber(ARGV[2 * i])
+    local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(bucket[1])
+    local ts = tonumber(bucket[2])
+    if tokens == nil or ts == nil then
+        tokens = capacity
+        ts = now
+    end
+
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    if tokens < 1 then
+        wait = math.max(wait, math.ceil((1 - tokens) / rate))
+    end
+    levels[i] = tokens
+end
+
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local rate = tonumber(ARGV[2 * i])
+    local tokens = levels[i]
+    if wait == 0 then
+        tokens = tokens - 1
+    end
+
+    redis.call('HSET', key, 'tokens', tokens, 'ts', now)
+    -- Ключ живет, пока корзина не наполнится (после паузы - дольше)
+    local ttl = math.ceil((capacity - tokens) / rate)
+    redis.call('PEXPIRE', key, math.max(1, ttl))
+end
+return wait
+"""
+
+# Пауза token bucket (ответ 429 с retry_after): следующий токен
+# появится не раньше чем через ARGV[3] миллисекунд
+TOKEN_BUCKET_PAUSE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local pause = tonumber(ARGV[3])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1])
+local ts = tonumber(bucket[2])
+if tokens == nil or ts == nil then
+    tokens = capacity
+    ts = now
+end
+
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+tokens = math.min(tokens, 1 - pause * rate)
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+local ttl = math.ceil((capacity - tokens) / rate)
+redis.call('PEXPIRE', KEYS[1], math.max(1, ttl))
+return 0
+"""
+
+# Бот передает ID пользователя Telegram заголовком в запросах,
+# где его нет в параметрах (поиск и создание категорий)
+TELEGRAM_USER_HEADER = "X-Telegram-User-Id"
+
+_scripts = {}
+
+
+def get_script(source: str):
+    """Регистрирует Lua-скрипт один раз на процесс (вызов через EVALSHA)."""
+
+    script = _scripts.get(source)
+    if script is None:
+        script = get_redis_client().register_script(source)
+        _scripts[source] = script
+    return script
+
+
+def get_token_bucket_script():
+    return get_script(TOKEN_BUCKET_SCRIPT)
+
+
+def get_token_bucket_pause_script():
+    return get_script(TOKEN_BUCKET_PAUSE_SCRIPT)
+
+
+class TelegramUserRateThrottle(SimpleRateThrottle):
+    """
+    Ограничение частоты запросов по пользователю Telegram и по IP.
+
+    Пользователь берется из заголовка TELEGRAM_USER_HEADER или
+    user_telegram_id в параметрах запроса (тело не разбирается:
+    ограничитель работает до view). Все запросы бота идут с одного
+    адреса, поэтому без ID пользователя они делили бы одну корзину
+    на всех. ID пользователя задает клиент, поэтому поверх корзины
+    пользователя действует корзина IP (ip_scope) с общим лимитом
+    адреса: подставляя каждый раз новый ID, лимит адреса не обойти.
+
+    Вместо истории запросов в кэше используется token bucket в Redis:
+    емкость - число запросов из rate, пополнение - равномерно за период.
+    Обе корзины проверяются одним вызовом скрипта.
+    При недоступности Redis запросы пропускаются (fail open).
+    """
+
+    cache_format = "throttle:%(scope)s:%(ident)s"
+    ip_scope = None
+
+    def __init__(self):
+        super().__init__()
+        self.ip_num_requests, self.ip_duration = self.parse_rate(
+            self.THROTTLE_RATES.get(self.ip_scope),
+        )
+
+    def applies_to(self, request) -> bool:
+        """Относится ли метод запроса к бюджету этого класса."""
+
+        return True
+
+    def get_telegram_id(self, request) -> str | None:
+        telegram_id = request.headers.get(TELEGRAM_USER_HEADER)
+        if not telegram_id:
+            telegram_id = request.query_params.get("user_telegram_id")
+        return str(telegram_id) if telegram_id else None
+
+    def get_cache_key(self, request, view) -> str | None:
+        if not self.applies_to(request):
+            return None
+
+        telegram_id = self.get_telegram_id(request)
+        ident = (
+            f"tg_{telegram_id}"
+            if telegram_id
+            else f"ip_{self.get_ident(request)}"
+        )
+        return self.cache_format % {"scope": self.scope, "ident": ident}
+
+    def get_ip_cache_key(self, request) -> str:
+        return self.cache_format % {
+            "scope": self.ip_scope,
+            "ident": self.get_ident(request),
+        }
+
+    def allow_request(self, request, view) -> bool:
+        self.wait_seconds = None
+
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        keys = [self.key]
+        args = [self.num_requests, self.num_requests / (self.duration * 1000)]
+        if self.ip_num_requests is not None:
+            keys.append(self.get_ip_cache_key(request))
+            args += [
+                self.ip_num_requests,
+                self.ip_num_requests / (self.ip_duration * 1000),
+            ]
+
+        try:
+            wait_ms = get_token_bucket_script()(keys=keys, args=args)
+        except redis.RedisError as e:
+            print(LOG_THROTTLE_REDIS_ERROR.format(e))
+            return True
+
+        if wait_ms:
+            self.wait_seconds = wait_ms / 1000
+            return False
+        return True
+
+    def wait(self) -> float | None:
+        """Через сколько секунд появится токен (заголовок Retry-After)."""
+
+        return self.wait_seconds
+
+
+class TelegramUserReadThrottle(TelegramUserRateThrottle):
+    """Бюджет на чтение: GET, HEAD, OPTIONS."""
+
+    scope = "telegram_user_read"
+    ip_scope = "telegram_ip_read"
+
+    def applies_to(self, request) -> bool:
+        return request.method in SAFE_METHODS
+
+
+class TelegramUserWriteThrottle(TelegramUserRateThrottle):
+    """Бюджет на запись: POST, PUT, PATCH, DELETE."""
+
+    scope = "telegram_user_write"
+    ip_scope = "telegram_ip_write"
+
+    def applies_to(self, request) -> bool:
+        return request.method not in SAFE_METHODS
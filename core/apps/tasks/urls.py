@@ -3,9 +3,10 @@
 https://www.django-rest-framework.org/api-guide/routers/
 """
 
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 
-from .views import CategoryViewSet, TaskViewSet
+from .views import CategoryViewSet, TaskViewSet, metrics
 
 app_name = "tasks"
 
@@ -14,4 +15,7 @@ router = DefaultRouter()
 router.register(r"categories", CategoryViewSet, basename="category")
 router.register(r"tasks", TaskViewSet, basename="task")
 
-urlpatterns = router.urls
+urlpatterns = router.urls + [
+    # Метрики для Prometheus (GET /api/metrics/)
+    path("metrics/", metrics, name="metrics"),
+]
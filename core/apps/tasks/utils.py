@@ -1,11 +1,235 @@
 import hashlib
+import os
+import threading
 import time
+import uuid
+
+import redis
+from django.conf import settings
+
+from .constants import (
+    ID_EPOCH_MS,
+    ID_NODE_BITS,
+    ID_NODE_KEY,
+    ID_NODE_LEASE_CHECK_SECONDS,
+    ID_NODE_LEASE_SECONDS,
+    ID_NODE_SEQUENCE,
+    ID_SEQUENCE_BITS,
+    REDIS_CONNECT_TIMEOUT,
+    REDIS_SOCKET_TIMEOUT,
+)
+
+_redis_client = None
+_id_node_scripts = {}
+
+ID_SEQUENCE_MASK = (1 << ID_SEQUENCE_BITS) - 1
+ID_NODE_MASK = (1 << ID_NODE_BITS) - 1
+
+# Перебор кандидатов: INCR счетчика, SET NX ключа узла со сроком.
+# ARGV: префикс ключа узла, маска, токен владельца, срок в мс.
+# Возвращает номер узла или -1, если заняты все.
+ID_NODE_ALLOCATE_SCRIPT = """
+local mask = tonumber(ARGV[2])
+for _ = 0, mask do
+    local node = redis.call('INCR', KEYS[1]) % (mask + 1)
+    if redis.call(
+        'SET', ARGV[1] .. node, ARGV[3], 'NX', 'PX', ARGV[4]
+    ) then
+        return node
+    end
+end
+return -1
+"""
+
+# Продление и снятие аренды: только если ключ все еще у владельца
+ID_NODE_RENEW_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+ID_NODE_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class _IdGeneratorState:
+    """Состояние генератора ID в текущем процессе."""
+
+    lock = threading.Lock()
+    pid = None
+    node = 0
+    lease = None
+    lease_checked_at = 0.0
+    last_ms = 0
+    sequence = 0
+
+
+def get_id_node_script(source: str):
+    """Регистрирует Lua-скрипт аренды узла один раз на процесс."""
+
+    script = _id_node_scripts.get(source)
+    if script is None:
+        script = get_redis_client().register_script(source)
+        _id_node_scripts[source] = script
+    return script
 
 
 def generate_content_based_id(name: str = "") -> str:
-    """Генерирует ID на основе содержимого и времени."""
+    """
+    Генерирует ID на основе содержимого и времени.
+
+    Устарело: используется только в старых миграциях.
+    Новые ID создает generate_time_ordered_id.
+    """
 
     timestamp = int(time.time() * 1_000_000)
     content_hash = hashlib.md5(f"{name}_{timestamp}".encode()).hexdigest()
 
     return content_hash[:16]
+
+
+def allocate_id_node() -> tuple[int, str]:
+    """
+    Арендует номер узла генератора ID для текущего процесса.
+
+    Кандидаты берутся из счетчика в Redis (ID_NODE_SEQUENCE), а узел
+    считается занятым, пока существует его ключ (ID_NODE_KEY) со сроком
+    ID_NODE_LEASE_SECONDS. Ключ хранит случайный токен владельца, по
+    нему аренда продлевается и снимается. После оборота счетчика занятые
+    узлы пропускаются, поэтому два живых процесса не получают один
+    номер. Перебор идет одним Lua-скриптом через общий пул соединений
+    Redis (get_redis_client): отдельное соединение с PostgreSQL
+    на процесс не нужно.
+
+    Возвращает номер узла и токен владельца.
+    """
+
+    owner = uuid.uuid4().hex
+    node = get_id_node_script(ID_NODE_ALLOCATE_SCRIPT)(
+        keys=[ID_NODE_SEQUENCE],
+        args=[
+            ID_NODE_KEY.format(""),
+            ID_NODE_MASK,
+            owner,
+            ID_NODE_LEASE_SECONDS * 1000,
+        ],
+    )
+    if node < 0:
+        raise RuntimeError(
+            f"Все {ID_NODE_MASK + 1} номеров узлов генератора ID заняты"
+        )
+    return node, owner
+
+
+def ensure_id_node(state: type[_IdGeneratorState]) -> None:
+    """
+    Проверяет аренду номера узла и при необходимости берет новую.
+
+    Вызывается под state.lock. После fork аренда принадлежит родителю:
+    процесс ее не снимает и арендует свой узел. Не чаще раза
+    в ID_NODE_LEASE_CHECK_SECONDS аренда продлевается; если ключ
+    истек (процесс простаивал дольше ID_NODE_LEASE_SECONDS) и узел мог
+    достаться другому процессу, узел арендуется заново.
+    """
+
+    if state.pid == os.getpid():
+        now = time.monotonic()
+        if now - state.lease_checked_at < ID_NODE_LEASE_CHECK_SECONDS:
+            return
+        state.lease_checked_at = now
+        if get_id_node_script(ID_NODE_RENEW_SCRIPT)(
+            keys=[ID_NODE_KEY.format(state.node)],
+            args=[state.lease, ID_NODE_LEASE_SECONDS * 1000],
+        ):
+            return
+
+    state.node, state.lease = allocate_id_node()
+    state.pid = os.getpid()
+    state.lease_checked_at = time.monotonic()
+    state.last_ms = 0
+    state.sequence = 0
+
+
+def release_id_node() -> None:
+    """
+    Снимает аренду номера узла текущего процесса.
+
+    Узел сразу становится свободным, не дожидаясь истечения срока.
+    Следующий вызов генератора арендует узел заново.
+    """
+
+    state = _IdGeneratorState
+    with state.lock:
+        if state.pid == os.getpid():
+            get_id_node_script(ID_NODE_RELEASE_SCRIPT)(
+                keys=[ID_NODE_KEY.format(state.node)],
+                args=[state.lease],
+            )
+        state.pid = None
+        state.lease = None
+
+
+def generate_time_ordered_id() -> str:
+    """
+    Генерирует монотонный ID в стиле Snowflake: 16 hex-символов.
+
+    64 бита: 42 бита - миллисекунды от ID_EPOCH_MS, 10 бит - номер
+    узла (процесса), 12 бит - счетчик внутри миллисекунды.
+    ID одного процесса строго возрастают, строковый порядок совпадает
+    с порядком создания, новые строки дописываются в конец индекса.
+    Живые процессы держат разные номера узлов (см. allocate_id_node),
+    поэтому их ID не совпадают.
+
+    Номер узла арендуется при первом вызове в процессе (и заново
+    после fork, например в воркерах Celery). Поле ID вызывает
+    генератор по умолчанию, так что первое сохранение задачи или
+    категории в процессе делает один запрос к Redis; дальше - по
+    запросу продления раз в ID_NODE_LEASE_CHECK_SECONDS.
+    """
+
+    state = _IdGeneratorState
+    with state.lock:
+        ensure_id_node(state)
+
+        # Часы не должны идти назад: берем не меньше последнего значения
+        now_ms = max(int(time.time() * 1000) - ID_EPOCH_MS, state.last_ms)
+        if now_ms == state.last_ms:
+            state.sequence = (state.sequence + 1) & ID_SEQUENCE_MASK
+            if state.sequence == 0:
+                # Счетчик исчерпан: занимаем следующую миллисекунду
+                now_ms += 1
+        else:
+            state.sequence = 0
+        state.last_ms = now_ms
+
+        value = (
+            now_ms << (ID_NODE_BITS + ID_SEQUENCE_BITS)
+            | state.node << ID_SEQUENCE_BITS
+            | state.sequence
+        )
+
+    return f"{value:016x}"
+
+
+def get_redis_client() -> redis.Redis:
+    """
+    Возвращает общий клиент Redis (REDIS_URL) с пулом соединений
+    и таймаутами REDIS_SOCKET_TIMEOUT и REDIS_CONNECT_TIMEOUT.
+
+    Нужен там, где низкоуровневого API кэша Django недостаточно:
+    Lua-скрипты, пайплайны, атомарные счетчики.
+    """
+
+    global _redis_client
+
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(
+            settings.REDIS_URL,
+            socket_timeout=REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+        )
+    return _redis_client
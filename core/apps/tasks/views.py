@@ -3,14 +3,55 @@
 https://www.django-rest-framework.org/api-guide/viewsets/#modelviewset
 https://www.django-rest-framework.org/api-guide/permissions/#isauthenticatedorreadonly
 https://django-filter.readthedocs.io/en/stable/
+https://docs.djangoproject.com/en/5.2/ref/contrib/postgres/search/
+https://prometheus.io/docs/instrumenting/exposition_formats/
 """
 
+import hmac
 from typing import Any
+from django.conf import settings
+from django.contrib.postgres.expressions import ArraySubquery
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F, OuterRef
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets, permissions, status, mixins
+from rest_framework.decorators import action
+from rest_framework.parsers import JSONParser, MultiPartParser
 from rest_framework.response import Response
 
-from .models import Task, Category
-from .serializers import TaskSerializer, CategorySerializer
+from .constants import (
+    ARCHIVED_RESULTS_LIMIT,
+    SEARCH_CONFIG,
+    SEARCH_RESULTS_LIMIT,
+)
+from .agenda import (
+    get_agenda_subscription,
+    subscribe_agenda,
+    unsubscribe_agenda,
+)
+from .export import EXPORT_CONTENT_TYPES, EXPORT_FORMAT_NDJSON, stream_tasks
+from .filters import TaskFilter
+from .idempotency import idempotent
+from .importer import (
+    IMPORT_FORMAT_CSV,
+    IMPORT_FORMAT_JSON,
+    bulk_import_tasks,
+    parse_rows,
+)
+from .metrics import PROMETHEUS_CONTENT_TYPE, render_metrics
+from .models import ArchivedTask, ReminderOffset, Task, Category
+from .recurrence import expand_occurrences
+from .parsers import CSVTextParser
+from .serializers import (
+    AgendaSubscriptionSerializer,
+    ArchivedTaskSerializer,
+    CategorySerializer,
+    TaskSerializer,
+)
+from .stats import get_user_stats
+from .throttling import TelegramUserReadThrottle, TelegramUserWriteThrottle
 
 
 class CategoryViewSet(viewsets.ModelViewSet):
@@ -25,6 +66,9 @@ class CategoryViewSet(viewsets.ModelViewSet):
     # Разрешения: доступ разрешен всем пользователям
     permission_classes = [permissions.AllowAny]
 
+    # Ограничение частоты запросов по Telegram ID или IP
+    throttle_classes = [TelegramUserReadThrottle, TelegramUserWriteThrottle]
+
     def get_queryset(self):
         """Фильтрация по имени через параметр запроса."""
 
@@ -47,22 +91,54 @@ class TaskViewSet(
 
     Доступные endpoints:
     - GET /api/tasks/?user_telegram_id=123 - список задач пользователя
+      (фильтры due, within_days, category, category_name, ordering, tz
+      описаны в TaskFilter; occurrences=true - с вхождениями
+      повторяющихся задач за окно due/within_days)
     - POST /api/tasks/ - создание новой задачи
     - GET /api/tasks/{id}/ - получение конкретной задачи
     - PUT /api/tasks/{id}/ - полное обновление задачи
     - PATCH /api/tasks/{id}/ - частичное обновление задачи
     - DELETE /api/tasks/{id}/ - удаление задачи
+    - GET /api/tasks/search/?user_telegram_id=123&q=молоко - поиск задач
+    - GET /api/tasks/stats/?user_telegram_id=123 - статистика задач
+    - GET /api/tasks/export/?user_telegram_id=123&export_format=csv -
+      потоковая выгрузка задач (ndjson или csv)
+    - POST /api/tasks/import/?user_telegram_id=123 - массовый импорт
+      (JSON-список, text/csv или файл в поле file)
+    - GET /api/tasks/archived/?user_telegram_id=123 - архивные задачи
+    - GET, PUT, DELETE /api/tasks/agenda/?user_telegram_id=123 -
+      подписка на утреннюю сводку задач
+
+    POST и PATCH принимают заголовок Idempotency-Key: повтор запроса
+    с тем же ключом возвращает сохраненный ответ (см. idempotency.py).
     """
 
     serializer_class = TaskSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [TelegramUserReadThrottle, TelegramUserWriteThrottle]
+
+    # Фильтрация по сроку и категории выполняется в SQL
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = TaskFilter
 
     def get_queryset(self):
         """Отображение для пользователей своих задач."""
 
-        queryset = Task.objects.select_related(
-            "user",
-            "category",
+        # Поисковый вектор нужен только в WHERE/ORDER BY, не в ответе.
+        # Напоминания до срока - массивом в том же запросе
+        queryset = (
+            Task.objects.select_related(
+                "user",
+                "category",
+            )
+            .defer("search_vector")
+            .annotate(
+                reminder_offset_minutes=ArraySubquery(
+                    ReminderOffset.objects.filter(task=OuterRef("pk"))
+                    .order_by("-offset_minutes")
+                    .values("offset_minutes")
+                ),
+            )
         )
 
         telegram_id = self.request.query_params.get("user_telegram_id")
@@ -71,6 +147,21 @@ class TaskViewSet(
 
         return queryset.none()
 
+    @idempotent
+    def create(
+        self,
+        request,
+        *args,
+        **kwargs,
+    ) -> Response:
+        """Создание задачи (повторяемое по Idempotency-Key)."""
+
+        return super().create(
+            request,
+            *args,
+            **kwargs,
+        )
+
     def list(
         self,
         request,
@@ -87,12 +178,235 @@ class TaskViewSet(
                 },
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        return super().list(
+        response = super().list(
             request,
             *args,
             **kwargs,
         )
 
+        # Вхождения повторяющихся задач за окно списка вычисляются
+        # здесь, без запросов к БД: в таблице только ближайшее
+        filterset = self.filterset_class(
+            request.query_params,
+            queryset=Task.objects.none(),
+            request=request,
+        )
+        until = filterset.is_valid() and filterset.get_occurrences_until()
+        if until:
+            response.data = expand_occurrences(
+                response.data,
+                until,
+                ordering=request.query_params.get("ordering"),
+            )
+        return response
+
+    @action(detail=False, methods=["get"])
+    def search(self, request) -> Response:
+        """
+        Полнотекстовый поиск по названию и описанию задач пользователя.
+
+        Использует GIN-индекс по search_vector, результаты
+        отсортированы по релевантности (название весомее описания).
+        """
+
+        query = request.query_params.get("q", "").strip()
+        if not request.query_params.get("user_telegram_id") or not query:
+            return Response(
+                {
+                    "error": "Для поиска необходимо указать user_telegram_id и q",  # noqa: E501
+                    "example": "/api/tasks/search/?user_telegram_id=123456789&q=молоко",  # noqa: E501
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        search_query = SearchQuery(
+            query,
+            config=SEARCH_CONFIG,
+            search_type="websearch",
+        )
+        # Фильтры списка (по умолчанию только открытые задачи)
+        queryset = (
+            self.filter_queryset(self.get_queryset())
+            .filter(search_vector=search_query)
+            .annotate(rank=SearchRank(F("search_vector"), search_query))
+            .order_by("-rank", "end_date")[:SEARCH_RESULTS_LIMIT]
+        )
+
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=["get"])
+    def archived(self, request) -> Response:
+        """
+        Архивные задачи пользователя, последние по сроку.
+
+        Архив читается только здесь: список, поиск и статистика
+        работают с рабочей таблицей задач.
+        """
+
+        telegram_id = request.query_params.get("user_telegram_id")
+        if not telegram_id:
+            return Response(
+                {
+                    "error": "Для архива необходимо указать user_telegram_id",  # noqa: E501
+                    "example": "/api/tasks/archived/?user_telegram_id=123456789",  # noqa: E501
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        queryset = ArchivedTask.objects.select_related(
+            "user",
+            "category",
+        ).filter(user__username=f"tg_{telegram_id}")[:ARCHIVED_RESULTS_LIMIT]
+
+        serializer = ArchivedTaskSerializer(queryset, many=True)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=["get", "put", "delete"])
+    def agenda(self, request) -> Response:
+        """
+        Подписка на утреннюю сводку: просроченные задачи и задачи
+        на сегодня приходят в Telegram каждый день в send_at (МСК).
+
+        - GET - текущая подписка
+        - PUT {"send_at": "08:00"} - включить или изменить время
+        - DELETE - выключить
+        """
+
+        telegram_id = request.query_params.get("user_telegram_id")
+        if not telegram_id:
+            return Response(
+                {
+                    "error": "Для сводки необходимо указать user_telegram_id",  # noqa: E501
+                    "example": "/api/tasks/agenda/?user_telegram_id=123456789",  # noqa: E501
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if request.method == "DELETE":
+            unsubscribe_agenda(telegram_id)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        if request.method == "PUT":
+            serializer = AgendaSubscriptionSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            subscription = subscribe_agenda(
+                telegram_id,
+                serializer.validated_data["send_at"],
+            )
+        else:
+            subscription = get_agenda_subscription(telegram_id)
+
+        return Response(AgendaSubscriptionSerializer(subscription).data)
+
+    @action(detail=False, methods=["get"])
+    def stats(self, request) -> Response:
+        """
+        Статистика задач пользователя: всего, по категориям,
+        просроченные, на ближайшие 7 дней и ожидающие напоминания.
+        """
+
+        telegram_id = request.query_params.get("user_telegram_id")
+        if not telegram_id:
+            return Response(
+                {
+                    "error": "Для статистики необходимо указать user_telegram_id",  # noqa: E501
+                    "example": "/api/tasks/stats/?user_telegram_id=123456789",  # noqa: E501
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response(get_user_stats(f"tg_{telegram_id}"))
+
+    @action(detail=False, methods=["get"])
+    def export(self, request) -> StreamingHttpResponse | Response:
+        """
+        Потоковая выгрузка задач пользователя в NDJSON или CSV.
+
+        Строки читаются серверным курсором и сразу отдаются клиенту,
+        поэтому память не зависит от количества задач. Фильтры
+        списка (due, within_days, category...) тоже применяются.
+        """
+
+        telegram_id = request.query_params.get("user_telegram_id")
+        export_format = request.query_params.get(
+            "export_format",
+            EXPORT_FORMAT_NDJSON,
+        )
+        # ID попадает в имя файла (Content-Disposition): только цифры
+        if (
+            not telegram_id
+            or not telegram_id.isdigit()
+            or export_format not in EXPORT_CONTENT_TYPES
+        ):
+            return Response(
+                {
+                    "error": "Для выгрузки необходимо указать user_telegram_id и export_format (ndjson или csv)",  # noqa: E501
+                    "example": "/api/tasks/export/?user_telegram_id=123456789&export_format=csv",  # noqa: E501
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(
+            stream_tasks(queryset, export_format),
+            content_type=EXPORT_CONTENT_TYPES[export_format],
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="tasks_{int(telegram_id)}.{export_format}"'
+        )
+        return response
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="import",
+        parser_classes=[JSONParser, CSVTextParser, MultiPartParser],
+    )
+    def import_tasks(self, request) -> Response:
+        """
+        Массовый импорт задач пользователя из JSON или CSV.
+
+        Возвращает количество созданных задач, ошибки по строкам
+        и скорость импорта (строк в секунду).
+        """
+
+        telegram_id = request.query_params.get("user_telegram_id")
+        if not telegram_id or not telegram_id.isdigit():
+            return Response(
+                {
+                    "error": "Для импорта необходимо указать user_telegram_id",  # noqa: E501
+                    "example": "/api/tasks/import/?user_telegram_id=123456789",  # noqa: E501
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            if "file" in request.FILES:
+                upload = request.FILES["file"]
+                import_format = (
+                    IMPORT_FORMAT_CSV
+                    if upload.name.lower().endswith(".csv")
+                    else IMPORT_FORMAT_JSON
+                )
+                rows = parse_rows(upload.read(), import_format)
+            elif isinstance(request.data, str):
+                rows = parse_rows(request.data, IMPORT_FORMAT_CSV)
+            elif isinstance(request.data, list):
+                rows = request.data
+            else:
+                rows = request.data.get("tasks")
+                if not isinstance(rows, list):
+                    raise ValueError("Ожидается список задач")
+        except (ValueError, UnicodeDecodeError) as e:
+            return Response(
+                {"error": f"Не удалось разобрать файл импорта: {e}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        result = bulk_import_tasks(rows, int(telegram_id))
+        return Response(result.as_dict(), status=status.HTTP_201_CREATED)
+
     def retrieve(
         self,
         request,
@@ -120,8 +434,13 @@ class TaskViewSet(
         *args,
         **kwargs,
     ) -> Response:
-        """Обновление задачи с проверкой принадлежности."""
+        """
+        Обновление задачи с проверкой принадлежности.
+
+        Задача загружается один раз и для проверки, и для сериализатора.
+        """
 
+        partial = kwargs.pop("partial", False)
         instance = self.get_object()
         telegram_id = request.query_params.get("user_telegram_id")
 
@@ -132,12 +451,16 @@ class TaskViewSet(
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        return super().update(
-            request,
-            *args,
-            **kwargs,
+        serializer = self.get_serializer(
+            instance,
+            data=request.data,
+            partial=partial,
         )
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+        return Response(serializer.data)
 
+    @idempotent
     def partial_update(
         self,
         request,
@@ -147,17 +470,8 @@ class TaskViewSet(
         """
         Частичное обновление задачи с проверкой принадлежности.
         """
-        instance = self.get_object()
-        telegram_id = request.query_params.get("user_telegram_id")
-
-        # Проверка принадлежности задачи
-        if telegram_id and instance.user.username != f"tg_{telegram_id}":
-            return Response(
-                {"error": "Задача не найдена или у вас нет прав доступа"},
-                status=status.HTTP_404_NOT_FOUND,
-            )
-
-        return super().partial_update(
+        kwargs["partial"] = True
+        return self.update(
             request,
             *args,
             **kwargs,
@@ -192,3 +506,28 @@ class TaskViewSet(
             "user_telegram_id",
         )
         return context
+
+
+@require_GET
+def metrics(request) -> HttpResponse:
+    """
+    Метрики доставки напоминаний в формате Prometheus.
+
+    Нужен заголовок Authorization: Bearer <METRICS_TOKEN>.
+    Без METRICS_TOKEN эндпоинт выключен (404): метрики не должны
+    быть открыты на публичном хосте API.
+    """
+
+    token = settings.METRICS_TOKEN
+    if not token:
+        return HttpResponse(status=status.HTTP_404_NOT_FOUND)
+    # Сравнение за постоянное время: по времени ответа токен
+    # не подобрать посимвольно
+    header = request.headers.get("Authorization", "")
+    if not hmac.compare_digest(header.encode(), f"Bearer {token}".encode()):
+        return HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+
+    return HttpResponse(
+        render_metrics(),
+        content_type=PROMETHEUS_CONTENT_TYPE,
+    )
@@ -1,20 +1,79 @@
 """
 Документация:
 https://docs.celeryq.dev/en/stable/django/first-steps-with-django.html
+https://docs.celeryq.dev/en/stable/userguide/routing.html
+https://docs.celeryq.dev/en/stable/userguide/routing.html#redis-message-priorities
 
-Команда запуска:
+Задачи разведены по очередям, у каждой - свой воркер
+(см. docker/docker-compose.prod.yml):
+- reminders - напоминания о сроках и публикация outbox, от них
+  зависит своевременность доставки;
+- digests - рассылки-сводки (утренняя сводка);
+- maintenance - долгие пакетные задачи (архивация) и все задачи
+  без маршрута.
+Долгая архивация не задерживает напоминания: их забирает другой
+воркер. Внутри очереди сообщения упорядочены по приоритету
+(в Redis 0 - наивысший).
+
+Сообщения, поставленные до разделения в общую очередь celery,
+никто не забирает: напоминания из них восстанавливает
+reconcile_reminders --all.
+
+Команда запуска (все очереди одним воркером):
 make celery
 """
 
 from __future__ import absolute_import, unicode_literals
 import os
 from celery import Celery
+from kombu import Exchange, Queue
 
 os.environ.setdefault(
     "DJANGO_SETTINGS_MODULE",
     "core.project.settings",
 )
 
+REMINDERS_QUEUE = "reminders"
+DIGESTS_QUEUE = "digests"
+MAINTENANCE_QUEUE = "maintenance"
+
+# Приоритеты сообщений: ступени Redis 0, 3, 6, 9
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 3
+PRIORITY_LOW = 9
+
+# Маршруты задач приложения tasks: очередь и приоритет
+TASK_ROUTES = {
+    "core.apps.tasks.tasks.send_task_reminder": {
+        "queue": REMINDERS_QUEUE,
+        "priority": PRIORITY_HIGH,
+    },
+    "core.apps.tasks.tasks.relay_outbox": {
+        "queue": REMINDERS_QUEUE,
+        "priority": PRIORITY_HIGH,
+    },
+    "core.apps.tasks.tasks.send_offset_reminders": {
+        "queue": REMINDERS_QUEUE,
+        "priority": PRIORITY_NORMAL,
+    },
+    "core.apps.tasks.tasks.sweep_reminders": {
+        "queue": REMINDERS_QUEUE,
+        "priority": PRIORITY_NORMAL,
+    },
+    "core.apps.tasks.tasks.advance_recurring_tasks": {
+        "queue": REMINDERS_QUEUE,
+        "priority": PRIORITY_NORMAL,
+    },
+    "core.apps.tasks.tasks.send_agendas": {
+        "queue": DIGESTS_QUEUE,
+        "priority": PRIORITY_NORMAL,
+    },
+    "core.apps.tasks.tasks.archive_tasks": {
+        "queue": MAINTENANCE_QUEUE,
+        "priority": PRIORITY_LOW,
+    },
+}
+
 app = Celery("core.project")
 
 app.config_from_object(
@@ -22,4 +81,19 @@ app.config_from_object(
     namespace="CELERY",
 )
 
+app.conf.update(
+    task_queues=[
+        Queue(name, Exchange(name), routing_key=name)
+        for name in (REMINDERS_QUEUE, DIGESTS_QUEUE, MAINTENANCE_QUEUE)
+    ],
+    task_default_queue=MAINTENANCE_QUEUE,
+    task_routes=TASK_ROUTES,
+    broker_transport_options={
+        **app.conf.broker_transport_options,
+        # Воркер нескольких очередей (-Q) опрашивает их в порядке
+        # перечисления, а не по кругу
+        "queue_order_strategy": "priority",
+    },
+)
+
 app.autodiscover_tasks()
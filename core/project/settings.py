@@ -16,6 +16,7 @@ from pathlib import Path
 import sys
 
 
+from celery.schedules import crontab
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -52,8 +53,10 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "debug_toolbar",
     "rest_framework",
+    "django_filters",
     "core.apps.tasks.apps.TasksConfig",
 ]
 
@@ -114,13 +117,33 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/1")
+
 CACHES = {
     "default": {
         "BACKEND": "django.core.cache.backends.redis.RedisCache",
-        "LOCATION": "redis://redis:6379/1",
+        "LOCATION": REDIS_URL,
     }
 }
 
+# Django REST Framework
+# https://www.django-rest-framework.org/api-guide/throttling/
+
+REST_FRAMEWORK = {
+    # Бюджеты запросов на одного Telegram пользователя (или IP)
+    # и общий бюджет одного IP: через адрес бота идут запросы
+    # всех его пользователей
+    "DEFAULT_THROTTLE_RATES": {
+        "telegram_user_read": os.getenv("THROTTLE_READ_RATE", "120/min"),
+        "telegram_user_write": os.getenv("THROTTLE_WRITE_RATE", "30/min"),
+        "telegram_ip_read": os.getenv("THROTTLE_IP_READ_RATE", "6000/min"),
+        "telegram_ip_write": os.getenv(
+            "THROTTLE_IP_WRITE_RATE",
+            "1500/min",
+        ),
+    },
+}
+
 CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL")
 CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND")
 CELERY_ACCEPT_CONTENT = ["json"]
@@ -131,6 +154,83 @@ CELERY_ENABLE_UTC = True
 CELERY_TIMEZONE = "UTC"
 CELERY_TASK_ALWAYS_EAGER = False
 
+# Периодические задачи (celery beat)
+CELERY_BEAT_SCHEDULE = {
+    "archive-expired-tasks": {
+        "task": "core.apps.tasks.tasks.archive_tasks",
+        "schedule": crontab(hour=3, minute=30),
+    },
+    # Утренние сводки: время подписки округляется до 5 минут
+    "send-agendas": {
+        "task": "core.apps.tasks.tasks.send_agendas",
+        "schedule": crontab(minute="*/5"),
+        "options": {"expires": 5 * 60},
+    },
+}
+
+# Через сколько дней после срока задача переносится в архив
+ARCHIVE_RETENTION_DAYS = int(os.getenv("ARCHIVE_RETENTION_DAYS", 30))
+
+# Режим напоминаний:
+# - eta: при сохранении задачи в брокер ставится сообщение с ETA
+#   (через outbox, см. OUTBOX_RELAY_INTERVAL)
+# - sweep: beat раз в REMINDER_SWEEP_INTERVAL секунд запускает
+#   sweep_reminders, который выбирает наступившие напоминания из БД
+REMINDER_MODE = os.getenv("REMINDER_MODE", "eta")
+REMINDER_SWEEP_INTERVAL = int(os.getenv("REMINDER_SWEEP_INTERVAL", 30))
+
+# Напоминания одного пользователя со сроками в пределах окна
+# (секунды) объединяются в одно сообщение
+REMINDER_COALESCE_WINDOW = int(os.getenv("REMINDER_COALESCE_WINDOW", 60))
+
+if REMINDER_MODE == "sweep":
+    CELERY_BEAT_SCHEDULE["sweep-reminders"] = {
+        "task": "core.apps.tasks.tasks.sweep_reminders",
+        "schedule": REMINDER_SWEEP_INTERVAL,
+        # Пропущенный запуск не нужен: следующий заберет те же задачи
+        "options": {"expires": REMINDER_SWEEP_INTERVAL},
+    }
+
+# Напоминания до срока (ReminderOffset) отправляются всегда через
+# beat, в любом режиме: одно сообщение брокеру раз в
+# REMINDER_OFFSETS_INTERVAL секунд, сколько бы их ни было у задач
+REMINDER_OFFSETS_INTERVAL = int(os.getenv("REMINDER_OFFSETS_INTERVAL", 30))
+
+CELERY_BEAT_SCHEDULE["send-offset-reminders"] = {
+    "task": "core.apps.tasks.tasks.send_offset_reminders",
+    "schedule": REMINDER_OFFSETS_INTERVAL,
+    "options": {"expires": REMINDER_OFFSETS_INTERVAL},
+}
+
+# Повторяющиеся задачи: раз в RECURRENCE_ADVANCE_INTERVAL секунд
+# пропущенные вхождения уступают следующим (advance_recurring_tasks)
+RECURRENCE_ADVANCE_INTERVAL = int(
+    os.getenv("RECURRENCE_ADVANCE_INTERVAL", 300),
+)
+
+CELERY_BEAT_SCHEDULE["advance-recurring-tasks"] = {
+    "task": "core.apps.tasks.tasks.advance_recurring_tasks",
+    "schedule": RECURRENCE_ADVANCE_INTERVAL,
+    "options": {"expires": RECURRENCE_ADVANCE_INTERVAL},
+}
+
+# Outbox: сообщения Celery, записанные вместе с изменениями задач,
+# публикуются в брокер раз в OUTBOX_RELAY_INTERVAL секунд
+OUTBOX_RELAY_INTERVAL = int(os.getenv("OUTBOX_RELAY_INTERVAL", 2))
+
+CELERY_BEAT_SCHEDULE["relay-outbox"] = {
+    "task": "core.apps.tasks.tasks.relay_outbox",
+    "schedule": OUTBOX_RELAY_INTERVAL,
+    # Пропущенный запуск не нужен: события дождутся следующего
+    "options": {"expires": OUTBOX_RELAY_INTERVAL},
+}
+
+# Метрики доставки напоминаний: префикс ключей в Redis (REDIS_URL)
+# и токен для GET /api/metrics/ (Authorization: Bearer <токен>),
+# без токена эндпоинт выключен
+METRICS_KEY_PREFIX = os.getenv("METRICS_KEY_PREFIX", "metrics")
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 